@@ -0,0 +1,74 @@
+"""Alembic 迁移环境
+
+数据库地址和表结构元数据均来自应用本身：
+- 地址: app.core.database.DATABASE_URL（环境变量 DATABASE_URL）
+- 元数据: app.core.database.Base.metadata（导入全部模型）
+
+表由 init_db() 在启动时创建，迁移脚本只负责已有表的结构变更，
+脚本需要可以在 init_db() 之后重复执行（建索引使用 if_not_exists 等）。
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from app.core.database import Base, DATABASE_URL
+from app.models import message, config as config_model, command, token, stats, job  # noqa: F401
+
+config = context.config
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """autogenerate 忽略不由模型管理的表（FTS5 全文索引及其影子表）"""
+    if type_ == "table":
+        return not (name or "").startswith("messages_fts")
+    return True
+
+
+def run_migrations_offline() -> None:
+    """离线模式：只生成 SQL，不连接数据库"""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
+        render_as_batch=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """在线模式：连接数据库执行迁移"""
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
+            # SQLite 不支持大部分 ALTER TABLE，使用批量模式重建表
+            render_as_batch=True,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,49 @@
+"""消息表复合索引
+
+消息列表按方向或发送者筛选，并按 create_time 倒序分页：
+- (direction, create_time): 方向筛选
+- (from_user, create_time): 发送者筛选，同时覆盖原 from_user 单列索引
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_messages_direction_create_time",
+        "messages",
+        ["direction", "create_time"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_messages_from_user_create_time",
+        "messages",
+        ["from_user", "create_time"],
+        if_not_exists=True,
+    )
+    op.drop_index("ix_messages_from_user", table_name="messages", if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_messages_from_user", "messages", ["from_user"], if_not_exists=True
+    )
+    op.drop_index(
+        "ix_messages_from_user_create_time", table_name="messages", if_exists=True
+    )
+    op.drop_index(
+        "ix_messages_direction_create_time", table_name="messages", if_exists=True
+    )
@@ -0,0 +1,34 @@
+"""消息全文索引（SQLite FTS5）
+
+messages_fts 外部内容表（trigram 分词）及同步触发器，创建后为已有消息重建索引。
+非 SQLite 数据库不需要此迁移，检索使用 LIKE。
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.services.search import MESSAGE_FTS_DROP_DDL, create_message_fts
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_message_fts(op.get_bind())
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    for ddl in MESSAGE_FTS_DROP_DDL:
+        bind.exec_driver_sql(ddl)
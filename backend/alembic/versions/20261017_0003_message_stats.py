@@ -0,0 +1,54 @@
+"""消息统计汇总表
+
+message_stats 按分钟/小时/天汇总消息数，创建后从已有消息回填。
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.services.stats import backfill_message_stats
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # init_db() 可能已创建此表
+    if "message_stats" not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            "message_stats",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False, comment="主键ID"),
+            sa.Column("granularity", sa.String(length=10), nullable=False, comment="粒度（minute/hour/day）"),
+            sa.Column("bucket", sa.Integer(), nullable=False, comment="时间桶起点（时间戳）"),
+            sa.Column("direction", sa.String(length=10), nullable=False, comment="in/out（接收/发送）"),
+            sa.Column("msg_type", sa.String(length=20), nullable=False, comment="消息类型"),
+            sa.Column("status", sa.String(length=20), nullable=False, comment="状态"),
+            sa.Column("from_user", sa.String(length=64), nullable=False, comment="发送者UserID"),
+            sa.Column("count", sa.Integer(), nullable=False, comment="消息数"),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint(
+                "granularity",
+                "bucket",
+                "direction",
+                "msg_type",
+                "status",
+                "from_user",
+                name="uq_message_stats_key",
+            ),
+        )
+    backfill_message_stats(bind)
+
+
+def downgrade() -> None:
+    op.drop_table("message_stats")
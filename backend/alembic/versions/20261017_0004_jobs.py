@@ -0,0 +1,63 @@
+"""后台任务表
+
+jobs 记录后台命令任务的状态、进度和结果。
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # init_db() 可能已创建此表
+    if "jobs" in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False, comment="主键ID"),
+        sa.Column("job_id", sa.String(length=32), nullable=False, comment="任务ID"),
+        sa.Column("command_id", sa.String(length=50), nullable=False, comment="命令ID"),
+        sa.Column("user_id", sa.String(length=64), nullable=False, comment="提交任务的用户UserID"),
+        sa.Column(
+            "status",
+            sa.String(length=20),
+            nullable=False,
+            comment="状态（pending/running/succeeded/failed/cancelled/interrupted）",
+        ),
+        sa.Column("progress", sa.Integer(), nullable=False, comment="进度（0-100）"),
+        sa.Column("progress_message", sa.Text(), nullable=True, comment="进度说明"),
+        sa.Column("result", sa.Text(), nullable=True, comment="执行结果"),
+        sa.Column("error", sa.Text(), nullable=True, comment="错误信息"),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.func.now(),
+            nullable=True,
+            comment="记录创建时间",
+        ),
+        sa.Column("started_at", sa.DateTime(), nullable=True, comment="开始执行时间"),
+        sa.Column("finished_at", sa.DateTime(), nullable=True, comment="结束时间"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("job_id"),
+    )
+    op.create_index("ix_jobs_status_id", "jobs", ["status", "id"], unique=False)
+    op.create_index("ix_jobs_user_id_id", "jobs", ["user_id", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_user_id_id", table_name="jobs")
+    op.drop_index("ix_jobs_status_id", table_name="jobs")
+    op.drop_table("jobs")
@@ -0,0 +1,51 @@
+"""命令表执行选项
+
+commands 增加 timeout、max_concurrency、background 列，命令表中定义的
+脚本命令可以单独设置超时、并发上限和是否作为后台任务执行。
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    sa.Column("timeout", sa.Float(), nullable=True, comment="超时时间（秒），为空使用默认值"),
+    sa.Column("max_concurrency", sa.Integer(), nullable=True, comment="最大并发执行数，为空不限制"),
+    sa.Column(
+        "background",
+        sa.Boolean(),
+        server_default=sa.false(),
+        nullable=True,
+        comment="是否作为后台任务执行",
+    ),
+)
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "commands" not in inspector.get_table_names():
+        return
+
+    # init_db() 可能已创建带新列的表
+    existing = {column["name"] for column in inspector.get_columns("commands")}
+    for column in COLUMNS:
+        if column.name not in existing:
+            op.add_column("commands", column)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("commands") as batch_op:
+        for column in reversed(COLUMNS):
+            batch_op.drop_column(column.name)
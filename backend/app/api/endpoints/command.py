@@ -8,10 +8,11 @@
 """
 
 import logging
+from typing import List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.security import verify_token
 from app.models.command import Command as DBCommand
 from app.schemas.command import (
@@ -21,17 +22,45 @@ from app.schemas.command import (
     CommandSyncMenuResponse,
 )
 from app.services.command import command_manager
-from app.services.wechat.client import WeChatClient
-from app.api.endpoints.wechat import get_wechat_config
+from app.services.command_router import usage
+from app.api.endpoints.wechat import get_wechat_snapshot
+from app.services.dashboard import dashboard_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def list_commands() -> List[CommandInDB]:
+    """命令管理器中的全部命令（转换为响应模型）
+
+    Returns:
+        List[CommandInDB]: 命令列表
+    """
+    return [
+        CommandInDB(
+            id=0,  # 内存中的命令没有数据库ID
+            command_id=cmd.id,
+            name=cmd.name,
+            description=cmd.description,
+            category=cmd.category,
+            handler=cmd.id,  # 使用命令ID作为handler标识
+            admin_only=cmd.admin_only,
+            enabled=cmd.enabled,
+            sort_order=cmd.sort_order,
+            timeout=cmd.timeout,
+            max_concurrency=cmd.max_concurrency,
+            background=cmd.background,
+            aliases=cmd.aliases,
+            usage=usage(cmd.id, cmd.args) if cmd.args else None,
+        )
+        for cmd in command_manager.get_all_commands()
+    ]
+
+
 @router.get("", response_model=CommandListResponse)
 async def get_commands(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(verify_token)  # update-001: 添加 Token 验证
 ):
     """获取命令列表
@@ -49,26 +78,7 @@ async def get_commands(
     """
     try:
         # 从命令管理器获取命令
-        commands = command_manager.get_all_commands()
-
-        # 转换为响应模型
-        command_list = []
-        for cmd in commands:
-            command_list.append(
-                CommandInDB(
-                    id=0,  # 内存中的命令没有数据库ID
-                    command_id=cmd.id,
-                    name=cmd.name,
-                    description=cmd.description,
-                    category=cmd.category,
-                    handler=cmd.id,  # 使用命令ID作为handler标识
-                    admin_only=cmd.admin_only,
-                    enabled=cmd.enabled,
-                    sort_order=cmd.sort_order,
-                )
-            )
-
-        return CommandListResponse(commands=command_list)
+        return CommandListResponse(commands=list_commands())
 
     except Exception as e:
         logger.error(f"获取命令列表失败: {e}")
@@ -79,7 +89,7 @@ async def get_commands(
 async def update_command(
     command_id: str,
     update: CommandUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(verify_token)  # update-001: 添加 Token 验证
 ):
     """更新命令
@@ -96,18 +106,14 @@ async def update_command(
         dict: 更新结果
     """
     try:
-        # 获取命令
-        command = command_manager.get_command(command_id)
+        # 更新命令属性（同时使帮助文本和菜单缓存失效）
+        command = command_manager.update_command(
+            command_id, enabled=update.enabled, sort_order=update.sort_order
+        )
         if not command:
             raise HTTPException(status_code=404, detail="命令不存在")
 
-        # 更新命令属性
-        if update.enabled is not None:
-            command.enabled = update.enabled
-        if update.sort_order is not None:
-            command.sort_order = update.sort_order
-
-        logger.info(f"更新命令: {command_id}")
+        dashboard_cache.invalidate()
 
         return {"success": True, "message": "命令更新成功"}
 
@@ -120,7 +126,7 @@ async def update_command(
 
 @router.post("/sync-menu", response_model=CommandSyncMenuResponse)
 async def sync_menu(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(verify_token)  # update-001: 添加 Token 验证
 ):
     """同步菜单到企业微信
@@ -137,15 +143,8 @@ async def sync_menu(
         CommandSyncMenuResponse: 同步结果
     """
     try:
-        # 获取配置
-        config = get_wechat_config(db)
-
-        # 创建客户端
-        client = WeChatClient(
-            corp_id=config.corp_id,
-            app_secret=config.app_secret,
-            agent_id=config.agent_id,
-        )
+        # 获取配置快照中的客户端
+        client = (await get_wechat_snapshot(db)).client
 
         # 生成菜单数据
         menu_data = command_manager.generate_menu_data()
@@ -10,9 +10,10 @@
 import logging
 import json
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.security import verify_token
 from app.models.config import Config
 from app.schemas.config import (
@@ -22,6 +23,8 @@ from app.schemas.config import (
     WeChatConfigTestResponse,
 )
 from app.services.wechat.client import WeChatClient, WeChatClientException
+from app.services.config import config_store
+from app.services.dashboard import dashboard_cache
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +33,7 @@ router = APIRouter()
 
 @router.get("/wechat", response_model=WeChatConfigResponse)
 async def get_wechat_config(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(verify_token)  # update-001: 添加 Token 验证
 ):
     """获取企业微信配置
@@ -49,23 +52,8 @@ async def get_wechat_config(
         WeChatConfigResponse: 企业微信配置（不包含敏感信息）
     """
     try:
-        # 从数据库读取配置
-        configs = {}
-        config_keys = [
-            "wechat.corp_id",
-            "wechat.agent_id",
-            "wechat.token",
-            "wechat.encoding_aes_key",
-            "wechat.admin_users",
-        ]
-
-        for key in config_keys:
-            config = db.query(Config).filter(Config.key == key).first()
-            if config:
-                try:
-                    configs[key.replace("wechat.", "")] = json.loads(config.value)
-                except:
-                    configs[key.replace("wechat.", "")] = config.value
+        # 从配置快照读取（与回调接口共享）
+        configs = (await config_store.get_snapshot(db)).values
 
         return WeChatConfigResponse(
             corp_id=str(configs.get("corp_id", "")),
@@ -84,7 +72,7 @@ async def get_wechat_config(
 @router.put("/wechat", response_model=WeChatConfigResponse)
 async def update_wechat_config(
     config: WeChatConfig,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(verify_token)  # update-001: 添加 Token 验证
 ):
     """更新企业微信配置
@@ -114,15 +102,23 @@ async def update_wechat_config(
             "wechat.admin_users": json.dumps(config.admin_users),
         }
 
+        # 一次查询读取已有配置
+        result = await db.execute(select(Config).where(Config.key.in_(list(config_map))))
+        existing = {db_config.key: db_config for db_config in result.scalars()}
+
         for key, value in config_map.items():
-            db_config = db.query(Config).filter(Config.key == key).first()
+            db_config = existing.get(key)
             if db_config:
                 db_config.value = json.dumps(value) if not isinstance(value, str) else value
             else:
                 db_config = Config(key=key, value=json.dumps(value) if not isinstance(value, str) else value)
                 db.add(db_config)
 
-        db.commit()
+        await db.commit()
+
+        # 使配置快照失效，下次访问时重新加载
+        config_store.invalidate()
+        dashboard_cache.invalidate()
 
         logger.info("企业微信配置更新成功")
 
@@ -137,7 +133,7 @@ async def update_wechat_config(
 
     except Exception as e:
         logger.error(f"更新配置失败: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="更新配置失败")
 
 
@@ -0,0 +1,110 @@
+"""仪表盘接口
+
+一次请求返回仪表盘需要的全部数据（最近消息、命令列表、配置状态、计数），
+响应带短期缓存和 ETag，长时间打开的仪表盘轮询时几乎不产生开销。
+"""
+
+import logging
+import time
+from typing import Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_read_db
+from app.core.security import verify_token
+from app.models.message import Message
+from app.schemas.dashboard import DashboardConfigStatus, DashboardCounters, DashboardSummary
+from app.schemas.message import MessageInDB
+from app.api.endpoints.command import list_commands
+from app.services.config import config_store
+from app.services.dashboard import dashboard_cache, etag_matches
+from app.services.history import MESSAGE_ORDER
+from app.services.stats import message_stats
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# 最近消息条数
+RECENT_MESSAGES = 5
+
+
+async def build_summary(db: AsyncSession) -> DashboardSummary:
+    """生成仪表盘汇总
+
+    最近消息只取前几条，不计算总数；今日消息数读取统计汇总表。
+
+    Args:
+        db: 数据库会话
+
+    Returns:
+        DashboardSummary: 仪表盘汇总
+    """
+    result = await db.execute(select(Message).order_by(*MESSAGE_ORDER).limit(RECENT_MESSAGES))
+    recent = [MessageInDB.from_orm(msg) for msg in result.scalars().all()]
+
+    commands = list_commands()
+    # 配置不完整时也返回状态，不使用 get_wechat_snapshot
+    snapshot = await config_store.get_snapshot(db)
+    values = snapshot.values
+    today = await message_stats.today(db)
+
+    return DashboardSummary(
+        recent_messages=recent,
+        commands=commands,
+        config=DashboardConfigStatus(
+            configured=snapshot.complete,
+            callback_configured=bool(values.get("token") and values.get("encoding_aes_key")),
+            corp_id=str(values.get("corp_id") or "") or None,
+            agent_id=str(values.get("agent_id") or "") or None,
+            admin_count=len(snapshot.admin_users),
+        ),
+        counters=DashboardCounters(
+            today_messages=sum(today.values()),
+            today_in=today.get("in", 0),
+            today_out=today.get("out", 0),
+            enabled_commands=sum(1 for cmd in commands if cmd.enabled),
+            total_commands=len(commands),
+        ),
+        generated_at=int(time.time()),
+    )
+
+
+@router.get("/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(
+    if_none_match: str = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    _: dict = Depends(verify_token)
+):
+    """获取仪表盘汇总
+
+    响应在 DASHBOARD_CACHE_TTL 秒内共用；请求头 If-None-Match 与 ETag
+    一致时返回 304。ETag 不随 generated_at 变化，内容未变时 generated_at
+    保持为该内容首次生成的时间。
+
+    Args:
+        if_none_match: 上次响应的 ETag
+        db: 数据库会话
+
+    Returns:
+        DashboardSummary: 最近消息、命令列表、配置状态和计数
+    """
+    async def build() -> Tuple[bytes, bytes]:
+        summary = await build_summary(db)
+        return (
+            summary.model_dump_json().encode(),
+            summary.model_dump_json(exclude={"generated_at"}).encode(),
+        )
+
+    try:
+        body, etag = await dashboard_cache.get(build)
+    except Exception as e:
+        logger.error(f"获取仪表盘数据失败: {e}")
+        raise HTTPException(status_code=500, detail="获取仪表盘数据失败")
+
+    # no-cache: 浏览器缓存响应，但每次都带 If-None-Match 重新验证
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,136 @@
+"""后台任务接口
+
+查询后台命令任务的状态、进度和结果，取消排队中或执行中的任务。
+"""
+
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db, get_async_read_db
+from app.core.security import verify_token
+from app.models.job import Job
+from app.schemas.job import JobCancelResponse, JobInDB, JobListResponse
+from app.services.jobs import FINISHED_STATUSES, job_manager
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def to_schema(job: Job) -> JobInDB:
+    """任务记录转换为响应模型，本进程中执行的任务使用最新进度
+
+    Args:
+        job: 任务记录
+
+    Returns:
+        JobInDB: 任务
+    """
+    item = JobInDB.model_validate(job)
+    live = job_manager.live_progress(job.job_id) if job.status == "running" else None
+    if live is not None:
+        item.progress, item.progress_message = live
+    return item
+
+
+@router.get("", response_model=JobListResponse)
+async def get_jobs(
+    page: int = Query(1, ge=1, description="页码"),
+    page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+    status: Optional[str] = Query(None, description="状态筛选"),
+    user_id: Optional[str] = Query(None, description="用户筛选"),
+    command_id: Optional[str] = Query(None, description="命令筛选"),
+    db: AsyncSession = Depends(get_async_read_db),
+    _: dict = Depends(verify_token),
+):
+    """获取任务列表（按提交时间倒序）
+
+    Args:
+        page: 页码
+        page_size: 每页数量
+        status: 状态筛选
+        user_id: 用户筛选
+        command_id: 命令筛选
+        db: 数据库会话
+
+    Returns:
+        JobListResponse: 任务列表
+    """
+    try:
+        query = select(Job)
+        if status:
+            query = query.where(Job.status == status)
+        if user_id:
+            query = query.where(Job.user_id == user_id)
+        if command_id:
+            query = query.where(Job.command_id == command_id)
+
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+        result = await db.execute(
+            query.order_by(Job.id.desc()).offset((page - 1) * page_size).limit(page_size)
+        )
+
+        return JobListResponse(
+            total=total or 0,
+            page=page,
+            page_size=page_size,
+            items=[to_schema(job) for job in result.scalars().all()],
+        )
+
+    except Exception as e:
+        logger.error(f"获取任务列表失败: {e}")
+        raise HTTPException(status_code=500, detail="获取任务列表失败")
+
+
+@router.get("/{job_id}", response_model=JobInDB)
+async def get_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_read_db),
+    _: dict = Depends(verify_token),
+):
+    """获取任务详情
+
+    Args:
+        job_id: 任务ID
+        db: 数据库会话
+
+    Returns:
+        JobInDB: 任务
+    """
+    job = await db.scalar(select(Job).where(Job.job_id == job_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return to_schema(job)
+
+
+@router.post("/{job_id}/cancel", response_model=JobCancelResponse)
+async def cancel_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    _: dict = Depends(verify_token),
+):
+    """取消任务
+
+    排队中的任务和协程命令立即停止；同步命令需要处理函数检查
+    job.cancelled 后自行返回。
+
+    Args:
+        job_id: 任务ID
+        db: 数据库会话
+
+    Returns:
+        JobCancelResponse: 取消结果
+    """
+    job = await db.scalar(select(Job).where(Job.job_id == job_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    if job.status in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"任务已结束: {job.status}")
+
+    if not job_manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail="任务不在当前进程中执行，无法取消")
+
+    return JobCancelResponse(success=True, message="已请求取消任务")
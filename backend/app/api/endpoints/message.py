@@ -8,11 +8,14 @@
 """
 
 import logging
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 
-from app.core.database import get_db
+from app.core.config import MESSAGE_SEARCH_RANK_WINDOW
+from app.core.database import get_async_db, get_async_read_db
 from app.core.security import verify_token
 from app.models.message import Message
 from app.schemas.message import (
@@ -21,9 +24,33 @@ from app.schemas.message import (
     MessageListQuery,
     MessageListResponse,
     MessageInDB,
+    MessageStatsResponse,
 )
-from app.services.wechat.client import WeChatClient
-from app.api.endpoints.wechat import get_wechat_config
+from app.api.endpoints.wechat import get_wechat_snapshot
+from app.services.history import (
+    TOTAL_MODES,
+    MESSAGE_ORDER,
+    apply_message_filters,
+    after_cursor,
+    decode_cursor,
+    encode_cursor,
+    message_counter,
+)
+from app.services.search import (
+    MessageSearch,
+    message_search,
+    split_terms,
+    make_highlight,
+    encode_search_cursor,
+)
+from app.services.export import (
+    EXPORT_FORMATS,
+    build_export_query,
+    iter_archived_chunks,
+    stream_export,
+)
+from app.services.archive import message_archive
+from app.services.stats import message_stats
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +60,7 @@ router = APIRouter()
 @router.post("/send", response_model=MessageSendResponse)
 async def send_message(
     message: MessageSend,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(verify_token)  # update-001: 添加 Token 验证
 ):
     """发送消息
@@ -51,15 +78,8 @@ async def send_message(
         MessageSendResponse: 发送结果
     """
     try:
-        # 获取配置
-        config = get_wechat_config(db)
-
-        # 创建客户端
-        client = WeChatClient(
-            corp_id=config.corp_id,
-            app_secret=config.app_secret,
-            agent_id=config.agent_id,
-        )
+        # 获取配置快照中的客户端
+        client = (await get_wechat_snapshot(db)).client
 
         # 发送消息
         if message.type == "text":
@@ -103,7 +123,10 @@ async def get_messages(
     from_user: str = Query(None, description="发送者筛选"),
     start_time: int = Query(None, description="开始时间（时间戳）"),
     end_time: int = Query(None, description="结束时间（时间戳）"),
-    db: Session = Depends(get_db),
+    q: str = Query(None, description="关键词检索（空格分隔，全部命中）"),
+    cursor: str = Query(None, description="游标（上一页返回的 next_cursor），指定后忽略 page"),
+    total_mode: str = Query("exact", description="总数计算方式: exact/cached/approx/none"),
+    db: AsyncSession = Depends(get_async_read_db),
     _: dict = Depends(verify_token)  # update-001: 添加 Token 验证
 ):
     """获取消息历史
@@ -113,6 +136,17 @@ async def get_messages(
 
     update-001: 需要认证
 
+    支持两种分页方式：
+    1. 页码分页：page + page_size（OFFSET）
+    2. 游标分页：cursor + page_size，按 (create_time, id) 定位，翻页代价与页码无关
+
+    每次响应都会返回 next_cursor，页码分页的结果也可以改用游标继续翻页。
+
+    指定 q 时按关键词检索：SQLite 使用 FTS5 全文索引，在最近的命中中按相关度
+    排序并返回高亮片段；其他数据库或关键词少于 3 个字符时使用 LIKE，按时间倒序。
+    全文检索只在符合筛选条件的最近 MESSAGE_SEARCH_RANK_WINDOW 条命中中进行，
+    结果和 total 都不超过该值，窗口大小在 rank_window 中返回。
+
     Args:
         page: 页码
         page_size: 每页数量
@@ -120,48 +154,210 @@ async def get_messages(
         from_user: 发送者筛选
         start_time: 开始时间
         end_time: 结束时间
+        q: 检索关键词
+        cursor: 游标
+        total_mode: 总数计算方式（exact 精确 / cached 缓存 / approx 近似 / none 不计算）
         db: 数据库会话
 
     Returns:
         MessageListResponse: 消息列表
     """
-    try:
-        # 构建查询
-        query = db.query(Message)
+    if total_mode not in TOTAL_MODES:
+        raise HTTPException(status_code=400, detail=f"不支持的总数计算方式: {total_mode}")
 
-        # 方向筛选
-        if direction != "all":
-            query = query.filter(Message.direction == direction)
-
-        # 发送者筛选
-        if from_user:
-            query = query.filter(Message.from_user == from_user)
+    try:
+        terms = split_terms(q) if q else []
+        # 时间范围早于归档边界时合并归档数据，结果需要按时间排序，不使用相关度检索
+        use_archive = message_archive.covers(start_time)
+        use_fts = not use_archive and await message_search.use_fts(db, terms)
 
-        # 时间范围筛选
-        if start_time:
-            query = query.filter(Message.create_time >= start_time)
-        if end_time:
-            query = query.filter(Message.create_time <= end_time)
+        # 构建查询
+        if use_fts:
+            # 全文检索：在符合筛选条件的最近命中中按相关度排序
+            query, count_query = MessageSearch.fts_query(
+                terms,
+                MESSAGE_SEARCH_RANK_WINDOW,
+                direction,
+                from_user,
+                start_time,
+                end_time,
+            )
+            rank = query.selected_columns.rank
+            order_by = (rank, Message.id)
+        else:
+            query = apply_message_filters(
+                MessageSearch.like_query(terms) if terms else select(Message),
+                direction,
+                from_user,
+                start_time,
+                end_time,
+            )
+            count_query = query
+            order_by = MESSAGE_ORDER
 
         # 总数
-        total = query.count()
-
-        # 分页
-        offset = (page - 1) * page_size
-        messages = (
-            query.order_by(Message.create_time.desc())
-            .offset(offset)
-            .limit(page_size)
-            .all()
+        filters = (
+            direction if direction != "all" else None,
+            from_user,
+            start_time,
+            end_time,
+            " ".join(terms) or None,
         )
+        total = await message_counter.count(db, count_query, filters, total_mode)
+
+        # 归档消息数
+        archive_filters = dict(
+            direction=direction,
+            from_user=from_user,
+            start_time=start_time,
+            end_time=end_time,
+            terms=terms,
+        )
+        if use_archive and total is not None:
+            total += await message_archive.count(**archive_filters)
+
+        # 分页（多取一条判断是否还有下一页）
+        query = query.order_by(*order_by).limit(page_size + 1)
+        if cursor:
+            query = (
+                MessageSearch.after_rank_cursor(query, rank, cursor)
+                if use_fts
+                else after_cursor(query, cursor)
+            )
+        else:
+            query = query.offset((page - 1) * page_size)
+
+        result = await db.execute(query)
+        rows = result.all()
 
         # 转换为响应模型
-        items = [MessageInDB.from_orm(msg) for msg in messages]
+        highlights = (
+            await MessageSearch.highlights(db, terms, [row.Message.id for row in rows])
+            if use_fts
+            else {}
+        )
+        items = []
+        for row in rows:
+            item = MessageInDB.from_orm(row.Message)
+            if use_fts:
+                item.highlight = highlights.get(row.Message.id)
+            elif terms:
+                item.highlight = make_highlight(row.Message.content, terms)
+            items.append(item)
+
+        # 热表数据不足一页时，从归档继续读取（归档消息都早于热表消息）
+        if use_archive and len(items) <= page_size:
+            before, offset = None, 0
+            if cursor:
+                before = decode_cursor(cursor)
+            elif not items and page > 1:
+                hot_total = await message_counter.count(db, count_query, filters, "cached")
+                offset = max((page - 1) * page_size - hot_total, 0)
+
+            archived = await message_archive.read(
+                **archive_filters, before=before, offset=offset, limit=page_size + 1 - len(items)
+            )
+            for row in archived:
+                item = MessageInDB(**row)
+                if terms:
+                    item.highlight = make_highlight(item.content, terms)
+                items.append(item)
+
+        next_cursor = None
+        if len(items) > page_size:
+            items = items[:page_size]
+            last = items[-1]
+            next_cursor = (
+                encode_search_cursor(rows[page_size - 1].rank, last.id)
+                if use_fts
+                else encode_cursor(last.create_time, last.id)
+            )
 
         return MessageListResponse(
-            total=total, page=page, page_size=page_size, items=items
+            total=total,
+            page=page,
+            page_size=page_size,
+            items=items,
+            next_cursor=next_cursor,
+            rank_window=(MESSAGE_SEARCH_RANK_WINDOW or None) if use_fts else None,
         )
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取消息列表失败: {e}")
         raise HTTPException(status_code=500, detail="获取消息列表失败")
+
+
+@router.get("/export")
+async def export_messages(
+    format: str = Query("ndjson", description="导出格式: ndjson/csv"),
+    direction: str = Query("all", description="消息方向: in/out/all"),
+    from_user: str = Query(None, description="发送者筛选"),
+    start_time: int = Query(None, description="开始时间（时间戳）"),
+    end_time: int = Query(None, description="结束时间（时间戳）"),
+    gzip: bool = Query(False, description="是否 gzip 压缩"),
+    _: dict = Depends(verify_token)
+):
+    """导出消息历史
+
+    按时间正序流式输出全部符合筛选条件的消息，不分页。数据分块读取并
+    立即写出，导出范围再大内存占用也保持不变。start_time 早于归档边界时
+    先输出归档消息。
+
+    Args:
+        format: 导出格式（ndjson 每行一条 JSON / csv 带表头）
+        direction: 消息方向筛选
+        from_user: 发送者筛选
+        start_time: 开始时间
+        end_time: 结束时间
+        gzip: 是否 gzip 压缩（文件名追加 .gz）
+
+    Returns:
+        StreamingResponse: 导出文件
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的导出格式: {format}")
+
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"messages-{datetime.now():%Y%m%d-%H%M%S}.{extension}"
+    if gzip:
+        media_type = "application/gzip"
+        filename += ".gz"
+
+    # 生成器自行打开数据库会话：依赖注入的会话在响应流开始前就会关闭
+    query = build_export_query(direction, from_user, start_time, end_time)
+    archived = (
+        iter_archived_chunks(direction, from_user, start_time, end_time)
+        if message_archive.covers(start_time)
+        else None
+    )
+    return StreamingResponse(
+        stream_export(query, format, gzip, archived=archived),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/stats", response_model=MessageStatsResponse)
+async def get_message_stats(
+    range: str = Query("24h", description="统计范围: 1h/24h/7d/30d"),
+    db: AsyncSession = Depends(get_async_read_db),
+    _: dict = Depends(verify_token)
+):
+    """消息统计
+
+    从预聚合的 message_stats 表读取，耗时与消息总量无关。1h 按分钟，
+    24h 按小时，7d/30d 按天（本地日期）返回时间序列。
+
+    Args:
+        range: 统计范围
+        db: 数据库会话
+
+    Returns:
+        MessageStatsResponse: 总数、分布、发送者排行和时间序列
+    """
+    try:
+        return await message_stats.query(db, range)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
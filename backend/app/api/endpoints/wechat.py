@@ -7,66 +7,58 @@
 import logging
 from fastapi import APIRouter, Query, Request, Depends, HTTPException
 from fastapi.responses import PlainTextResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.services.wechat.crypto import WeChatCrypto, WeChatCryptoException
+from app.core.config import CALLBACK_ASYNC_MODE
+from app.core.database import get_async_db, AsyncSessionLocal
+from app.services.wechat.crypto import WeChatCryptoException
 from app.services.message import MessageService
-from app.services.wechat.client import WeChatClient
+from app.services.worker import callback_pool
+from app.services.dedup import MessageDeduplicator, message_deduplicator
+from app.services.config import config_store, WeChatConfigSnapshot
 from app.schemas.config import WeChatConfig
-import json
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-def get_wechat_config(db: Session = Depends(get_db)) -> WeChatConfig:
-    """获取企业微信配置
+async def get_wechat_snapshot(
+    db: AsyncSession = Depends(get_async_db),
+) -> WeChatConfigSnapshot:
+    """获取企业微信配置快照（含加解密器和客户端）
 
     Args:
-        db: 数据库会话
+        db: 异步数据库会话
 
     Returns:
-        WeChatConfig: 企业微信配置
+        WeChatConfigSnapshot: 配置快照
 
     Raises:
         HTTPException: 配置不存在或不完整时
     """
-    from app.models.config import Config
-
-    # 从数据库读取配置
-    configs = {}
-    config_keys = [
-        "wechat.corp_id",
-        "wechat.app_secret",
-        "wechat.agent_id",
-        "wechat.token",
-        "wechat.encoding_aes_key",
-        "wechat.admin_users",
-    ]
-
-    for key in config_keys:
-        config = db.query(Config).filter(Config.key == key).first()
-        if config:
-            try:
-                configs[key.replace("wechat.", "")] = json.loads(config.value)
-            except:
-                configs[key.replace("wechat.", "")] = config.value
+    snapshot = await config_store.get_snapshot(db)
 
     # 验证必填配置
-    if not configs.get("corp_id") or not configs.get("app_secret") or not configs.get("agent_id"):
+    if not snapshot.complete:
         raise HTTPException(status_code=500, detail="企业微信配置不完整")
 
-    # 构建配置对象（确保字符串类型）
-    return WeChatConfig(
-        corp_id=str(configs.get("corp_id", "")),
-        app_secret=str(configs.get("app_secret", "")),
-        agent_id=str(configs.get("agent_id", "")),
-        token=configs.get("token"),
-        encoding_aes_key=configs.get("encoding_aes_key"),
-        admin_users=configs.get("admin_users", []) if isinstance(configs.get("admin_users"), list) else [],
-    )
+    return snapshot
+
+
+async def get_wechat_config(db: AsyncSession = Depends(get_async_db)) -> WeChatConfig:
+    """获取企业微信配置
+
+    Args:
+        db: 异步数据库会话
+
+    Returns:
+        WeChatConfig: 企业微信配置
+
+    Raises:
+        HTTPException: 配置不存在或不完整时
+    """
+    return (await get_wechat_snapshot(db)).config
 
 
 @router.get("/callback", response_class=PlainTextResponse)
@@ -75,7 +67,7 @@ async def wechat_verify(
     timestamp: str = Query(..., description="时间戳"),
     nonce: str = Query(..., description="随机数"),
     echostr: str = Query(..., description="加密的随机字符串"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """企业微信URL验证
 
@@ -96,19 +88,13 @@ async def wechat_verify(
     """
     try:
         # 获取配置
-        config = get_wechat_config(db)
+        snapshot = await get_wechat_snapshot(db)
 
         # 验证配置
-        if not config.token or not config.encoding_aes_key:
+        crypto = snapshot.crypto
+        if crypto is None:
             raise HTTPException(status_code=500, detail="未配置Token和EncodingAESKey")
 
-        # 初始化加解密器
-        crypto = WeChatCrypto(
-            token=config.token,
-            encoding_aes_key=config.encoding_aes_key,
-            corp_id=config.corp_id,
-        )
-
         # 验证URL
         reply_echostr = crypto.verify_url(msg_signature, timestamp, nonce, echostr)
 
@@ -131,13 +117,16 @@ async def wechat_message(
     msg_signature: str = Query(..., description="消息签名"),
     timestamp: str = Query(..., description="时间戳"),
     nonce: str = Query(..., description="随机数"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """接收企业微信消息
 
     根据 plan.md: spec/01-核心功能/wecom-cmder/plan.md
     章节: 5.1.2 消息接收
 
+    异步模式（CALLBACK_ASYNC_MODE）下只校验签名并入队，立即返回 success，
+    消息由后台 worker 池处理；队列满时退回同步处理。
+
     Args:
         request: 请求对象
         msg_signature: 消息签名
@@ -150,7 +139,7 @@ async def wechat_message(
     """
     try:
         # 获取配置
-        config = get_wechat_config(db)
+        snapshot = await get_wechat_snapshot(db)
 
         # 读取请求体
         body = await request.body()
@@ -158,16 +147,30 @@ async def wechat_message(
 
         logger.debug(f"收到企业微信消息: {encrypted_msg[:100]}...")
 
-        # 初始化客户端和服务
-        client = WeChatClient(
-            corp_id=config.corp_id,
-            app_secret=config.app_secret,
-            agent_id=config.agent_id,
-        )
+        if CALLBACK_ASYNC_MODE and callback_pool.running:
+            # 重复的回调请求（企业微信重试）无需入队
+            if message_deduplicator.contains(
+                MessageDeduplicator.envelope_key(encrypted_msg)
+            ):
+                logger.info("重复的回调请求，已忽略")
+                return "success"
 
-        message_service = MessageService(
-            wechat_config=config, wechat_client=client, db=db
-        )
+            # 入队前校验签名，伪造的请求不进入队列
+            if snapshot.crypto is None:
+                logger.error("未配置Token和EncodingAESKey，无法处理加密消息")
+                return "success"
+
+            snapshot.crypto.verify_message(msg_signature, timestamp, nonce, encrypted_msg)
+
+            if callback_pool.submit(
+                process_callback_message, encrypted_msg, msg_signature, timestamp, nonce
+            ):
+                return "success"
+
+            logger.warning("回调消息队列已满，改为同步处理")
+
+        # 初始化服务
+        message_service = MessageService.from_snapshot(snapshot, db)
 
         # 处理消息
         result = await message_service.handle_incoming_message(
@@ -179,6 +182,34 @@ async def wechat_message(
 
         return result or "success"
 
+    except WeChatCryptoException as e:
+        logger.error(f"消息签名校验失败: {e}")
+        return "success"
     except Exception as e:
         logger.error(f"处理消息异常: {e}")
         return "success"  # 即使出错也返回success，避免企业微信重试
+
+
+async def process_callback_message(
+    encrypted_msg: str, msg_signature: str, timestamp: str, nonce: str
+):
+    """后台处理回调消息（由 worker 池调用）
+
+    使用独立的数据库会话，不依赖已结束的请求。
+
+    Args:
+        encrypted_msg: 加密的消息（XML格式）
+        msg_signature: 消息签名
+        timestamp: 时间戳
+        nonce: 随机数
+    """
+    async with AsyncSessionLocal() as db:
+        snapshot = await get_wechat_snapshot(db)
+        message_service = MessageService.from_snapshot(snapshot, db)
+
+        await message_service.handle_incoming_message(
+            encrypted_msg=encrypted_msg,
+            msg_signature=msg_signature,
+            timestamp=timestamp,
+            nonce=nonce,
+        )
@@ -9,7 +9,7 @@
 
 from fastapi import APIRouter
 
-from app.api.endpoints import wechat, config, message, command, auth
+from app.api.endpoints import wechat, config, message, command, auth, dashboard, job
 
 api_router = APIRouter()
 
@@ -47,3 +47,17 @@ api_router.include_router(
     prefix="/commands",
     tags=["commands"],
 )
+
+# 仪表盘接口
+api_router.include_router(
+    dashboard.router,
+    prefix="/dashboard",
+    tags=["dashboard"],
+)
+
+# 后台任务接口
+api_router.include_router(
+    job.router,
+    prefix="/jobs",
+    tags=["jobs"],
+)
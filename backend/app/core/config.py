@@ -70,3 +70,184 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
 # CORS 配置
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
+
+# ========== 企业微信 HTTP 连接池配置 ==========
+
+# 是否启用 HTTP/2（需要安装 h2，未安装时自动退回 HTTP/1.1）
+WECHAT_HTTP2 = os.getenv("WECHAT_HTTP2", "true").lower() in ("1", "true", "yes")
+
+# 最大连接数
+WECHAT_HTTP_MAX_CONNECTIONS = int(os.getenv("WECHAT_HTTP_MAX_CONNECTIONS", "100"))
+
+# 最大保活连接数
+WECHAT_HTTP_MAX_KEEPALIVE = int(os.getenv("WECHAT_HTTP_MAX_KEEPALIVE", "20"))
+
+# 保活连接空闲过期时间（秒）
+WECHAT_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("WECHAT_HTTP_KEEPALIVE_EXPIRY", "60"))
+
+# 请求超时时间（秒）
+WECHAT_HTTP_TIMEOUT = float(os.getenv("WECHAT_HTTP_TIMEOUT", "10"))
+
+# 建立连接超时时间（秒）
+WECHAT_HTTP_CONNECT_TIMEOUT = float(os.getenv("WECHAT_HTTP_CONNECT_TIMEOUT", "5"))
+
+# ========== access_token 后台刷新配置 ==========
+
+# 是否启用后台刷新
+WECHAT_TOKEN_REFRESH_ENABLED = os.getenv("WECHAT_TOKEN_REFRESH_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# 过期前多少秒开始刷新
+WECHAT_TOKEN_REFRESH_AHEAD = int(os.getenv("WECHAT_TOKEN_REFRESH_AHEAD", "300"))
+
+# 刷新时间随机抖动范围（秒），避免多个 worker 同时刷新
+WECHAT_TOKEN_REFRESH_JITTER = int(os.getenv("WECHAT_TOKEN_REFRESH_JITTER", "120"))
+
+# 检查配置和 token 状态的最大间隔（秒）
+WECHAT_TOKEN_REFRESH_INTERVAL = int(os.getenv("WECHAT_TOKEN_REFRESH_INTERVAL", "60"))
+
+# 刷新失败后的重试间隔（秒），连续失败时指数退避
+WECHAT_TOKEN_REFRESH_RETRY = int(os.getenv("WECHAT_TOKEN_REFRESH_RETRY", "15"))
+
+# ========== 回调消息异步处理配置 ==========
+
+# 是否启用异步模式：回调接口校验签名后立即返回，消息由后台 worker 处理
+CALLBACK_ASYNC_MODE = os.getenv("CALLBACK_ASYNC_MODE", "false").lower() in ("1", "true", "yes")
+
+# 后台 worker 数量
+CALLBACK_WORKERS = int(os.getenv("CALLBACK_WORKERS", "4"))
+
+# 队列最大长度，队列满时退回同步处理
+CALLBACK_QUEUE_SIZE = int(os.getenv("CALLBACK_QUEUE_SIZE", "1000"))
+
+# 关闭时等待队列清空的最长时间（秒）
+CALLBACK_DRAIN_TIMEOUT = float(os.getenv("CALLBACK_DRAIN_TIMEOUT", "10"))
+
+# ========== 回调消息去重配置 ==========
+
+# 去重记录保留时间（秒），覆盖企业微信的重试窗口
+MESSAGE_DEDUP_TTL = int(os.getenv("MESSAGE_DEDUP_TTL", "600"))
+
+# 去重缓存最大条目数
+MESSAGE_DEDUP_MAX_SIZE = int(os.getenv("MESSAGE_DEDUP_MAX_SIZE", "10000"))
+
+# 内存未命中时是否再查询数据库（多 worker 部署或重启后仍可去重）
+MESSAGE_DEDUP_DB = os.getenv("MESSAGE_DEDUP_DB", "false").lower() in ("1", "true", "yes")
+
+# ========== 配置快照 ==========
+
+# 企业微信配置快照有效期（秒），0 表示仅在配置更新时重新加载
+# 多 worker 部署时决定其他进程感知配置变更的最长延迟
+CONFIG_SNAPSHOT_TTL = float(os.getenv("CONFIG_SNAPSHOT_TTL", "30"))
+
+# ========== 消息记录批量写入配置 ==========
+
+# 是否启用批量写入：消息记录先进入内存缓冲，按数量或时间批量落库
+MESSAGE_WRITE_BEHIND = os.getenv("MESSAGE_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+
+# 缓冲达到多少条时立即写入
+MESSAGE_FLUSH_SIZE = int(os.getenv("MESSAGE_FLUSH_SIZE", "200"))
+
+# 最长写入间隔（秒）
+MESSAGE_FLUSH_INTERVAL = float(os.getenv("MESSAGE_FLUSH_INTERVAL", "1"))
+
+# 缓冲上限，达到上限时写入方等待落库（背压）
+MESSAGE_BUFFER_MAX = int(os.getenv("MESSAGE_BUFFER_MAX", "5000"))
+
+# ========== SQLite 性能配置 ==========
+
+# 是否启用 SQLite 调优配置（WAL、PRAGMA、只读连接池），仅对 SQLite 生效
+SQLITE_TUNED = os.getenv("SQLITE_TUNED", "false").lower() in ("1", "true", "yes")
+
+# 同步级别，WAL 模式下 NORMAL 只在检查点时 fsync
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+
+# 内存映射大小（字节）
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# 页缓存大小，负数表示 KiB
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+
+# 等待数据库锁的最长时间（毫秒）
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))
+
+# 只读连接池大小（消息列表查询使用）
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "5"))
+
+# ========== 消息列表配置 ==========
+
+# 消息总数缓存有效期（秒），total_mode=cached/approx 时使用
+MESSAGE_COUNT_CACHE_TTL = float(os.getenv("MESSAGE_COUNT_CACHE_TTL", "30"))
+
+# 关键词检索按相关度排序时只在最近 N 条命中中排序（0 表示不限制）
+# 常见关键词可能命中数十万条，对全部命中计算 bm25 需要数百毫秒
+MESSAGE_SEARCH_RANK_WINDOW = int(os.getenv("MESSAGE_SEARCH_RANK_WINDOW", "5000"))
+
+# 消息导出每次从数据库读取的行数
+MESSAGE_EXPORT_CHUNK_SIZE = int(os.getenv("MESSAGE_EXPORT_CHUNK_SIZE", "1000"))
+
+# ========== 消息归档配置 ==========
+
+# 热表保留天数，更早的消息移入归档文件（0 表示不归档）
+MESSAGE_RETENTION_DAYS = int(os.getenv("MESSAGE_RETENTION_DAYS", "0"))
+
+# 归档目录，每天一个 gzip 压缩的 JSONL 文件
+MESSAGE_ARCHIVE_DIR = os.getenv("MESSAGE_ARCHIVE_DIR", "./data/archive")
+
+# 归档检查间隔（秒）
+MESSAGE_ARCHIVE_INTERVAL = int(os.getenv("MESSAGE_ARCHIVE_INTERVAL", "3600"))
+
+# 每批归档并删除的行数
+MESSAGE_ARCHIVE_BATCH = int(os.getenv("MESSAGE_ARCHIVE_BATCH", "5000"))
+
+# 消息列表读取归档时缓存的已解析归档上限（MB，按归档文本大小计算）
+# 导出和计数逐行读取归档文件，不使用此缓存
+MESSAGE_ARCHIVE_CACHE_MB = int(os.getenv("MESSAGE_ARCHIVE_CACHE_MB", "32"))
+
+# ========== 消息统计配置 ==========
+
+# 分钟粒度统计保留时长（小时），更早的只保留小时粒度
+MESSAGE_STATS_MINUTE_RETENTION = int(os.getenv("MESSAGE_STATS_MINUTE_RETENTION", "48"))
+
+# ========== 仪表盘配置 ==========
+
+# 仪表盘汇总缓存有效期（秒），有效期内所有请求共用一份响应
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "5"))
+
+# ========== 命令执行配置 ==========
+
+# 命令默认超时时间（秒），命令可单独声明 timeout 覆盖
+COMMAND_TIMEOUT = float(os.getenv("COMMAND_TIMEOUT", "10"))
+
+# 同步命令处理函数使用的线程池大小
+COMMAND_THREAD_POOL_SIZE = int(os.getenv("COMMAND_THREAD_POOL_SIZE", "8"))
+
+# ========== 后台任务配置 ==========
+
+# 同时执行的后台任务上限，超出的任务排队等待
+JOB_MAX_CONCURRENCY = int(os.getenv("JOB_MAX_CONCURRENCY", "4"))
+
+# 后台任务默认超时时间（秒），命令可单独声明 timeout 覆盖
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "3600"))
+
+# 任务进度写入数据库的最短间隔（秒），期间的进度更新合并写入
+JOB_PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL", "2"))
+
+# ========== 脚本命令配置 ==========
+
+# 脚本目录，命令表中 handler 为 "script:<路径>" 的命令只能执行此目录下的可执行文件
+SCRIPT_DIR = os.getenv("SCRIPT_DIR", "./scripts")
+
+# 同时运行的脚本进程上限，超出时排队等待
+SCRIPT_MAX_PROCESSES = int(os.getenv("SCRIPT_MAX_PROCESSES", "4"))
+
+# 脚本进程的虚拟内存上限（MB），0 表示不限制（仅 Linux/Unix 生效）
+SCRIPT_MEMORY_LIMIT_MB = int(os.getenv("SCRIPT_MEMORY_LIMIT_MB", "512"))
+
+# 脚本输出总量上限（字节），超出时终止脚本
+SCRIPT_OUTPUT_MAX_BYTES = int(os.getenv("SCRIPT_OUTPUT_MAX_BYTES", "65536"))
+
+# 脚本输出每条消息的最大字节数（企业微信文本消息上限 2048 字节）
+SCRIPT_MESSAGE_BYTES = int(os.getenv("SCRIPT_MESSAGE_BYTES", "2000"))
+
+# 脚本输出发送间隔（秒），间隔内的输出合并为一条消息
+SCRIPT_FLUSH_INTERVAL = float(os.getenv("SCRIPT_FLUSH_INTERVAL", "3"))
@@ -4,14 +4,119 @@
 章节: 4. 数据库设计
 """
 
-from sqlalchemy import create_engine
+import logging
+from typing import Dict, Union
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
 
+from app.core.config import (
+    SQLITE_TUNED,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE,
+    SQLITE_BUSY_TIMEOUT,
+    SQLITE_READ_POOL_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
 # 数据库URL配置
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/wecom.db")
 
+# 同步驱动 -> 异步驱动
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """将同步数据库URL转换为异步驱动URL
+
+    已指定驱动的 URL（如 postgresql+asyncpg://）保持不变。
+
+    Args:
+        url: 数据库URL
+
+    Returns:
+        str: 异步驱动的数据库URL
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername.split("+")[0])
+    if driver is None or parsed.drivername in ASYNC_DRIVERS.values():
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", get_async_database_url(DATABASE_URL))
+
+IS_SQLITE = make_url(DATABASE_URL).get_backend_name() == "sqlite"
+
+# 文件型 SQLite 才启用调优配置（内存数据库没有 WAL 和只读连接）
+SQLITE_PROFILE = (
+    SQLITE_TUNED and IS_SQLITE and make_url(DATABASE_URL).database not in (None, "", ":memory:")
+)
+
+
+def sqlite_pragmas(read_only: bool = False) -> Dict[str, Union[str, int]]:
+    """SQLite 调优 PRAGMA（按执行顺序）
+
+    Args:
+        read_only: 是否为只读连接（只读连接不能修改日志模式）
+
+    Returns:
+        Dict[str, Union[str, int]]: PRAGMA 名称 -> 值
+    """
+    pragmas: Dict[str, Union[str, int]] = {"busy_timeout": SQLITE_BUSY_TIMEOUT}
+    if not read_only:
+        pragmas["journal_mode"] = "WAL"
+        pragmas["synchronous"] = SQLITE_SYNCHRONOUS
+    pragmas["cache_size"] = SQLITE_CACHE_SIZE
+    pragmas["mmap_size"] = SQLITE_MMAP_SIZE
+    return pragmas
+
+
+def _install_sqlite_pragmas(sync_engine, read_only: bool = False):
+    """在每个新建连接上执行调优 PRAGMA
+
+    Args:
+        sync_engine: 同步引擎（异步引擎传入 async_engine.sync_engine）
+        read_only: 是否为只读连接池
+    """
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def _read_only_database_url(url: str) -> str:
+    """SQLite 只读连接 URL（file:...?mode=ro）
+
+    Args:
+        url: 异步数据库URL
+
+    Returns:
+        str: 只读连接URL
+    """
+    parsed = make_url(url)
+    return parsed.set(
+        database=f"file:{parsed.database}", query={"mode": "ro", "uri": "true"}
+    ).render_as_string(hide_password=False)
+
+
 # 创建数据库引擎
 engine = create_engine(
     DATABASE_URL,
@@ -22,6 +127,39 @@ engine = create_engine(
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 创建异步数据库引擎（回调、消息、配置和命令接口使用）
+# 调优配置下使用连接池复用连接，PRAGMA 只在建立连接时执行一次
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    **({"poolclass": AsyncAdaptedQueuePool} if SQLITE_PROFILE else {}),
+)
+
+# 创建异步会话工厂（提交后不过期，返回的对象可在会话外读取）
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+if SQLITE_PROFILE:
+    # 每个新连接执行调优 PRAGMA
+    _install_sqlite_pragmas(engine)
+    _install_sqlite_pragmas(async_engine.sync_engine)
+
+    # 只读连接池（消息列表等查询使用），WAL 模式下读取不会阻塞回调写入
+    read_async_engine = create_async_engine(
+        _read_only_database_url(ASYNC_DATABASE_URL),
+        echo=False,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=SQLITE_READ_POOL_SIZE,
+    )
+    _install_sqlite_pragmas(read_async_engine.sync_engine, read_only=True)
+else:
+    read_async_engine = async_engine
+
+AsyncReadSessionLocal = async_sessionmaker(
+    read_async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # 创建基类
 Base = declarative_base()
 
@@ -39,16 +177,68 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """获取异步数据库会话
+
+    Yields:
+        AsyncSession: 异步数据库会话对象
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """获取只读异步数据库会话
+
+    启用 SQLite 调优配置时来自只读连接池，否则与 get_async_db 相同。
+
+    Yields:
+        AsyncSession: 异步数据库会话对象
+    """
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+def log_sqlite_settings():
+    """输出 SQLite 实际生效的 PRAGMA 配置"""
+    if not IS_SQLITE:
+        return
+
+    names = ["journal_mode", "synchronous", "cache_size", "mmap_size", "busy_timeout"]
+    with engine.connect() as conn:
+        values = {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names
+        }
+
+    logger.info(
+        f"SQLite 配置: 调优={'开启' if SQLITE_PROFILE else '关闭'}, "
+        + ", ".join(f"{name}={value}" for name, value in values.items())
+    )
+
+
 def init_db():
     """初始化数据库
 
     创建所有表并插入初始数据
     """
-    from app.models import message, config, command
+    from app.models import message, config, command, token, stats, job
 
     # 创建所有表
     Base.metadata.create_all(bind=engine)
 
+    # create_all 不会给已存在的表补建新增的索引，逐个检查
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    # 消息全文索引（仅 SQLite）和统计汇总回填
+    from app.services.search import create_message_fts
+    from app.services.stats import backfill_message_stats
+
+    with engine.begin() as conn:
+        create_message_fts(conn)
+        backfill_message_stats(conn)
+
     # 插入初始配置
     db = SessionLocal()
     try:
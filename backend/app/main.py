@@ -13,9 +13,22 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
-from app.core.database import init_db
-from app.core.config import init_users
+from app.core.database import init_db, log_sqlite_settings, async_engine, read_async_engine
+from app.core.config import (
+    init_users,
+    WECHAT_TOKEN_REFRESH_ENABLED,
+    CALLBACK_ASYNC_MODE,
+    MESSAGE_WRITE_BEHIND,
+)
 from app.api.router import api_router
+from app.services.wechat.http import http_pool
+from app.services.wechat.refresher import token_refresher
+from app.services.worker import callback_pool
+from app.services.writer import message_writer
+from app.services.archive import message_archive
+from app.services.command import command_manager
+from app.services.jobs import job_manager
+from app.services.script import load_script_commands, script_executor
 
 # 配置日志
 logging.basicConfig(
@@ -36,6 +49,7 @@ async def lifespan(app: FastAPI):
     # 启动时执行
     logger.info("正在初始化数据库...")
     init_db()
+    log_sqlite_settings()
     logger.info("数据库初始化完成")
 
     # update-001: 初始化用户配置
@@ -43,10 +57,48 @@ async def lifespan(app: FastAPI):
     init_users()
     logger.info("用户配置初始化完成")
 
+    # 打开企业微信 HTTP 连接池
+    await http_pool.open()
+
+    # 启动 access_token 后台刷新
+    if WECHAT_TOKEN_REFRESH_ENABLED:
+        token_refresher.start()
+
+    # 启动消息记录批量写入
+    if MESSAGE_WRITE_BEHIND:
+        message_writer.start()
+
+    # 启动消息归档
+    if message_archive.enabled:
+        message_archive.start()
+
+    # 注册命令表中定义的脚本命令
+    await load_script_commands()
+
+    # 启动后台任务管理器
+    await job_manager.start()
+
+    # 启动回调消息 worker 池（异步模式）
+    if CALLBACK_ASYNC_MODE:
+        callback_pool.start()
+
     yield
 
     # 关闭时执行
     logger.info("应用正在关闭...")
+    # 先排空回调队列（处理过程中仍需要连接池发送回复）
+    await callback_pool.stop()
+    # 中断仍在执行的后台任务
+    await job_manager.stop()
+    # 回调处理完成后写完剩余的消息记录
+    await message_writer.stop()
+    await message_archive.stop()
+    await token_refresher.stop()
+    command_manager.shutdown()
+    await http_pool.close()
+    await async_engine.dispose()
+    if read_async_engine is not async_engine:
+        await read_async_engine.dispose()
 
 
 # 创建FastAPI应用
@@ -91,9 +143,17 @@ async def health_check():
     """健康检查
 
     Returns:
-        dict: 健康状态
+        dict: 健康状态（含回调队列、消息写缓冲、归档、access_token 刷新、后台任务和脚本进程统计）
     """
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "callback_queue": callback_pool.stats(),
+        "message_writer": message_writer.stats(),
+        "message_archive": message_archive.stats(),
+        "token_refresher": token_refresher.stats(),
+        "jobs": job_manager.stats(),
+        "scripts": script_executor.stats(),
+    }
 
 
 if __name__ == "__main__":
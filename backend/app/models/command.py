@@ -4,7 +4,7 @@
 章节: 4.3 命令表 (commands)
 """
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -19,10 +19,13 @@ class Command(Base):
     name = Column(String(100), comment="命令名称")
     description = Column(Text, comment="描述")
     category = Column(String(50), comment="分类")
-    handler = Column(String(200), comment="处理器路径")
+    handler = Column(String(200), comment="处理器路径（script:<脚本路径> [参数...] 为脚本命令）")
     admin_only = Column(Boolean, default=False, comment="是否仅管理员")
     enabled = Column(Boolean, default=True, comment="是否启用")
     sort_order = Column(Integer, default=0, comment="排序")
+    timeout = Column(Float, comment="超时时间（秒），为空使用默认值")
+    max_concurrency = Column(Integer, comment="最大并发执行数，为空不限制")
+    background = Column(Boolean, default=False, comment="是否作为后台任务执行")
     created_at = Column(DateTime, server_default=func.now(), comment="记录创建时间")
     updated_at = Column(
         DateTime, server_default=func.now(), onupdate=func.now(), comment="记录更新时间"
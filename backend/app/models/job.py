@@ -0,0 +1,40 @@
+"""后台任务数据模型
+
+耗时命令以后台任务执行，任务状态、进度和结果持久化在 jobs 表。
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class Job(Base):
+    """后台任务表模型"""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # 任务列表按状态/用户筛选并按 id 倒序
+        Index("ix_jobs_status_id", "status", "id"),
+        Index("ix_jobs_user_id_id", "user_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
+    job_id = Column(String(32), unique=True, nullable=False, comment="任务ID")
+    command_id = Column(String(50), nullable=False, comment="命令ID")
+    user_id = Column(String(64), nullable=False, comment="提交任务的用户UserID")
+    status = Column(
+        String(20),
+        nullable=False,
+        default="pending",
+        comment="状态（pending/running/succeeded/failed/cancelled/interrupted）",
+    )
+    progress = Column(Integer, nullable=False, default=0, comment="进度（0-100）")
+    progress_message = Column(Text, comment="进度说明")
+    result = Column(Text, comment="执行结果")
+    error = Column(Text, comment="错误信息")
+    created_at = Column(DateTime, server_default=func.now(), comment="记录创建时间")
+    started_at = Column(DateTime, comment="开始执行时间")
+    finished_at = Column(DateTime, comment="结束时间")
+
+    def __repr__(self):
+        return f"<Job(job_id={self.job_id}, command_id={self.command_id}, status={self.status})>"
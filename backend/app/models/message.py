@@ -13,11 +13,17 @@ class Message(Base):
     """消息表模型"""
 
     __tablename__ = "messages"
+    __table_args__ = (
+        # 消息列表按方向/发送者筛选并按 create_time 倒序，复合索引避免全表扫描和临时排序
+        # （from_user 单列查询也由 ix_messages_from_user_create_time 覆盖）
+        Index("ix_messages_direction_create_time", "direction", "create_time"),
+        Index("ix_messages_from_user_create_time", "from_user", "create_time"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
     msg_id = Column(String(64), unique=True, index=True, comment="企业微信消息ID")
     msg_type = Column(String(20), comment="消息类型")
-    from_user = Column(String(64), index=True, comment="发送者UserID")
+    from_user = Column(String(64), comment="发送者UserID")
     to_user = Column(String(64), comment="接收者")
     content = Column(Text, comment="消息内容")
     create_time = Column(Integer, index=True, comment="创建时间（时间戳）")
@@ -0,0 +1,38 @@
+"""消息统计汇总数据模型
+
+按分钟/小时/天预聚合的消息数，写入消息时增量更新，
+统计接口只读汇总表，不扫描 messages 表。
+"""
+
+from sqlalchemy import Column, Integer, String, UniqueConstraint
+from app.core.database import Base
+
+
+class MessageStat(Base):
+    """消息统计汇总表模型"""
+
+    __tablename__ = "message_stats"
+    __table_args__ = (
+        # 增量更新的冲突键；统计查询按 (granularity, bucket) 范围读取，使用其前缀
+        UniqueConstraint(
+            "granularity",
+            "bucket",
+            "direction",
+            "msg_type",
+            "status",
+            "from_user",
+            name="uq_message_stats_key",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
+    granularity = Column(String(10), nullable=False, comment="粒度（minute/hour/day）")
+    bucket = Column(Integer, nullable=False, comment="时间桶起点（时间戳）")
+    direction = Column(String(10), nullable=False, default="", comment="in/out（接收/发送）")
+    msg_type = Column(String(20), nullable=False, default="", comment="消息类型")
+    status = Column(String(20), nullable=False, default="", comment="状态")
+    from_user = Column(String(64), nullable=False, default="", comment="发送者UserID")
+    count = Column(Integer, nullable=False, default=0, comment="消息数")
+
+    def __repr__(self):
+        return f"<MessageStat(granularity={self.granularity}, bucket={self.bucket}, count={self.count})>"
@@ -0,0 +1,26 @@
+"""access_token 缓存数据模型
+
+跨进程（多 uvicorn worker）共享并在重启后保留企业微信 access_token
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class AccessToken(Base):
+    """access_token 缓存表模型"""
+
+    __tablename__ = "access_tokens"
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
+    cache_key = Column(String(128), unique=True, nullable=False, comment="缓存键（corp_id + secret哈希）")
+    access_token = Column(Text, nullable=False, comment="访问令牌")
+    expires_at = Column(Integer, nullable=False, comment="过期时间（时间戳）")
+    created_at = Column(DateTime, server_default=func.now(), comment="记录创建时间")
+    updated_at = Column(
+        DateTime, server_default=func.now(), onupdate=func.now(), comment="记录更新时间"
+    )
+
+    def __repr__(self):
+        return f"<AccessToken(cache_key={self.cache_key}, expires_at={self.expires_at})>"
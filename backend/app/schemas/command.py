@@ -40,6 +40,11 @@ class CommandInDB(CommandBase):
     handler: str
     enabled: bool
     sort_order: int
+    timeout: Optional[float] = Field(None, description="超时时间（秒），为空使用默认值")
+    max_concurrency: Optional[int] = Field(None, description="最大并发执行数，为空不限制")
+    background: bool = Field(False, description="是否作为后台任务执行")
+    aliases: List[str] = Field(default_factory=list, description="别名")
+    usage: Optional[str] = Field(None, description="用法（声明了参数的命令）")
 
     class Config:
         from_attributes = True
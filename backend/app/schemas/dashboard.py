@@ -0,0 +1,37 @@
+"""仪表盘 Pydantic 模型"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from app.schemas.command import CommandInDB
+from app.schemas.message import MessageInDB
+
+
+class DashboardConfigStatus(BaseModel):
+    """企业微信配置状态（不含密钥）"""
+
+    configured: bool = Field(description="必填配置（corp_id、app_secret、agent_id）是否齐全")
+    callback_configured: bool = Field(description="回调 Token 和 EncodingAESKey 是否已配置")
+    corp_id: Optional[str] = None
+    agent_id: Optional[str] = None
+    admin_count: int = Field(description="管理员数量")
+
+
+class DashboardCounters(BaseModel):
+    """仪表盘计数"""
+
+    today_messages: int = Field(description="今日消息数")
+    today_in: int = Field(description="今日接收消息数")
+    today_out: int = Field(description="今日发送消息数")
+    enabled_commands: int = Field(description="启用的命令数")
+    total_commands: int = Field(description="命令总数")
+
+
+class DashboardSummary(BaseModel):
+    """仪表盘汇总响应模型"""
+
+    recent_messages: List[MessageInDB]
+    commands: List[CommandInDB]
+    config: DashboardConfigStatus
+    counters: DashboardCounters
+    generated_at: int = Field(description="生成时间（时间戳，内容未变化时为该内容首次生成的时间）")
@@ -0,0 +1,41 @@
+"""后台任务 Pydantic 模型"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class JobInDB(BaseModel):
+    """后台任务模型"""
+
+    job_id: str = Field(description="任务ID")
+    command_id: str = Field(description="命令ID")
+    user_id: str = Field(description="提交任务的用户UserID")
+    status: str = Field(description="状态: pending/running/succeeded/failed/cancelled/interrupted")
+    progress: int = Field(description="进度（0-100）")
+    progress_message: Optional[str] = None
+    result: Optional[str] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class JobListResponse(BaseModel):
+    """后台任务列表响应模型"""
+
+    total: int
+    page: int
+    page_size: int
+    items: List[JobInDB]
+
+
+class JobCancelResponse(BaseModel):
+    """取消任务响应模型"""
+
+    success: bool
+    message: str
@@ -5,7 +5,7 @@
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -68,6 +68,7 @@ class MessageInDB(MessageBase):
     status: str
     created_at: datetime
     updated_at: datetime
+    highlight: Optional[str] = Field(None, description="检索命中的高亮片段（仅关键词检索时返回；内容已 HTML 转义，命中处用 <mark> 标记）")
 
     class Config:
         from_attributes = True
@@ -99,12 +100,53 @@ class MessageListQuery(BaseModel):
     from_user: Optional[str] = None
     start_time: Optional[int] = None
     end_time: Optional[int] = None
+    cursor: Optional[str] = None
+    total_mode: str = Field(default="exact")
+    q: Optional[str] = None
 
 
 class MessageListResponse(BaseModel):
     """消息列表响应模型"""
 
-    total: int
+    total: Optional[int] = Field(None, description="总数（total_mode=none 时为空）")
     page: int
     page_size: int
     items: List[MessageInDB]
+    next_cursor: Optional[str] = Field(None, description="下一页游标，没有更多数据时为空")
+    rank_window: Optional[int] = Field(
+        None, description="全文检索的命中窗口：只返回最近 N 条命中，total 不超过该值（仅全文检索时返回）"
+    )
+
+
+class MessageStatsPoint(BaseModel):
+    """消息统计时间序列点"""
+
+    time: int = Field(description="时间桶起点（时间戳）")
+    # "in" 是保留字，使用别名
+    received: int = Field(alias="in", description="接收消息数")
+    sent: int = Field(alias="out", description="发送消息数")
+
+    class Config:
+        populate_by_name = True
+
+
+class MessageStatsUser(BaseModel):
+    """发送者消息数"""
+
+    user: str
+    count: int
+
+
+class MessageStatsResponse(BaseModel):
+    """消息统计响应模型"""
+
+    range: str = Field(description="统计范围: 1h/24h/7d/30d")
+    granularity: str = Field(description="读取的汇总粒度: minute/hour/day")
+    start: int = Field(description="开始时间（时间戳）")
+    end: int = Field(description="结束时间（时间戳，不含）")
+    total: int
+    by_direction: Dict[str, int]
+    by_msg_type: Dict[str, int]
+    by_status: Dict[str, int]
+    top_users: List[MessageStatsUser]
+    series: List[MessageStatsPoint]
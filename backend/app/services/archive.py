@@ -0,0 +1,495 @@
+"""消息冷归档
+
+超过保留天数的消息从 messages 表移入归档目录，按消息日期（本地时间）每天
+一个 gzip 压缩的 JSONL 文件（messages-YYYYMMDD.jsonl.gz）：
+1. 归档文件只追加：每批写入一个新的 gzip 成员，写入并 fsync 后才删除热表数据
+2. 删除后对 SQLite 执行增量 VACUUM 回收空间
+3. 消息列表在时间范围早于归档边界时透明合并归档数据；分页读取会解析整天的
+   归档并缓存，缓存总量不超过 MESSAGE_ARCHIVE_CACHE_MB
+4. 导出和计数逐行流式读取归档文件，按 MESSAGE_EXPORT_CHUNK_SIZE 分块输出，
+   内存占用与归档天数和每天的消息数无关（去重只保留消息ID）
+
+归档中途异常退出时，已写入文件但未删除的消息会在下次归档时重复写入，
+读取时按消息ID去重。由 main.lifespan 负责启动和停止。
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, select
+
+from app.core.config import (
+    MESSAGE_ARCHIVE_BATCH,
+    MESSAGE_ARCHIVE_CACHE_MB,
+    MESSAGE_ARCHIVE_DIR,
+    MESSAGE_ARCHIVE_INTERVAL,
+    MESSAGE_EXPORT_CHUNK_SIZE,
+    MESSAGE_RETENTION_DAYS,
+)
+from app.core.database import IS_SQLITE, engine
+from app.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "messages-"
+SEGMENT_SUFFIX = ".jsonl.gz"
+
+# 归档字段（messages 表全部列）
+ARCHIVE_FIELDS = tuple(column.name for column in Message.__table__.columns)
+
+
+def day_of(timestamp: int) -> str:
+    """时间戳所在的日期（本地时间，YYYYMMDD）"""
+    return time.strftime("%Y%m%d", time.localtime(timestamp))
+
+
+def day_start(day: str) -> int:
+    """日期零点的时间戳"""
+    return int(time.mktime(time.strptime(day, "%Y%m%d")))
+
+
+def _to_value(value):
+    """归档值转换（datetime 转 ISO 格式）"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def match_row(
+    row: dict,
+    direction: Optional[str] = None,
+    from_user: Optional[str] = None,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    terms: Sequence[str] = (),
+) -> bool:
+    """归档消息是否符合筛选条件（与 apply_message_filters 和 LIKE 检索一致）"""
+    if direction and direction != "all" and row["direction"] != direction:
+        return False
+    if from_user and row["from_user"] != from_user:
+        return False
+    if start_time and row["create_time"] < start_time:
+        return False
+    if end_time and row["create_time"] > end_time:
+        return False
+    if terms:
+        content = (row["content"] or "").lower()
+        if not all(term.lower() in content for term in terms):
+            return False
+    return True
+
+
+class MessageArchive:
+    """消息归档器"""
+
+    def __init__(
+        self,
+        archive_dir: str = MESSAGE_ARCHIVE_DIR,
+        retention_days: int = MESSAGE_RETENTION_DAYS,
+        interval: int = MESSAGE_ARCHIVE_INTERVAL,
+        batch_size: int = MESSAGE_ARCHIVE_BATCH,
+        cache_bytes: int = MESSAGE_ARCHIVE_CACHE_MB * 1024 * 1024,
+    ):
+        """初始化归档器
+
+        Args:
+            archive_dir: 归档目录
+            retention_days: 热表保留天数（0 表示不归档）
+            interval: 归档检查间隔（秒）
+            batch_size: 每批归档行数
+            cache_bytes: 已解析归档的缓存上限（按归档文本字节数计算）
+        """
+        self.archive_dir = archive_dir
+        self.retention_days = retention_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.cache_bytes = cache_bytes
+
+        self._task: Optional[asyncio.Task] = None
+        # 同一时间只执行一次归档
+        self._lock = asyncio.Lock()
+        # 日期 -> ((文件大小, 修改时间), 文本字节数, 按 (create_time, id) 升序的消息)
+        self._days: "OrderedDict[str, Tuple[tuple, int, List[dict]]]" = OrderedDict()
+        self._days_bytes = 0
+        # 读取在线程池中执行，缓存需要加锁
+        self._days_lock = threading.Lock()
+        # 归档计数缓存: 筛选条件 -> (归档版本, 条数)
+        self._counts: Dict[tuple, Tuple[int, int]] = {}
+        # 每次归档后递增，使计数缓存失效
+        self._generation = 0
+        self._stats = {"runs": 0, "archived": 0, "last_run": None, "last_error": None}
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用归档"""
+        return self.retention_days > 0
+
+    def start(self):
+        """启动后台任务"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                f"消息归档已启动: 保留 {self.retention_days} 天, 目录 {self.archive_dir}"
+            )
+
+    async def stop(self):
+        """停止后台任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("消息归档已停止")
+
+    def stats(self) -> dict:
+        """获取归档统计"""
+        return {**self._stats, "segments": len(self.segments())}
+
+    async def _run(self):
+        """后台循环"""
+        while True:
+            try:
+                await self.archive()
+            except Exception as e:
+                self._stats["last_error"] = str(e)
+                logger.error(f"消息归档失败: {e}")
+            await asyncio.sleep(self.interval)
+
+    # ---------- 归档 ----------
+
+    def cutoff(self, now: Optional[float] = None) -> int:
+        """归档边界：保留天数之前那天的零点，早于此时间的消息被归档"""
+        today = datetime.fromtimestamp(now or time.time()).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        return int((today - timedelta(days=self.retention_days)).timestamp())
+
+    async def archive(self) -> int:
+        """执行一次归档（文件和数据库操作在线程中执行）
+
+        Returns:
+            int: 归档的消息数
+        """
+        async with self._lock:
+            return await asyncio.to_thread(self._archive, self.cutoff())
+
+    def _archive(self, cutoff: int) -> int:
+        """归档 create_time 早于 cutoff 的消息
+
+        Args:
+            cutoff: 归档边界（时间戳）
+
+        Returns:
+            int: 归档的消息数
+        """
+        os.makedirs(self.archive_dir, exist_ok=True)
+        columns = [getattr(Message, field) for field in ARCHIVE_FIELDS]
+        total = 0
+
+        while True:
+            with engine.begin() as conn:
+                rows = conn.execute(
+                    select(*columns)
+                    .where(Message.create_time < cutoff)
+                    .order_by(Message.create_time, Message.id)
+                    .limit(self.batch_size)
+                ).all()
+                if not rows:
+                    break
+
+                # 按日期分组追加，写入成功后再删除
+                segments: Dict[str, List[dict]] = {}
+                for row in rows:
+                    record = {field: _to_value(value) for field, value in zip(ARCHIVE_FIELDS, row)}
+                    segments.setdefault(day_of(record["create_time"]), []).append(record)
+                for day, records in segments.items():
+                    self._append(day, records)
+
+                conn.execute(delete(Message).where(Message.id.in_([row.id for row in rows])))
+            total += len(rows)
+
+        self._stats["runs"] += 1
+        self._stats["last_run"] = int(time.time())
+        self._stats["last_error"] = None
+        if total:
+            self._stats["archived"] += total
+            self._generation += 1
+            self._vacuum()
+            logger.info(f"已归档 {total} 条消息（{day_of(cutoff)} 之前）")
+        return total
+
+    def _append(self, day: str, records: List[dict]):
+        """追加一个 gzip 成员到当天的归档文件
+
+        写入失败时截断回原长度，避免留下不完整的成员。
+        """
+        path = self._path(day)
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        member = gzip.compress(data.encode())
+
+        with open(path, "ab") as f:
+            size = f.tell()
+            try:
+                f.write(member)
+                f.flush()
+                os.fsync(f.fileno())
+            except Exception:
+                f.truncate(size)
+                raise
+
+    def _vacuum(self):
+        """回收删除后的空闲页（仅 SQLite）
+
+        数据库未启用增量 VACUUM 时，首次归档会切换为 INCREMENTAL 模式，
+        需要执行一次完整 VACUUM。
+        """
+        if not IS_SQLITE:
+            return
+
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            mode = conn.exec_driver_sql("PRAGMA auto_vacuum").scalar()
+            if mode != 2:
+                logger.info("数据库切换为增量 VACUUM 模式，执行一次完整 VACUUM")
+                conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.exec_driver_sql("VACUUM")
+            else:
+                conn.exec_driver_sql("PRAGMA incremental_vacuum")
+
+    # ---------- 读取 ----------
+
+    def _path(self, day: str) -> str:
+        return os.path.join(self.archive_dir, f"{SEGMENT_PREFIX}{day}{SEGMENT_SUFFIX}")
+
+    def segments(self) -> List[str]:
+        """已归档的日期（升序）"""
+        if not os.path.isdir(self.archive_dir):
+            return []
+        return sorted(
+            name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)]
+            for name in os.listdir(self.archive_dir)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def watermark(self) -> Optional[int]:
+        """归档边界：最后一个归档日期的次日零点，没有归档时返回None"""
+        days = self.segments()
+        if not days:
+            return None
+        return day_start(days[-1]) + 86400
+
+    def covers(self, start_time: Optional[int]) -> bool:
+        """查询时间范围是否包含归档数据（未指定开始时间时只查热表）"""
+        if not start_time:
+            return False
+        watermark = self.watermark()
+        return watermark is not None and start_time < watermark
+
+    def _days_in_range(
+        self, start_time: Optional[int], end_time: Optional[int]
+    ) -> List[str]:
+        """时间范围内的归档日期（升序）"""
+        first = day_of(start_time) if start_time else None
+        last = day_of(end_time) if end_time else None
+        return [
+            day
+            for day in self.segments()
+            if (first is None or day >= first) and (last is None or day <= last)
+        ]
+
+    def _iter_lines(self, day: str) -> Iterator[str]:
+        """逐行读取一天的归档文件（损坏时只读取有效部分）"""
+        path = self._path(day)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                yield from f
+        except (EOFError, gzip.BadGzipFile) as e:
+            logger.warning(f"归档文件损坏，只读取有效部分: {path}: {e}")
+
+    def _iter_day(self, day: str) -> Iterator[dict]:
+        """流式读取一天的归档（按消息ID去重，保持写入顺序；归档按时间正序写入）"""
+        seen: Set[int] = set()
+        for line in self._iter_lines(day):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"归档记录损坏，已跳过: {day}: {e}")
+                continue
+            if record["id"] not in seen:
+                seen.add(record["id"])
+                yield record
+
+    def _load_day(self, day: str) -> List[dict]:
+        """读取一天的归档（按消息ID去重，按 (create_time, id) 升序，分页读取使用）"""
+        with self._days_lock:
+            return self._load_day_locked(day)
+
+    def _load_day_locked(self, day: str) -> List[dict]:
+        stat = os.stat(self._path(day))
+        version = (stat.st_size, stat.st_mtime_ns)
+
+        cached = self._days.pop(day, None)
+        if cached is not None:
+            self._days_bytes -= cached[1]
+            if cached[0] == version:
+                self._cache_day(day, cached)
+                return cached[2]
+
+        records: Dict[int, dict] = {}
+        size = 0
+        for line in self._iter_lines(day):
+            size += len(line)
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"归档记录损坏，已跳过: {day}: {e}")
+                continue
+            records[record["id"]] = record
+
+        rows = sorted(records.values(), key=lambda r: (r["create_time"], r["id"]))
+        self._cache_day(day, (version, size, rows))
+        return rows
+
+    def _cache_day(self, day: str, entry: Tuple[tuple, int, List[dict]]):
+        """缓存一天的归档，超出字节上限时淘汰最久未用的（超过上限的单天不缓存）"""
+        if entry[1] > self.cache_bytes:
+            return
+        self._days[day] = entry
+        self._days_bytes += entry[1]
+        while self._days_bytes > self.cache_bytes:
+            _, evicted = self._days.popitem(last=False)
+            self._days_bytes -= evicted[1]
+
+    def _read(
+        self,
+        filters: tuple,
+        before: Optional[Tuple[int, int]],
+        offset: int,
+        limit: int,
+    ) -> List[dict]:
+        """按 (create_time, id) 倒序读取归档消息"""
+        result: List[dict] = []
+        start_time, end_time = filters[2], filters[3]
+
+        for day in reversed(self._days_in_range(start_time, end_time)):
+            if before and day > day_of(before[0]):
+                continue
+            rows = [
+                row
+                for row in reversed(self._load_day(day))
+                if match_row(row, *filters)
+                and (before is None or (row["create_time"], row["id"]) < before)
+            ]
+            if offset >= len(rows):
+                offset -= len(rows)
+                continue
+            result.extend(rows[offset : offset + limit - len(result)])
+            offset = 0
+            if len(result) >= limit:
+                break
+
+        return result
+
+    def _count(self, filters: tuple) -> int:
+        """符合筛选条件的归档消息数"""
+        cached = self._counts.get(filters)
+        if cached is not None and cached[0] == self._generation:
+            return cached[1]
+
+        start_time, end_time = filters[2], filters[3]
+        total = sum(
+            1
+            for day in self._days_in_range(start_time, end_time)
+            for row in self._iter_day(day)
+            if match_row(row, *filters)
+        )
+        if len(self._counts) > 1000:
+            self._counts.clear()
+        self._counts[filters] = (self._generation, total)
+        return total
+
+    async def read(
+        self,
+        direction: Optional[str] = None,
+        from_user: Optional[str] = None,
+        start_time: Optional[int] = None,
+        end_time: Optional[int] = None,
+        terms: Sequence[str] = (),
+        before: Optional[Tuple[int, int]] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> List[dict]:
+        """读取归档消息（与消息列表相同的倒序）
+
+        Args:
+            direction: 消息方向
+            from_user: 发送者
+            start_time: 开始时间
+            end_time: 结束时间
+            terms: 关键词（全部命中）
+            before: 只返回 (create_time, id) 小于此值的消息（游标）
+            offset: 跳过条数
+            limit: 最多返回条数
+
+        Returns:
+            List[dict]: 归档消息
+        """
+        filters = (direction, from_user, start_time, end_time, tuple(terms))
+        return await asyncio.to_thread(self._read, filters, before, offset, limit)
+
+    async def count(
+        self,
+        direction: Optional[str] = None,
+        from_user: Optional[str] = None,
+        start_time: Optional[int] = None,
+        end_time: Optional[int] = None,
+        terms: Sequence[str] = (),
+    ) -> int:
+        """符合筛选条件的归档消息数（归档变化前缓存）"""
+        filters = (direction, from_user, start_time, end_time, tuple(terms))
+        return await asyncio.to_thread(self._count, filters)
+
+    def iter_chunks(
+        self,
+        direction: Optional[str] = None,
+        from_user: Optional[str] = None,
+        start_time: Optional[int] = None,
+        end_time: Optional[int] = None,
+        chunk_size: int = MESSAGE_EXPORT_CHUNK_SIZE,
+    ) -> Iterator[List[dict]]:
+        """按时间正序流式读取归档消息（导出使用）
+
+        Args:
+            direction: 消息方向
+            from_user: 发送者
+            start_time: 开始时间
+            end_time: 结束时间
+            chunk_size: 每块行数
+
+        Yields:
+            List[dict]: 一块归档消息
+        """
+        filters = (direction, from_user, start_time, end_time)
+        chunk: List[dict] = []
+        for day in self._days_in_range(start_time, end_time):
+            for row in self._iter_day(day):
+                if match_row(row, *filters):
+                    chunk.append(row)
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+        if chunk:
+            yield chunk
+
+
+# 全局消息归档实例
+message_archive = MessageArchive()
@@ -2,12 +2,32 @@
 
 根据 plan.md: spec/01-核心功能/wecom-cmder/plan.md
 章节: 3.4 命令管理器 (Command Manager)
+
+命令处理函数可以是协程函数（直接在事件循环中执行）或普通函数（放到
+线程池执行，不阻塞事件循环）。每个命令可声明超时时间和最大并发数，
+超时返回错误提示，不会拖住回调处理。
+
+声明 background=True 的命令由后台任务执行（见 app/services/jobs.py），
+处理函数额外收到 job 参数用于上报进度，默认超时为 JOB_TIMEOUT。
+
+命令文本的解析（别名、前缀、参数、相近命令建议）见 app/services/command_router.py。
+
+命令的注册、注销和更新（update_command）会递增变更代数；路由表、帮助文本
+（管理员/普通用户两种视图）和菜单数据按代数缓存，命令未变化时直接返回缓存。
+修改命令属性需通过 update_command，直接赋值不会使缓存失效。
 """
 
+import asyncio
+import inspect
 import logging
-from typing import Dict, List, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Callable, Optional, Tuple
 from pydantic import BaseModel, Field
 
+from app.core.config import COMMAND_TIMEOUT, COMMAND_THREAD_POOL_SIZE, JOB_TIMEOUT
+from app.services.command_router import CommandArg, CommandRouter, RouteResult, check_arg_names
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,10 +42,15 @@ class Command(BaseModel):
     name: str = Field(description="命令名称")
     description: str = Field(description="命令描述")
     category: str = Field(description="分类（用于菜单分组）")
-    handler: Callable = Field(description="处理函数")
+    handler: Callable = Field(description="处理函数（协程函数或普通函数）")
     admin_only: bool = Field(default=False, description="是否仅管理员可用")
     enabled: bool = Field(default=True, description="是否启用")
     sort_order: int = Field(default=0, description="排序")
+    timeout: Optional[float] = Field(default=None, description="超时时间（秒），为空使用 COMMAND_TIMEOUT")
+    max_concurrency: Optional[int] = Field(default=None, description="最大并发执行数，为空不限制")
+    background: bool = Field(default=False, description="是否作为后台任务执行（立即回复任务ID）")
+    aliases: List[str] = Field(default_factory=list, description="别名（可以包含空格，如 \"log grep\"）")
+    args: List[CommandArg] = Field(default_factory=list, description="参数定义，为空时原样传入 args 列表")
 
     class Config:
         arbitrary_types_allowed = True
@@ -38,11 +63,29 @@ class CommandManager:
     章节: 3.4.1 功能职责
     """
 
-    def __init__(self):
-        """初始化命令管理器"""
+    def __init__(self, default_timeout: float = COMMAND_TIMEOUT):
+        """初始化命令管理器
+
+        Args:
+            default_timeout: 命令默认超时时间（秒）
+        """
+        self.default_timeout = default_timeout
         self._commands: Dict[str, Command] = {}
+        # 每个命令正在执行的次数（max_concurrency 限制）
+        self._running: Dict[str, int] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # 命令变更代数，以下缓存均为 (代数, 值)，代数不一致时重新生成
+        self._generation = 0
+        self._router: Optional[Tuple[int, CommandRouter]] = None
+        self._help: Dict[bool, Tuple[int, str]] = {}
+        self._menu: Optional[Tuple[int, dict]] = None
         self._register_builtin_commands()
 
+    @property
+    def generation(self) -> int:
+        """命令变更代数"""
+        return self._generation
+
     def _register_builtin_commands(self):
         """注册内置命令
 
@@ -79,11 +122,16 @@ class CommandManager:
 
         Returns:
             bool: 注册是否成功
+
+        Raises:
+            ValueError: 参数名为保留名称（user_id、is_admin 等）
         """
+        check_arg_names(command.id, command.args)
         if command.id in self._commands:
             logger.warning(f"命令 {command.id} 已存在，将被覆盖")
 
         self._commands[command.id] = command
+        self._generation += 1
         logger.info(f"注册命令: {command.id} - {command.name}")
         return True
 
@@ -98,10 +146,42 @@ class CommandManager:
         """
         if command_id in self._commands:
             del self._commands[command_id]
+            self._generation += 1
             logger.info(f"注销命令: {command_id}")
             return True
         return False
 
+    def update_command(self, command_id: str, **changes: Any) -> Optional[Command]:
+        """更新命令属性
+
+        Args:
+            command_id: 命令ID
+            **changes: 属性名和新值（值为 None 的忽略）
+
+        Returns:
+            Command: 更新后的命令，不存在返回None
+
+        Raises:
+            ValueError: 属性名不存在或参数名为保留名称
+        """
+        command = self._commands.get(command_id)
+        if command is None:
+            return None
+
+        changes = {name: value for name, value in changes.items() if value is not None}
+        for name in changes:
+            if name not in Command.model_fields:
+                raise ValueError(f"未知的命令属性: {name}")
+        if "args" in changes:
+            check_arg_names(command_id, changes["args"])
+
+        for name, value in changes.items():
+            setattr(command, name, value)
+
+        self._generation += 1
+        logger.info(f"更新命令: {command_id}")
+        return command
+
     def get_command(self, command_id: str) -> Optional[Command]:
         """获取命令
 
@@ -129,7 +209,51 @@ class CommandManager:
         """
         return [cmd for cmd in self._commands.values() if cmd.enabled]
 
-    def execute_command(
+    def route(self, text: str) -> RouteResult:
+        """解析命令文本
+
+        Args:
+            text: 命令文本（不含前导 /），例如 "deploy prod count=2"
+
+        Returns:
+            RouteResult: 命令ID和参数；未匹配或参数错误时 error 为提示文本
+        """
+        cached = self._router
+        if cached is None or cached[0] != self._generation:
+            cached = self._router = (self._generation, CommandRouter(self._commands.values()))
+        return cached[1].resolve(text, enabled=self._is_enabled)
+
+    def _is_enabled(self, command_id: str) -> bool:
+        """命令是否存在且已启用"""
+        command = self._commands.get(command_id)
+        return command is not None and command.enabled
+
+    def check_command(
+        self, command_id: str, is_admin: bool
+    ) -> Tuple[Optional[Command], Optional[str]]:
+        """检查命令是否存在、已启用且用户有权限执行
+
+        Args:
+            command_id: 命令ID
+            is_admin: 是否为管理员
+
+        Returns:
+            Tuple[Optional[Command], Optional[str]]: (命令对象, 错误提示)，可以执行时错误提示为空
+        """
+        command = self.get_command(command_id)
+
+        if not command:
+            return None, f"命令不存在: {command_id}"
+
+        if not command.enabled:
+            return command, f"命令已禁用: {command_id}"
+
+        if command.admin_only and not is_admin:
+            return command, "权限不足，该命令仅管理员可用"
+
+        return command, None
+
+    async def execute_command(
         self, command_id: str, user_id: str, is_admin: bool, **kwargs
     ) -> dict:
         """执行命令
@@ -141,26 +265,80 @@ class CommandManager:
             **kwargs: 命令参数
 
         Returns:
-            dict: 执行结果
+            dict: 执行结果（超时时 timeout=True，达到并发上限时 busy=True）
         """
-        command = self.get_command(command_id)
+        command, error = self.check_command(command_id, is_admin)
+        if error:
+            return {"success": False, "message": error}
 
-        if not command:
-            return {"success": False, "message": f"命令不存在: {command_id}"}
+        running = self._running.get(command_id, 0)
+        if command.max_concurrency is not None and running >= command.max_concurrency:
+            logger.warning(f"命令并发已达上限: {command_id} ({running})")
+            return {"success": False, "busy": True, "message": "命令正在执行中，请稍后再试"}
 
-        if not command.enabled:
-            return {"success": False, "message": f"命令已禁用: {command_id}"}
+        if command.timeout is not None:
+            timeout = command.timeout
+        else:
+            timeout = JOB_TIMEOUT if command.background else self.default_timeout
+        self._running[command_id] = running + 1
+        future: Optional[asyncio.Future] = None
 
-        if command.admin_only and not is_admin:
-            return {"success": False, "message": "权限不足，该命令仅管理员可用"}
+        def release(_=None):
+            self._running[command_id] -= 1
 
         try:
             logger.info(f"执行命令: {command_id}, 用户: {user_id}")
-            result = command.handler(user_id=user_id, **kwargs)
+            if inspect.iscoroutinefunction(command.handler):
+                awaitable = command.handler(user_id=user_id, is_admin=is_admin, **kwargs)
+            else:
+                # 同步处理函数放到线程池；线程无法取消，超时后直到线程结束才释放并发名额
+                future = asyncio.get_running_loop().run_in_executor(
+                    self._get_executor(),
+                    partial(command.handler, user_id=user_id, is_admin=is_admin, **kwargs),
+                )
+                future.add_done_callback(release)
+                awaitable = asyncio.shield(future)
+
+            result = await asyncio.wait_for(awaitable, timeout=timeout)
             return {"success": True, "result": result}
+        except asyncio.TimeoutError:
+            logger.error(f"执行命令超时: {command_id}, 超时 {timeout}s")
+            return {
+                "success": False,
+                "timeout": True,
+                "message": f"命令执行超时（{timeout:g}秒），请稍后再试",
+            }
         except Exception as e:
             logger.error(f"执行命令失败: {command_id}, 错误: {e}")
             return {"success": False, "message": f"命令执行失败: {str(e)}"}
+        finally:
+            # 协程处理函数在 wait_for 返回时已结束（超时会被取消）
+            if future is None:
+                release()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """同步处理函数使用的线程池（首次使用时创建）"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=COMMAND_THREAD_POOL_SIZE, thread_name_prefix="command"
+            )
+        return self._executor
+
+    def shutdown(self):
+        """关闭线程池（不等待仍在执行的同步命令）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _group_enabled_commands(self) -> Dict[str, List[Command]]:
+        """启用的命令按分类分组，组内按排序字段排序"""
+        category_dict: Dict[str, List[Command]] = {}
+        for cmd in self.get_enabled_commands():
+            category_dict.setdefault(cmd.category, []).append(cmd)
+
+        for commands in category_dict.values():
+            commands.sort(key=lambda x: x.sort_order)
+        return category_dict
 
     def generate_menu_data(self) -> dict:
         """生成企业微信菜单数据
@@ -168,26 +346,18 @@ class CommandManager:
         根据 plan.md: spec/01-核心功能/wecom-cmder/plan.md
         章节: 3.4.1 功能职责 - 菜单自动生成
 
+        结果按命令变更代数缓存，调用方不要修改返回值。
+
         Returns:
             dict: 菜单数据，格式符合企业微信API要求
         """
-        # 获取启用的命令
-        enabled_commands = self.get_enabled_commands()
-
-        # 按分类分组
-        category_dict: Dict[str, List[Command]] = {}
-        for cmd in enabled_commands:
-            if cmd.category not in category_dict:
-                category_dict[cmd.category] = []
-            category_dict[cmd.category].append(cmd)
-
-        # 按排序排序
-        for commands in category_dict.values():
-            commands.sort(key=lambda x: x.sort_order)
+        cached = self._menu
+        if cached is not None and cached[0] == self._generation:
+            return cached[1]
 
         # 生成菜单按钮
         buttons = []
-        for category, commands in category_dict.items():
+        for category, commands in self._group_enabled_commands().items():
             # 二级菜单（最多5个）
             sub_buttons = []
             for cmd in commands[:5]:
@@ -199,11 +369,41 @@ class CommandManager:
             buttons.append({"name": category, "sub_button": sub_buttons})
 
         # 最多3个一级菜单
-        return {"button": buttons[:3]}
+        menu_data = {"button": buttons[:3]}
+        self._menu = (self._generation, menu_data)
+        return menu_data
+
+    def render_help(self, is_admin: bool = False) -> str:
+        """生成帮助文本（按命令变更代数缓存）
+
+        Args:
+            is_admin: 是否为管理员视图，普通用户看不到管理员命令
+
+        Returns:
+            str: 帮助信息
+        """
+        cached = self._help.get(is_admin)
+        if cached is not None and cached[0] == self._generation:
+            return cached[1]
+
+        help_text = "可用命令列表：\n\n"
+        for category, cmds in self._group_enabled_commands().items():
+            if not is_admin:
+                cmds = [cmd for cmd in cmds if not cmd.admin_only]
+                if not cmds:
+                    continue
+            help_text += f"【{category}】\n"
+            for cmd in cmds:
+                admin_mark = " [管理员]" if cmd.admin_only else ""
+                help_text += f"  {cmd.name}{admin_mark}\n  {cmd.description}\n\n"
+
+        help_text = help_text.strip()
+        self._help[is_admin] = (self._generation, help_text)
+        return help_text
 
     # 内置命令处理函数
 
-    def _handle_status(self, user_id: str, **kwargs) -> str:
+    async def _handle_status(self, user_id: str, **kwargs) -> str:
         """处理系统状态命令
 
         Args:
@@ -214,33 +414,17 @@ class CommandManager:
         """
         return "系统运行正常\n\n当前功能：\n- 消息推送\n- 指令接收\n- 菜单交互"
 
-    def _handle_help(self, user_id: str, **kwargs) -> str:
+    async def _handle_help(self, user_id: str, is_admin: bool = False, **kwargs) -> str:
         """处理帮助命令
 
         Args:
             user_id: 用户ID
+            is_admin: 是否管理员
 
         Returns:
             str: 帮助信息
         """
-        commands = self.get_enabled_commands()
-
-        # 按分类分组
-        category_dict: Dict[str, List[Command]] = {}
-        for cmd in commands:
-            if cmd.category not in category_dict:
-                category_dict[cmd.category] = []
-            category_dict[cmd.category].append(cmd)
-
-        # 生成帮助文本
-        help_text = "可用命令列表：\n\n"
-        for category, cmds in category_dict.items():
-            help_text += f"【{category}】\n"
-            for cmd in cmds:
-                admin_mark = " [管理员]" if cmd.admin_only else ""
-                help_text += f"  {cmd.name}{admin_mark}\n  {cmd.description}\n\n"
-
-        return help_text.strip()
+        return self.render_help(is_admin)
 
 
 # 全局命令管理器实例
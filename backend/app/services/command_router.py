@@ -0,0 +1,384 @@
+"""命令路由
+
+把 "/<命令> [参数...]" 文本解析为命令和参数。路由表在命令注册变化后编译一次，
+每条消息只做查表：
+1. 命令ID、别名和中文名称按词切分后建成前缀树，取最长匹配，支持多词命令
+   （如 "log grep"），不区分大小写
+2. 单词命令可以使用唯一前缀（如 /sta → /status）
+3. 命令声明 args 时按类型解析参数（位置参数或 name=value），作为关键字参数
+   传给处理函数；未声明时原样以 args 列表传入
+4. 未匹配时用预先生成的删除变体索引（SymSpell）查找编辑距离最近的命令作为建议
+"""
+
+import logging
+import shlex
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Literal, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+# 建议命令的最大编辑距离
+MAX_EDIT_DISTANCE = 2
+
+# 唯一前缀匹配的最短长度
+MIN_PREFIX_LENGTH = 2
+
+# 参数类型（text 接收剩余全部内容）
+ArgType = Literal["str", "int", "float", "bool", "text"]
+
+# 执行命令时由系统传入的关键字参数，不能用作参数名
+RESERVED_ARG_NAMES = frozenset({"command_id", "user_id", "is_admin", "job"})
+
+TRUE_VALUES = {"1", "true", "yes", "on", "y", "是"}
+FALSE_VALUES = {"0", "false", "no", "off", "n", "否"}
+
+
+class CommandArg(BaseModel):
+    """命令参数定义"""
+
+    name: str = Field(description="参数名（处理函数的关键字参数名）")
+    type: ArgType = Field(default="str", description="类型: str/int/float/bool/text（text 接收剩余全部内容）")
+    required: bool = Field(default=True, description="是否必填")
+    default: Any = Field(default=None, description="默认值（非必填时）")
+    choices: Optional[List[str]] = Field(default=None, description="可选值")
+    description: str = Field(default="", description="参数说明")
+
+
+@dataclass(slots=True)
+class RouteResult:
+    """路由结果"""
+
+    command_id: Optional[str] = None
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    # 未匹配或参数错误时的提示
+    error: Optional[str] = None
+
+
+def check_arg_names(command_id: str, args: List[CommandArg]):
+    """校验参数名不与系统传入的关键字参数冲突
+
+    Raises:
+        ValueError: 参数名为保留名称
+    """
+    for arg in args:
+        if arg.name in RESERVED_ARG_NAMES:
+            raise ValueError(f"命令 {command_id} 的参数名是保留名称: {arg.name}")
+
+
+def normalize(key: str) -> Tuple[str, ...]:
+    """路由键切分为小写的词"""
+    return tuple(key.lower().split())
+
+
+def tokenize(text: str) -> List[str]:
+    """切分命令文本（支持引号包裹带空格的参数）"""
+    if '"' not in text and "'" not in text:
+        return text.split()
+    try:
+        return shlex.split(text)
+    except ValueError:
+        return text.split()
+
+
+def edit_distance(a: str, b: str) -> int:
+    """编辑距离（相邻字符交换算作一次编辑）"""
+    if a == b:
+        return 0
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            )
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def deletes(word: str, distance: int) -> Set[str]:
+    """删除至多 distance 个字符得到的全部变体（含原词）"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {
+            variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))
+        }
+        variants |= frontier
+    return variants
+
+
+def usage(command_id: str, args: List[CommandArg]) -> str:
+    """命令用法，例如 /deploy <env> [count=1]"""
+    parts = [f"/{command_id}"]
+    for arg in args:
+        label = arg.name
+        if arg.choices:
+            label += ":" + "|".join(arg.choices)
+        elif arg.type != "str":
+            label += f":{arg.type}"
+        if arg.required:
+            parts.append(f"<{label}>")
+        elif arg.default is not None:
+            parts.append(f"[{label}={arg.default}]")
+        else:
+            parts.append(f"[{label}]")
+    return " ".join(parts)
+
+
+def convert(arg: CommandArg, raw: str) -> Any:
+    """按参数类型转换
+
+    Raises:
+        ValueError: 类型不匹配或不在可选值中
+    """
+    if arg.type == "int":
+        value: Any = int(raw)
+    elif arg.type == "float":
+        value = float(raw)
+    elif arg.type == "bool":
+        lowered = raw.lower()
+        if lowered in TRUE_VALUES:
+            value = True
+        elif lowered in FALSE_VALUES:
+            value = False
+        else:
+            raise ValueError(raw)
+    else:
+        value = raw
+
+    if arg.choices and str(value) not in arg.choices:
+        raise ValueError(raw)
+    return value
+
+
+def parse_args(args: List[CommandArg], tokens: List[str]) -> Tuple[Dict[str, Any], Optional[str]]:
+    """按参数定义解析参数
+
+    Args:
+        args: 参数定义
+        tokens: 命令之后的词
+
+    Returns:
+        Tuple[Dict[str, Any], Optional[str]]: (关键字参数, 错误提示)
+    """
+    if not args:
+        return ({"args": tokens} if tokens else {}), None
+
+    specs = {arg.name: arg for arg in args}
+    named: Dict[str, str] = {}
+    positional: List[str] = []
+    for token in tokens:
+        name, sep, value = token.partition("=")
+        if sep and name in specs:
+            named[name] = value
+        else:
+            positional.append(token)
+
+    kwargs: Dict[str, Any] = {}
+    # 被跳过的可选参数的错误（剩余参数无法解析时提示）
+    skipped: Optional[str] = None
+    for arg in args:
+        if arg.name in named:
+            raw: Optional[str] = named[arg.name]
+        elif not positional:
+            raw = None
+        elif arg.type == "text":
+            raw = " ".join(positional)
+        else:
+            raw = positional[0]
+
+        if raw is None:
+            if arg.required:
+                return {}, f"缺少参数: {arg.name}"
+            kwargs[arg.name] = arg.default
+            continue
+
+        try:
+            kwargs[arg.name] = convert(arg, raw)
+        except ValueError:
+            expected = "|".join(arg.choices) if arg.choices else arg.type
+            error = f"参数 {arg.name} 无效: {raw}（应为 {expected}）"
+            # 可选的位置参数类型不符时使用默认值，该词留给后面的参数
+            if not arg.required and arg.name not in named:
+                kwargs[arg.name] = arg.default
+                skipped = skipped or error
+                continue
+            return {}, error
+
+        if arg.name not in named:
+            positional = [] if arg.type == "text" else positional[1:]
+
+    if positional:
+        return {}, skipped or f"多余的参数: {' '.join(positional)}"
+    return kwargs, None
+
+
+class _TrieNode:
+    """前缀树节点（按词）"""
+
+    __slots__ = ("children", "command_id")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.command_id: Optional[str] = None
+
+
+class CommandRouter:
+    """编译后的命令路由表（只读，命令变化时重新编译）"""
+
+    def __init__(self, commands: Iterable):
+        """编译路由表
+
+        Args:
+            commands: 命令对象（需要 id、name、aliases、args）
+        """
+        self._root = _TrieNode()
+        self._args: Dict[str, List[CommandArg]] = {}
+        self._names: Dict[str, str] = {}
+        # 单词路由键的前缀 -> 命令ID
+        self._prefixes: Dict[str, Set[str]] = {}
+        # 删除变体 -> 路由键
+        self._deletes: Dict[str, Set[str]] = {}
+        # 路由键 -> 命令ID
+        self._keys: Dict[str, str] = {}
+
+        commands = list(commands)
+        for command in commands:
+            self._args[command.id] = list(command.args)
+            self._names[command.id] = command.name
+
+        # 命令ID优先，其次别名，最后名称；冲突时保留先注册的
+        for source in ("id", "aliases", "name"):
+            for command in commands:
+                if source == "id":
+                    keys = [command.id]
+                elif source == "aliases":
+                    keys = list(command.aliases)
+                else:
+                    keys = [command.name]
+                for key in keys:
+                    self._add(key, command.id, warn=source != "name")
+
+        for key, command_id in self._keys.items():
+            if " " not in key:
+                for length in range(MIN_PREFIX_LENGTH, len(key)):
+                    self._prefixes.setdefault(key[:length], set()).add(command_id)
+            for variant in deletes(key, MAX_EDIT_DISTANCE):
+                self._deletes.setdefault(variant, set()).add(key)
+
+    def _add(self, key: str, command_id: str, warn: bool = True):
+        """添加路由键"""
+        words = normalize(key)
+        if not words:
+            return
+
+        node = self._root
+        for word in words:
+            node = node.children.setdefault(word, _TrieNode())
+        if node.command_id is not None and node.command_id != command_id:
+            if warn:
+                logger.warning(f"命令路由冲突: {key} 已指向 {node.command_id}，忽略 {command_id}")
+            return
+        node.command_id = command_id
+        self._keys[" ".join(words)] = command_id
+
+    def resolve(
+        self, text: str, enabled: Optional[Callable[[str], bool]] = None
+    ) -> RouteResult:
+        """解析命令文本（不含前导 /）
+
+        Args:
+            text: 命令文本
+            enabled: 判断命令是否启用，前缀匹配和建议只考虑启用的命令
+
+        Returns:
+            RouteResult: 路由结果
+        """
+        tokens = tokenize(text)
+        if not tokens:
+            return RouteResult(error="请输入命令，发送 /help 查看可用命令")
+
+        # 最长匹配
+        node = self._root
+        command_id, consumed = None, 0
+        for index, token in enumerate(tokens):
+            node = node.children.get(token.lower())
+            if node is None:
+                break
+            if node.command_id is not None:
+                command_id, consumed = node.command_id, index + 1
+
+        # 唯一前缀
+        if command_id is None:
+            matches = self._prefix_matches(tokens[0], enabled)
+            if len(matches) == 1:
+                command_id, consumed = next(iter(matches)), 1
+
+        if command_id is None:
+            return RouteResult(error=self._miss_message(tokens[0], enabled))
+
+        kwargs, error = parse_args(self._args.get(command_id, []), tokens[consumed:])
+        if error:
+            return RouteResult(
+                command_id=command_id,
+                error=f"{error}\n用法: {usage(command_id, self._args.get(command_id, []))}",
+            )
+        return RouteResult(command_id=command_id, kwargs=kwargs)
+
+    def suggest(self, word: str, enabled: Optional[Callable[[str], bool]] = None) -> List[str]:
+        """编辑距离最近的命令ID
+
+        Args:
+            word: 未匹配的命令
+            enabled: 判断命令是否启用
+
+        Returns:
+            List[str]: 命令ID（距离相同时按路由键排序）
+        """
+        word = word.lower()
+        max_distance = 1 if len(word) <= 4 else MAX_EDIT_DISTANCE
+
+        candidates: Set[str] = set()
+        for variant in deletes(word, max_distance):
+            candidates |= self._deletes.get(variant, set())
+
+        best: Dict[str, Tuple[int, str]] = {}
+        for key in candidates:
+            distance = edit_distance(word, key)
+            command_id = self._keys[key]
+            if distance > max_distance or (enabled is not None and not enabled(command_id)):
+                continue
+            if command_id not in best or (distance, key) < best[command_id]:
+                best[command_id] = (distance, key)
+
+        return sorted(best, key=lambda command_id: best[command_id])
+
+    def _prefix_matches(self, word: str, enabled: Optional[Callable[[str], bool]]) -> Set[str]:
+        """以 word 为前缀的单词命令"""
+        matches = self._prefixes.get(word.lower(), set())
+        if enabled is not None:
+            matches = {command_id for command_id in matches if enabled(command_id)}
+        return matches
+
+    def _miss_message(self, word: str, enabled: Optional[Callable[[str], bool]]) -> str:
+        """未匹配命令的提示"""
+        message = f"未知命令: /{word}"
+        matches = self._prefix_matches(word, enabled)
+        if len(matches) > 1:
+            message += "\n匹配到多个命令: " + self._describe(sorted(matches))
+        else:
+            suggestions = self.suggest(word, enabled)[:3]
+            if suggestions:
+                message += "\n你是不是要找: " + self._describe(suggestions)
+        return message + "\n发送 /help 查看可用命令"
+
+    def _describe(self, command_ids: List[str]) -> str:
+        """命令列表的展示文本"""
+        return "、".join(f"/{command_id}（{self._names[command_id]}）" for command_id in command_ids)
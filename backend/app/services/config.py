@@ -0,0 +1,176 @@
+"""企业微信配置快照
+
+一次查询读取全部 wechat.* 配置，并缓存解码后的配置和派生对象
+（管理员集合、加解密器、API 客户端），回调和发送的热路径不再访问数据库。
+快照命中时不访问数据库，加载时使用异步会话，不阻塞事件循环。
+配置更新时由 update_wechat_config 调用 invalidate() 失效；
+多 worker 部署下其他进程的快照最多在 CONFIG_SNAPSHOT_TTL 秒后重新加载。
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, FrozenSet, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import CONFIG_SNAPSHOT_TTL
+from app.models.config import Config
+from app.schemas.config import WeChatConfig
+from app.services.wechat.client import WeChatClient
+from app.services.wechat.crypto import WeChatCrypto, WeChatCryptoException, get_crypto
+
+logger = logging.getLogger(__name__)
+
+# 企业微信配置键
+WECHAT_CONFIG_KEYS = [
+    "wechat.corp_id",
+    "wechat.app_secret",
+    "wechat.agent_id",
+    "wechat.token",
+    "wechat.encoding_aes_key",
+    "wechat.admin_users",
+]
+
+
+class WeChatConfigSnapshot:
+    """企业微信配置快照（只读）"""
+
+    def __init__(self, version: int, values: Dict[str, Any]):
+        """根据解码后的配置构建快照
+
+        Args:
+            version: 快照版本号
+            values: 解码后的配置（键已去掉 wechat. 前缀）
+        """
+        self.version = version
+        self.values = values
+        self.loaded_at = time.monotonic()
+
+        admin_users = values.get("admin_users")
+        self.admin_users: FrozenSet[str] = (
+            frozenset(admin_users) if isinstance(admin_users, list) else frozenset()
+        )
+
+        # 必填配置齐全时才构建配置对象和客户端
+        self.config: Optional[WeChatConfig] = None
+        self.client: Optional[WeChatClient] = None
+        self.crypto: Optional[WeChatCrypto] = None
+
+        if values.get("corp_id") and values.get("app_secret") and values.get("agent_id"):
+            self.config = WeChatConfig(
+                corp_id=str(values.get("corp_id", "")),
+                app_secret=str(values.get("app_secret", "")),
+                agent_id=str(values.get("agent_id", "")),
+                token=values.get("token"),
+                encoding_aes_key=values.get("encoding_aes_key"),
+                admin_users=sorted(self.admin_users),
+            )
+            self.client = WeChatClient(
+                corp_id=self.config.corp_id,
+                app_secret=self.config.app_secret,
+                agent_id=self.config.agent_id,
+            )
+
+            if self.config.token and self.config.encoding_aes_key:
+                try:
+                    self.crypto = get_crypto(
+                        self.config.token,
+                        self.config.encoding_aes_key,
+                        self.config.corp_id,
+                    )
+                except WeChatCryptoException as e:
+                    logger.error(f"加解密器初始化失败: {e}")
+
+    @property
+    def complete(self) -> bool:
+        """必填配置（corp_id、app_secret、agent_id）是否齐全"""
+        return self.config is not None
+
+
+class ConfigStore:
+    """企业微信配置快照缓存"""
+
+    def __init__(self, ttl: float = CONFIG_SNAPSHOT_TTL):
+        """初始化缓存
+
+        Args:
+            ttl: 快照有效期（秒），0 表示只在 invalidate() 时重新加载
+        """
+        self.ttl = ttl
+        self._snapshot: Optional[WeChatConfigSnapshot] = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    async def get_snapshot(self, db: AsyncSession) -> WeChatConfigSnapshot:
+        """获取配置快照，必要时从数据库加载
+
+        Args:
+            db: 异步数据库会话
+
+        Returns:
+            WeChatConfigSnapshot: 配置快照
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and (
+            self.ttl <= 0 or time.monotonic() - snapshot.loaded_at < self.ttl
+        ):
+            return snapshot
+
+        return await self._load(db)
+
+    def invalidate(self):
+        """使当前快照失效，下次访问时重新加载
+
+        同时递增版本号，失效前开始、失效后才完成的加载不会被缓存。
+        """
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+    async def _load(self, db: AsyncSession) -> WeChatConfigSnapshot:
+        """一次查询加载全部配置
+
+        Args:
+            db: 异步数据库会话
+
+        Returns:
+            WeChatConfigSnapshot: 新的配置快照
+        """
+        with self._lock:
+            started = self._version
+
+        result = await db.execute(select(Config).where(Config.key.in_(WECHAT_CONFIG_KEYS)))
+        rows = result.scalars().all()
+
+        values: Dict[str, Any] = {}
+        for row in rows:
+            try:
+                values[row.key.replace("wechat.", "")] = json.loads(row.value)
+            except Exception:
+                values[row.key.replace("wechat.", "")] = row.value
+
+        with self._lock:
+            if self._version != started:
+                # 加载期间配置已更新，读到的可能是旧值：只给本次调用使用，不缓存
+                logger.info("企业微信配置在加载期间已更新，本次加载结果不缓存")
+                return WeChatConfigSnapshot(started, values)
+
+            previous = self._snapshot
+            # 内容未变化时沿用旧快照，派生对象无需重建
+            if previous is not None and previous.values == values:
+                previous.loaded_at = time.monotonic()
+                return previous
+
+            self._version += 1
+            snapshot = WeChatConfigSnapshot(self._version, values)
+            self._snapshot = snapshot
+
+        logger.info(f"企业微信配置快照已加载: version={snapshot.version}")
+        return snapshot
+
+
+# 全局配置快照缓存
+config_store = ConfigStore()
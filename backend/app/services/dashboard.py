@@ -0,0 +1,108 @@
+"""仪表盘汇总缓存
+
+仪表盘汇总在 DASHBOARD_CACHE_TTL 秒内只生成一次，所有请求共用序列化后的
+响应和 ETag：
+1. 缓存过期时只有一个请求重新生成，其余请求等待结果（不会并发查询数据库）
+2. ETag 只根据内容计算（不含生成时间）；重新生成后内容未变化时沿用上次的
+   响应体和 ETag，客户端带 If-None-Match 时返回 304，不传输响应体
+3. 命令或配置更新时调用 invalidate() 立即失效
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Awaitable, Callable, Optional, Tuple
+
+from app.core.config import DASHBOARD_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+
+def make_etag(content: bytes) -> str:
+    """根据响应内容生成强 ETag"""
+    return '"' + hashlib.sha1(content).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 是否命中当前 ETag（支持多个值、弱比较和 *）
+
+    Args:
+        if_none_match: 请求头 If-None-Match
+        etag: 当前 ETag
+
+    Returns:
+        bool: 命中时返回 True
+    """
+    if not if_none_match:
+        return False
+    for value in if_none_match.split(","):
+        value = value.strip()
+        if value == "*" or value.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class DashboardCache:
+    """仪表盘汇总缓存"""
+
+    def __init__(self, ttl: float = DASHBOARD_CACHE_TTL):
+        """初始化缓存
+
+        Args:
+            ttl: 有效期（秒），0 表示不缓存
+        """
+        self.ttl = ttl
+        # (响应体, ETag, 过期时间)
+        self._entry: Optional[Tuple[bytes, str, float]] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._hits = 0
+        self._builds = 0
+
+    async def get(
+        self, build: Callable[[], Awaitable[Tuple[bytes, bytes]]]
+    ) -> Tuple[bytes, str]:
+        """获取缓存的响应，过期时重新生成
+
+        Args:
+            build: 生成 (序列化响应体, 用于计算 ETag 的内容) 的协程函数，
+                内容不应包含生成时间等每次都变化的字段
+
+        Returns:
+            Tuple[bytes, str]: (响应体, ETag)
+        """
+        entry = self._entry
+        if entry is not None and entry[2] > time.monotonic():
+            self._hits += 1
+            return entry[0], entry[1]
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            # 等待期间可能已由其他请求生成
+            entry = self._entry
+            if entry is not None and entry[2] > time.monotonic():
+                self._hits += 1
+                return entry[0], entry[1]
+
+            body, content = await build()
+            etag = make_etag(content)
+            # 内容未变化时沿用上次的响应体，保证同一 ETag 对应相同的字节
+            if entry is not None and entry[1] == etag:
+                body = entry[0]
+            self._entry = (body, etag, time.monotonic() + self.ttl)
+            self._builds += 1
+            return body, etag
+
+    def invalidate(self):
+        """使缓存失效，下次请求时重新生成"""
+        self._entry = None
+
+    def stats(self) -> dict:
+        """获取缓存统计"""
+        return {"hits": self._hits, "builds": self._builds}
+
+
+# 全局仪表盘汇总缓存
+dashboard_cache = DashboardCache()
@@ -0,0 +1,135 @@
+"""回调消息去重
+
+企业微信在响应较慢时会对同一条回调最多重试 3 次。这里用带 TTL 的
+内存 LRU 记录最近处理过的消息，分两层检查：
+1. 解密前：按请求体（密文）哈希去重，重试请求几乎零成本返回
+2. 解析后：按 MsgId 或 (FromUserName, CreateTime, Event) 去重，保证命令不会重复执行
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import MESSAGE_DEDUP_TTL, MESSAGE_DEDUP_MAX_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class MessageDeduplicator:
+    """带 TTL 的 LRU 去重缓存"""
+
+    def __init__(self, ttl: int = MESSAGE_DEDUP_TTL, max_size: int = MESSAGE_DEDUP_MAX_SIZE):
+        """初始化去重缓存
+
+        Args:
+            ttl: 记录保留时间（秒）
+            max_size: 最大条目数
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def contains(self, key: str) -> bool:
+        """检查是否已记录（不写入）
+
+        Args:
+            key: 去重键
+
+        Returns:
+            bool: 是否已记录且未过期
+        """
+        expires_at = self._entries.get(key)
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def check_and_add(self, key: str) -> bool:
+        """检查并记录
+
+        Args:
+            key: 去重键
+
+        Returns:
+            bool: True 表示重复（此前已记录）
+        """
+        now = time.monotonic()
+        self._evict(now)
+
+        expires_at = self._entries.get(key)
+        if expires_at is not None and expires_at > now:
+            self._hits += 1
+            return True
+
+        self._entries[key] = now + self.ttl
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return False
+
+    def discard(self, key: str):
+        """删除记录
+
+        Args:
+            key: 去重键
+        """
+        self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        """获取统计信息
+
+        Returns:
+            dict: 条目数和命中次数
+        """
+        return {"size": len(self._entries), "hits": self._hits}
+
+    def _evict(self, now: float):
+        """清理过期记录（TTL 固定，按插入顺序即按过期顺序）"""
+        while self._entries:
+            key, expires_at = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def envelope_key(encrypted_msg: str) -> str:
+        """请求体（密文）去重键
+
+        Args:
+            encrypted_msg: 加密的消息（XML格式）
+
+        Returns:
+            str: 去重键
+        """
+        return "env:" + hashlib.sha1(encrypted_msg.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def message_key(
+        msg_id: Optional[str],
+        from_user: str,
+        create_time: int,
+        event: Optional[str] = None,
+    ) -> str:
+        """消息去重键
+
+        普通消息使用 MsgId，事件消息没有 MsgId 时使用 (FromUserName, CreateTime, Event)。
+
+        Args:
+            msg_id: 消息ID
+            from_user: 发送者UserID
+            create_time: 创建时间
+            event: 事件类型
+
+        Returns:
+            str: 去重键
+        """
+        if msg_id:
+            return f"msg:{msg_id}"
+        return f"evt:{from_user}:{create_time}:{event or ''}"
+
+
+# 全局去重实例
+message_deduplicator = MessageDeduplicator()
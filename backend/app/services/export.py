@@ -0,0 +1,192 @@
+"""消息导出
+
+按筛选条件流式导出消息历史（NDJSON / CSV，可选 gzip）：
+1. 服务端分块读取（yield_per），内存占用与导出范围无关
+2. 每块编码后立即输出，不在内存中拼接完整文件
+3. 使用独立的只读会话，生命周期跟随响应流（依赖注入的会话在流开始前已关闭）
+4. 时间范围早于归档边界时，先输出归档文件中的消息
+"""
+
+import asyncio
+import csv
+import io
+import json
+import logging
+import zlib
+from typing import AsyncIterator, List, Optional, Sequence
+
+from sqlalchemy import Select, select
+
+from app.core.config import MESSAGE_EXPORT_CHUNK_SIZE
+from app.core.database import AsyncReadSessionLocal
+from app.models.message import Message
+from app.services.archive import message_archive
+from app.services.history import apply_message_filters
+
+logger = logging.getLogger(__name__)
+
+# 导出格式 -> (媒体类型, 文件扩展名)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+
+# 导出字段（顺序即 CSV 列顺序）
+EXPORT_FIELDS = (
+    "id",
+    "msg_id",
+    "msg_type",
+    "from_user",
+    "to_user",
+    "content",
+    "create_time",
+    "direction",
+    "status",
+    "created_at",
+)
+
+
+def build_export_query(
+    direction: Optional[str] = None,
+    from_user: Optional[str] = None,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+) -> Select:
+    """构建导出查询（按时间正序）
+
+    只查询列而不加载 ORM 对象，避免分块读取时对象堆积在会话中。
+
+    Args:
+        direction: 消息方向（in/out/all）
+        from_user: 发送者
+        start_time: 开始时间（时间戳）
+        end_time: 结束时间（时间戳）
+
+    Returns:
+        Select: 导出查询
+    """
+    columns = [getattr(Message, field) for field in EXPORT_FIELDS]
+    query = apply_message_filters(select(*columns), direction, from_user, start_time, end_time)
+    return query.order_by(Message.create_time, Message.id)
+
+
+def _to_value(value):
+    """导出值转换（datetime 转 ISO 格式）"""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def encode_ndjson(rows: Sequence) -> str:
+    """编码一块 NDJSON（每行一条消息）"""
+    return "".join(
+        json.dumps(
+            {field: _to_value(value) for field, value in zip(EXPORT_FIELDS, row)},
+            ensure_ascii=False,
+        )
+        + "\n"
+        for row in rows
+    )
+
+
+def encode_csv(rows: Sequence, header: bool = False) -> str:
+    """编码一块 CSV
+
+    Args:
+        rows: 消息行
+        header: 是否输出表头（第一块），表头前带 UTF-8 BOM 以便 Excel 识别编码
+
+    Returns:
+        str: CSV 文本
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        buffer.write("\ufeff")
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows([[_to_value(value) for value in row] for row in rows])
+    return buffer.getvalue()
+
+
+async def iter_message_chunks(
+    query: Select, chunk_size: int = MESSAGE_EXPORT_CHUNK_SIZE
+) -> AsyncIterator[List]:
+    """分块读取消息
+
+    Args:
+        query: 导出查询
+        chunk_size: 每块行数
+
+    Yields:
+        List: 一块消息行
+    """
+    async with AsyncReadSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=chunk_size))
+        async for rows in result.partitions():
+            yield rows
+
+
+async def iter_archived_chunks(
+    direction: Optional[str] = None,
+    from_user: Optional[str] = None,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+) -> AsyncIterator[List]:
+    """分块读取归档消息（文件读取在线程中执行）
+
+    Yields:
+        List: 一块消息行（字段顺序同 EXPORT_FIELDS）
+    """
+    chunks = message_archive.iter_chunks(direction, from_user, start_time, end_time)
+    while True:
+        records = await asyncio.to_thread(next, chunks, None)
+        if records is None:
+            break
+        yield [tuple(record[field] for field in EXPORT_FIELDS) for record in records]
+
+
+async def stream_export(
+    query: Select,
+    fmt: str = "ndjson",
+    compress: bool = False,
+    chunk_size: int = MESSAGE_EXPORT_CHUNK_SIZE,
+    archived: Optional[AsyncIterator[List]] = None,
+) -> AsyncIterator[bytes]:
+    """流式导出
+
+    Args:
+        query: 导出查询
+        fmt: 导出格式 ndjson/csv
+        compress: 是否 gzip 压缩
+        chunk_size: 每块行数
+        archived: 归档消息块（早于热表数据，先输出）
+
+    Yields:
+        bytes: 响应数据块
+    """
+    # wbits=31: gzip 格式
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    count = 0
+
+    if fmt == "csv":
+        # 空结果也输出表头
+        first = encode_csv([], header=True).encode()
+        yield compressor.compress(first) if compressor else first
+
+    for chunks in (archived, iter_message_chunks(query, chunk_size)):
+        if chunks is None:
+            continue
+        async for rows in chunks:
+            count += len(rows)
+            text = encode_csv(rows) if fmt == "csv" else encode_ndjson(rows)
+            data = text.encode()
+            if compressor:
+                data = compressor.compress(data)
+                if not data:
+                    continue
+            yield data
+
+    if compressor:
+        yield compressor.flush()
+
+    logger.info(f"消息导出完成: {count} 条, 格式={fmt}, gzip={compress}")
@@ -0,0 +1,184 @@
+"""消息历史查询
+
+消息列表接口的公共查询逻辑：
+1. 筛选条件（方向、发送者、时间范围）
+2. 基于 (create_time, id) 的游标分页，游标对客户端不透明
+3. 总数计算：精确 COUNT、按筛选条件缓存、近似值或不计算
+"""
+
+import base64
+import json
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Select, func, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import MESSAGE_COUNT_CACHE_TTL
+from app.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+# 总数计算方式
+TOTAL_MODES = ("exact", "cached", "approx", "none")
+
+# 消息列表排序（游标分页依赖此顺序）
+MESSAGE_ORDER = (Message.create_time.desc(), Message.id.desc())
+
+
+def apply_message_filters(
+    query: Select,
+    direction: Optional[str] = None,
+    from_user: Optional[str] = None,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+) -> Select:
+    """添加消息列表筛选条件
+
+    Args:
+        query: 查询语句
+        direction: 消息方向（in/out/all）
+        from_user: 发送者
+        start_time: 开始时间（时间戳）
+        end_time: 结束时间（时间戳）
+
+    Returns:
+        Select: 添加筛选条件后的查询
+    """
+    # 方向筛选
+    if direction and direction != "all":
+        query = query.where(Message.direction == direction)
+
+    # 发送者筛选
+    if from_user:
+        query = query.where(Message.from_user == from_user)
+
+    # 时间范围筛选
+    if start_time:
+        query = query.where(Message.create_time >= start_time)
+    if end_time:
+        query = query.where(Message.create_time <= end_time)
+
+    return query
+
+
+def encode_cursor(create_time: int, message_id: int) -> str:
+    """生成游标
+
+    Args:
+        create_time: 最后一条消息的创建时间
+        message_id: 最后一条消息的ID
+
+    Returns:
+        str: URL 安全的游标字符串
+    """
+    raw = json.dumps([create_time, message_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """解析游标
+
+    Args:
+        cursor: 游标字符串
+
+    Returns:
+        Tuple[int, int]: (create_time, id)
+
+    Raises:
+        ValueError: 游标格式错误
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        create_time, message_id = json.loads(raw)
+        return int(create_time), int(message_id)
+    except Exception as e:
+        raise ValueError(f"无效的游标: {cursor}") from e
+
+
+def after_cursor(query: Select, cursor: str) -> Select:
+    """只查询游标之后（更早）的消息
+
+    Args:
+        query: 查询语句
+        cursor: 游标字符串
+
+    Returns:
+        Select: 添加游标条件后的查询
+
+    Raises:
+        ValueError: 游标格式错误
+    """
+    create_time, message_id = decode_cursor(cursor)
+    return query.where(
+        tuple_(Message.create_time, Message.id) < tuple_(create_time, message_id)
+    )
+
+
+class MessageCounter:
+    """消息总数计算（带缓存）"""
+
+    def __init__(self, ttl: float = MESSAGE_COUNT_CACHE_TTL):
+        """初始化
+
+        Args:
+            ttl: 缓存有效期（秒）
+        """
+        self.ttl = ttl
+        # 筛选条件 -> (总数, 过期时间)
+        self._cache: Dict[tuple, Tuple[int, float]] = {}
+
+    async def count(
+        self, db: AsyncSession, query: Select, filters: tuple, mode: str = "exact"
+    ) -> Optional[int]:
+        """计算总数
+
+        Args:
+            db: 异步数据库会话
+            query: 已添加筛选条件的查询
+            filters: 筛选条件（缓存键）
+            mode: 计算方式 exact/cached/approx/none
+
+        Returns:
+            int: 总数，mode=none 时返回None
+        """
+        if mode == "none":
+            return None
+
+        # 无筛选条件时用主键范围估算，不扫描整表
+        if mode == "approx" and not any(filters):
+            return await self._estimate(db)
+
+        if mode in ("cached", "approx"):
+            cached = self._cache.get(filters)
+            if cached is not None and cached[1] > time.monotonic():
+                return cached[0]
+
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+
+        if len(self._cache) > 1000:
+            self._cache.clear()
+        self._cache[filters] = (total, time.monotonic() + self.ttl)
+        return total
+
+    async def _estimate(self, db: AsyncSession) -> int:
+        """估算消息总数
+
+        PostgreSQL 使用表统计信息，其他数据库使用主键范围（min/max 走索引）。
+        """
+        if db.bind.dialect.name == "postgresql":
+            estimate = await db.scalar(
+                text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'messages'")
+            )
+            if estimate is not None and estimate >= 0:
+                return int(estimate)
+
+        row = (await db.execute(select(func.min(Message.id), func.max(Message.id)))).one()
+        if row[0] is None:
+            return 0
+        return row[1] - row[0] + 1
+
+
+# 全局消息总数计算实例
+message_counter = MessageCounter()
@@ -0,0 +1,423 @@
+"""后台任务
+
+耗时较长的命令（部署、日志检索、报表等）声明 background=True 后，回调处理
+只提交任务并立即回复任务ID，不等待命令执行结束：
+1. 任务记录持久化在 jobs 表，可通过 /jobs 接口查询和取消
+2. 全局最多同时执行 JOB_MAX_CONCURRENCY 个任务，其余任务排队（pending）
+3. 处理函数通过 job 参数（JobContext）上报进度，进度按 JOB_PROGRESS_INTERVAL
+   合并写入数据库，也可以推送给用户
+4. 执行结束后通过企业微信把结果或错误发送给提交任务的用户
+
+由 main.lifespan 负责启动和停止。任务只在提交它的进程中执行，取消也只对
+本进程的任务生效；进程重启后遗留的 pending/running 任务在启动时标记为 interrupted。
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import update
+
+from app.core.config import JOB_MAX_CONCURRENCY, JOB_PROGRESS_INTERVAL
+from app.core.database import AsyncSessionLocal
+from app.models.job import Job
+from app.services.command import Command, command_manager
+
+logger = logging.getLogger(__name__)
+
+# 未结束的任务状态
+ACTIVE_STATUSES = ("pending", "running")
+
+# 已结束的任务状态
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled", "interrupted")
+
+
+class JobContext:
+    """任务上下文，作为 job 参数传给命令处理函数
+
+    progress() 和 notify() 也可以在线程池中执行的同步处理函数里调用。
+    同步处理函数无法被强制中断，应定期检查 cancelled 并尽快返回。
+    """
+
+    def __init__(
+        self,
+        manager: "JobManager",
+        job_id: str,
+        user_id: str,
+        loop: asyncio.AbstractEventLoop,
+    ):
+        """初始化任务上下文
+
+        Args:
+            manager: 任务管理器
+            job_id: 任务ID
+            user_id: 提交任务的用户ID
+            loop: 任务所在的事件循环
+        """
+        self.job_id = job_id
+        self.user_id = user_id
+        self.percent = 0
+        self.message: Optional[str] = None
+        self._manager = manager
+        self._loop = loop
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """任务是否已被取消"""
+        return self._cancel.is_set()
+
+    def progress(
+        self,
+        percent: Optional[int] = None,
+        message: Optional[str] = None,
+        notify: bool = False,
+    ):
+        """上报进度
+
+        Args:
+            percent: 进度（0-100）
+            message: 进度说明
+            notify: 是否同时把进度发送给用户
+        """
+        if percent is not None:
+            self.percent = max(0, min(100, int(percent)))
+        if message is not None:
+            self.message = message
+
+        self._call(self._manager._on_progress, self)
+        if notify:
+            self.notify(f"{self.percent}% {self.message or ''}".strip())
+
+    def notify(self, text: str):
+        """给提交任务的用户发送一条消息
+
+        Args:
+            text: 消息内容
+        """
+        self._call(self._manager._notify, self.user_id, f"[任务 {self.job_id}] {text}")
+
+    def _call(self, callback, *args):
+        """在事件循环线程中执行回调"""
+        try:
+            in_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            in_loop = False
+
+        if in_loop:
+            callback(*args)
+        else:
+            self._loop.call_soon_threadsafe(callback, *args)
+
+
+class JobManager:
+    """后台任务管理器"""
+
+    def __init__(
+        self,
+        max_concurrency: int = JOB_MAX_CONCURRENCY,
+        progress_interval: float = JOB_PROGRESS_INTERVAL,
+    ):
+        """初始化任务管理器
+
+        Args:
+            max_concurrency: 同时执行的任务上限
+            progress_interval: 进度写入数据库的最短间隔（秒）
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.progress_interval = progress_interval
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._contexts: Dict[str, JobContext] = {}
+        # 进度写入、消息发送等附属任务（保留引用，避免被回收）
+        self._side_tasks: Set[asyncio.Task] = set()
+        # 进度写入节流: job_id -> 上次写入时间 / 待执行的延迟写入
+        self._flushed_at: Dict[str, float] = {}
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+
+        # 统计
+        self._submitted = 0
+        self._executing = 0
+        self._finished: Counter = Counter()
+
+    async def start(self):
+        """启动任务管理器，把上次运行遗留的未结束任务标记为 interrupted"""
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(Job)
+                .where(Job.status.in_(ACTIVE_STATUSES))
+                .values(status="interrupted", error="服务重启，任务中断", finished_at=datetime.now())
+            )
+            await db.commit()
+
+        if result.rowcount:
+            logger.warning(f"上次运行遗留的后台任务已标记为中断: {result.rowcount} 个")
+        logger.info(f"后台任务管理器已启动: 并发上限 {self.max_concurrency}")
+
+    async def stop(self):
+        """停止任务管理器，中断仍在执行和排队的任务"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info(f"已中断后台任务: {len(tasks)} 个")
+
+        # 等待进度写入和消息发送完成
+        if self._side_tasks:
+            await asyncio.wait(list(self._side_tasks), timeout=5)
+
+    async def submit(
+        self, command_id: str, user_id: str, is_admin: bool, **kwargs
+    ) -> dict:
+        """提交后台任务，立即返回任务ID
+
+        Args:
+            command_id: 命令ID
+            user_id: 用户ID
+            is_admin: 是否为管理员
+            **kwargs: 命令参数
+
+        Returns:
+            dict: 提交结果（成功时包含 job_id）
+        """
+        command, error = command_manager.check_command(command_id, is_admin)
+        if error:
+            return {"success": False, "message": error}
+
+        job_id = uuid.uuid4().hex
+        async with AsyncSessionLocal() as db:
+            db.add(Job(job_id=job_id, command_id=command_id, user_id=user_id, status="pending"))
+            await db.commit()
+
+        context = JobContext(self, job_id, user_id, asyncio.get_running_loop())
+        task = asyncio.create_task(
+            self._run(command, context, is_admin, kwargs), name=f"job-{job_id}"
+        )
+        self._contexts[job_id] = context
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._forget(job_id))
+        self._submitted += 1
+
+        logger.info(f"提交后台任务: {job_id}, 命令: {command_id}, 用户: {user_id}")
+        return {
+            "success": True,
+            "job_id": job_id,
+            "message": f"任务已提交: {command.name}\n任务ID: {job_id}\n执行完成后将发送结果",
+        }
+
+    def cancel(self, job_id: str) -> bool:
+        """取消任务
+
+        排队中的任务和协程处理函数立即停止；线程池中的同步处理函数
+        只能通过 JobContext.cancelled 感知取消。
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            bool: 任务在本进程中执行且已请求取消时返回 True
+        """
+        task = self._tasks.get(job_id)
+        context = self._contexts.get(job_id)
+        if task is None or context is None or task.done():
+            return False
+
+        context._cancel.set()
+        task.cancel()
+        logger.info(f"取消后台任务: {job_id}")
+        return True
+
+    def live_progress(self, job_id: str) -> Optional[Tuple[int, Optional[str]]]:
+        """本进程中执行的任务的最新进度（尚未写入数据库的部分）
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            Optional[Tuple[int, Optional[str]]]: (进度, 进度说明)，任务不在本进程中时为空
+        """
+        context = self._contexts.get(job_id)
+        if context is None:
+            return None
+        return context.percent, context.message
+
+    def stats(self) -> dict:
+        """获取任务统计"""
+        return {
+            "submitted": self._submitted,
+            "running": self._executing,
+            "pending": len(self._tasks) - self._executing,
+            "max_concurrency": self.max_concurrency,
+            **{status: self._finished[status] for status in FINISHED_STATUSES},
+        }
+
+    async def _run(
+        self, command: Command, context: JobContext, is_admin: bool, kwargs: Dict[str, Any]
+    ):
+        """排队等待执行名额，执行命令并发送结果
+
+        Args:
+            command: 命令对象
+            context: 任务上下文
+            is_admin: 是否为管理员
+            kwargs: 命令参数
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        status, result, error = "failed", None, None
+        try:
+            async with self._semaphore:
+                self._executing += 1
+                try:
+                    await self._update(
+                        context.job_id, status="running", started_at=datetime.now()
+                    )
+                    outcome = await command_manager.execute_command(
+                        command.id, context.user_id, is_admin, job=context, **kwargs
+                    )
+                finally:
+                    self._executing -= 1
+
+            if outcome.get("success"):
+                status = "succeeded"
+                if outcome.get("result") is not None:
+                    result = str(outcome["result"])
+            else:
+                error = outcome.get("message", "命令执行失败")
+        except asyncio.CancelledError:
+            # 用户取消，或服务关闭时由 stop() 中断
+            if context.cancelled:
+                status, error = "cancelled", "任务已取消"
+            else:
+                status, error = "interrupted", "服务关闭，任务中断"
+        except Exception as e:
+            logger.error(f"后台任务执行失败: {context.job_id}, 错误: {e}")
+            error = f"任务执行失败: {str(e)}"
+
+        await self._finish(command, context, status, result, error)
+
+    async def _finish(
+        self,
+        command: Command,
+        context: JobContext,
+        status: str,
+        result: Optional[str],
+        error: Optional[str],
+    ):
+        """保存任务结果并通知用户"""
+        handle = self._flush_handles.pop(context.job_id, None)
+        if handle is not None:
+            handle.cancel()
+
+        try:
+            await self._update(
+                context.job_id,
+                status=status,
+                progress=100 if status == "succeeded" else context.percent,
+                progress_message=context.message,
+                result=result,
+                error=error,
+                finished_at=datetime.now(),
+            )
+        except Exception as e:
+            logger.error(f"保存后台任务结果失败: {context.job_id}, 错误: {e}")
+
+        self._finished[status] += 1
+        logger.info(f"后台任务结束: {context.job_id}, 命令: {command.id}, 状态: {status}")
+
+        # 服务关闭中不再发送消息
+        if status == "interrupted":
+            return
+
+        header = {
+            "succeeded": "任务完成",
+            "failed": "任务失败",
+            "cancelled": "任务已取消",
+        }[status]
+        text = f"{header}: {command.name}\n任务ID: {context.job_id}"
+        detail = result if status == "succeeded" else error
+        if detail and status != "cancelled":
+            text += f"\n\n{detail}"
+        await self._send(context.user_id, text)
+
+    def _forget(self, job_id: str):
+        """任务结束后清理内存中的记录"""
+        self._tasks.pop(job_id, None)
+        self._contexts.pop(job_id, None)
+        self._flushed_at.pop(job_id, None)
+
+    async def _update(self, job_id: str, only_running: bool = False, **values):
+        """更新任务记录
+
+        Args:
+            job_id: 任务ID
+            only_running: 只更新仍在执行中的任务（避免延迟的进度覆盖最终状态）
+            **values: 列值
+        """
+        statement = update(Job).where(Job.job_id == job_id)
+        if only_running:
+            statement = statement.where(Job.status == "running")
+        async with AsyncSessionLocal() as db:
+            await db.execute(statement.values(**values))
+            await db.commit()
+
+    def _on_progress(self, context: JobContext):
+        """进度更新（事件循环线程），按间隔合并写入数据库"""
+        if context.job_id in self._flush_handles or context.job_id not in self._tasks:
+            return
+
+        last = self._flushed_at.get(context.job_id, 0.0)
+        delay = max(0.0, last + self.progress_interval - time.monotonic())
+        self._flush_handles[context.job_id] = asyncio.get_running_loop().call_later(
+            delay, self._flush_progress, context
+        )
+
+    def _flush_progress(self, context: JobContext):
+        """把最新进度写入数据库"""
+        self._flush_handles.pop(context.job_id, None)
+        self._flushed_at[context.job_id] = time.monotonic()
+        self._spawn(
+            self._update(
+                context.job_id,
+                only_running=True,
+                progress=context.percent,
+                progress_message=context.message,
+            )
+        )
+
+    def _notify(self, user_id: str, text: str):
+        """发送进度消息（事件循环线程）"""
+        self._spawn(self._send(user_id, text))
+
+    def _spawn(self, coro):
+        """启动附属任务"""
+        task = asyncio.create_task(coro)
+        self._side_tasks.add(task)
+        task.add_done_callback(self._side_task_done)
+
+    def _side_task_done(self, task: asyncio.Task):
+        """附属任务结束时记录异常"""
+        self._side_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"后台任务附属操作失败: {task.exception()}")
+
+    async def _send(self, user_id: str, content: str) -> bool:
+        """通过企业微信给用户发送消息"""
+        # 消息服务依赖本模块提交后台任务，在此处导入避免循环导入
+        from app.services.message import send_user_message
+
+        return await send_user_message(user_id, content)
+
+
+# 全局后台任务管理器实例
+job_manager = JobManager()
@@ -5,16 +5,25 @@
 """
 
 import logging
-from typing import Optional
+import uuid
+from typing import FrozenSet, Optional
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.services.wechat.crypto import WeChatCrypto, WeChatCryptoException
-from app.services.wechat.parser import MessageParser, ParsedMessage, MessageType, EventType
+from app.services.wechat.crypto import WeChatCrypto, WeChatCryptoException, get_crypto
+from app.services.wechat.parser import MessageParser, IncomingMessage, MessageType, EventType
 from app.services.wechat.client import WeChatClient
 from app.services.command import command_manager
+from app.services.jobs import job_manager
+from app.services.dedup import MessageDeduplicator, message_deduplicator
+from app.services.stats import message_stats
+from app.services.writer import message_writer
 from app.models.message import Message
 from app.schemas.config import WeChatConfig
+from app.services.config import WeChatConfigSnapshot, config_store
+from app.core.config import MESSAGE_DEDUP_DB
+from app.core.database import AsyncSessionLocal
 
 logger = logging.getLogger(__name__)
 
@@ -30,30 +39,60 @@ class MessageService:
         self,
         wechat_config: WeChatConfig,
         wechat_client: WeChatClient,
-        db: Session,
+        db: AsyncSession,
+        crypto: Optional[WeChatCrypto] = None,
+        admin_users: Optional[FrozenSet[str]] = None,
     ):
         """初始化消息处理服务
 
         Args:
             wechat_config: 企业微信配置
             wechat_client: 企业微信客户端
-            db: 数据库会话
+            db: 异步数据库会话
+            crypto: 已初始化的加解密器，为None时根据配置创建
+            admin_users: 管理员集合，为None时使用配置中的列表
         """
         self.config = wechat_config
         self.client = wechat_client
         self.db = db
+        self.admin_users = (
+            admin_users if admin_users is not None else wechat_config.admin_users
+        )
 
         # 初始化加解密器
-        if wechat_config.token and wechat_config.encoding_aes_key:
-            self.crypto = WeChatCrypto(
-                token=wechat_config.token,
-                encoding_aes_key=wechat_config.encoding_aes_key,
-                corp_id=wechat_config.corp_id,
+        if crypto is not None:
+            self.crypto = crypto
+        elif wechat_config.token and wechat_config.encoding_aes_key:
+            self.crypto = get_crypto(
+                wechat_config.token,
+                wechat_config.encoding_aes_key,
+                wechat_config.corp_id,
             )
         else:
             self.crypto = None
             logger.warning("未配置Token和EncodingAESKey，无法处理加密消息")
 
+    @classmethod
+    def from_snapshot(
+        cls, snapshot: WeChatConfigSnapshot, db: AsyncSession
+    ) -> "MessageService":
+        """根据配置快照创建服务，复用快照中的客户端和加解密器
+
+        Args:
+            snapshot: 企业微信配置快照
+            db: 异步数据库会话
+
+        Returns:
+            MessageService: 消息处理服务
+        """
+        return cls(
+            wechat_config=snapshot.config,
+            wechat_client=snapshot.client,
+            db=db,
+            crypto=snapshot.crypto,
+            admin_users=snapshot.admin_users,
+        )
+
     async def handle_incoming_message(
         self,
         encrypted_msg: str,
@@ -64,8 +103,8 @@ class MessageService:
         """处理企业微信回调消息
 
         处理流程：
-        1. 解密消息
-        2. 解析消息
+        1. 解密消息（重复的回调请求直接跳过）
+        2. 解析消息（重复的 MsgId 直接跳过）
         3. 权限验证
         4. 保存消息记录
         5. 根据类型分发处理
@@ -82,12 +121,22 @@ class MessageService:
         Returns:
             str: 响应内容（可选）
         """
+        # 分发前处理失败时删除去重记录，企业微信重试时重新处理；
+        # 分发后（命令可能已执行）保留去重记录，保证命令不会重复执行
+        envelope_key = message_key = None
+        dispatched = False
         try:
             # 1. 解密消息
             if not self.crypto:
                 logger.error("加解密器未初始化")
                 return None
 
+            # 企业微信重试的请求体与首次相同，解密前即可识别
+            envelope_key = MessageDeduplicator.envelope_key(encrypted_msg)
+            if message_deduplicator.check_and_add(envelope_key):
+                logger.info("重复的回调请求，已忽略")
+                return "success"
+
             decrypted_msg = self.crypto.decrypt_message(
                 msg_signature, timestamp, nonce, encrypted_msg
             )
@@ -99,19 +148,25 @@ class MessageService:
                 logger.warning("消息解析失败")
                 return None
 
+            message_key = self._dedup_key(parsed_msg)
+            if await self._is_duplicate(parsed_msg, message_key):
+                logger.info(f"重复的消息，已忽略: {self._record_msg_id(parsed_msg)}")
+                return "success"
+
             logger.info(
                 f"收到消息: type={parsed_msg.msg_type}, from={parsed_msg.from_user}"
             )
 
             # 3. 权限验证
             is_admin = MessageParser.is_admin_user(
-                parsed_msg.from_user, self.config.admin_users
+                parsed_msg.from_user, self.admin_users
             )
 
             # 4. 保存消息记录
-            self._save_message(parsed_msg, direction="in")
+            await self._save_message(parsed_msg, direction="in")
 
             # 5. 根据类型分发处理
+            dispatched = True
             response_text = None
 
             if parsed_msg.msg_type == MessageType.TEXT:
@@ -137,13 +192,19 @@ class MessageService:
 
         except WeChatCryptoException as e:
             logger.error(f"消息解密失败: {e}")
+            # 校验失败的请求不占用去重记录，配置修正后的重试仍可处理
+            self._discard_dedup_keys(envelope_key, message_key)
             return None
         except Exception as e:
+            if dispatched:
+                logger.error(f"消息已处理，发送响应失败: {e}")
+                return None
             logger.error(f"处理消息失败: {e}")
+            self._discard_dedup_keys(envelope_key, message_key)
             return None
 
     async def _handle_text_message(
-        self, message: ParsedMessage, is_admin: bool
+        self, message: IncomingMessage, is_admin: bool
     ) -> Optional[str]:
         """处理文本消息
 
@@ -160,23 +221,53 @@ class MessageService:
 
         # 检查是否为命令（以 / 开头）
         if content.startswith("/"):
-            command_id = content[1:].split()[0]  # 提取命令ID
-            result = command_manager.execute_command(
-                command_id=command_id,
-                user_id=message.from_user,
-                is_admin=is_admin,
+            route = command_manager.route(content[1:])
+            if route.error:
+                return route.error
+            return await self._run_command(
+                route.command_id, message.from_user, is_admin, **route.kwargs
             )
 
-            if result.get("success"):
-                return result.get("result", "命令执行成功")
-            else:
-                return result.get("message", "命令执行失败")
-
         # 非命令消息，返回帮助提示
         return "请使用菜单或发送 /help 查看可用命令"
 
+    async def _run_command(
+        self, command_id: str, user_id: str, is_admin: bool, **kwargs
+    ) -> str:
+        """执行命令并生成回复
+
+        后台命令只提交任务并回复任务ID，执行结果完成后另行发送。
+
+        Args:
+            command_id: 命令ID
+            user_id: 用户ID
+            is_admin: 是否为管理员
+            **kwargs: 解析后的命令参数
+
+        Returns:
+            str: 响应文本
+        """
+        command = command_manager.get_command(command_id)
+        if command is not None and command.background:
+            result = await job_manager.submit(
+                command_id=command_id, user_id=user_id, is_admin=is_admin, **kwargs
+            )
+            return result.get("message", "任务提交失败")
+
+        result = await command_manager.execute_command(
+            command_id=command_id,
+            user_id=user_id,
+            is_admin=is_admin,
+            **kwargs,
+        )
+
+        if result.get("success"):
+            return result.get("result", "命令执行成功")
+        else:
+            return result.get("message", "命令执行失败")
+
     async def _handle_event_message(
-        self, message: ParsedMessage, is_admin: bool
+        self, message: IncomingMessage, is_admin: bool
     ) -> Optional[str]:
         """处理事件消息
 
@@ -194,16 +285,7 @@ class MessageService:
                 return None
 
             # 执行命令
-            result = command_manager.execute_command(
-                command_id=command_id,
-                user_id=message.from_user,
-                is_admin=is_admin,
-            )
-
-            if result.get("success"):
-                return result.get("result", "命令执行成功")
-            else:
-                return result.get("message", "命令执行失败")
+            return await self._run_command(command_id, message.from_user, is_admin)
 
         elif message.event == EventType.ENTER_AGENT:
             # 进入应用事件
@@ -211,30 +293,94 @@ class MessageService:
 
         return None
 
-    def _save_message(self, message: ParsedMessage, direction: str):
+    @staticmethod
+    def _dedup_key(message: IncomingMessage) -> str:
+        """消息去重键"""
+        return MessageDeduplicator.message_key(
+            message.msg_id,
+            message.from_user,
+            message.create_time,
+            message.event.value if message.event else None,
+        )
+
+    @staticmethod
+    def _discard_dedup_keys(*keys: Optional[str]):
+        """删除去重记录（跳过未生成的键）"""
+        for key in keys:
+            if key:
+                message_deduplicator.discard(key)
+
+    async def _is_duplicate(self, message: IncomingMessage, key: str) -> bool:
+        """检查消息是否已处理过
+
+        先查内存去重缓存；启用 MESSAGE_DEDUP_DB 时再查询数据库中的消息记录，
+        覆盖多 worker 部署和重启的情况。
+
+        Args:
+            message: 解析后的消息
+            key: 消息去重键
+
+        Returns:
+            bool: 是否重复
+        """
+        if message_deduplicator.check_and_add(key):
+            return True
+
+        if MESSAGE_DEDUP_DB:
+            exists = await self.db.scalar(
+                select(Message.id)
+                .where(Message.msg_id == self._record_msg_id(message))
+                .limit(1)
+            )
+            return exists is not None
+
+        return False
+
+    @staticmethod
+    def _record_msg_id(message: IncomingMessage) -> str:
+        """消息记录使用的 msg_id（事件消息没有 MsgId）"""
+        return message.msg_id or f"{message.from_user}_{message.create_time}"
+
+    async def _save_message(self, message: IncomingMessage, direction: str):
         """保存消息记录
 
         Args:
             message: 解析后的消息
             direction: 消息方向（in/out）
         """
+        await self._save_record(
+            {
+                "msg_id": self._record_msg_id(message),
+                "msg_type": message.msg_type.value,
+                "from_user": message.from_user,
+                "to_user": message.to_user,
+                "content": message.summary(),
+                "create_time": message.create_time,
+                "direction": direction,
+                "status": "sent" if direction == "out" else "received",
+            }
+        )
+
+    async def _save_record(self, row: dict):
+        """写入一条消息记录
+
+        启用批量写入时放入写缓冲，否则立即提交。
+
+        Args:
+            row: messages 表的列值
+        """
+        if message_writer.running:
+            await message_writer.add(row)
+            return
+
         try:
-            db_message = Message(
-                msg_id=message.msg_id or f"{message.from_user}_{message.create_time}",
-                msg_type=message.msg_type.value,
-                from_user=message.from_user,
-                to_user=message.to_user,
-                content=message.content or message.event_key or "",
-                create_time=message.create_time,
-                direction=direction,
-                status="sent" if direction == "out" else "received",
-            )
-            self.db.add(db_message)
-            self.db.commit()
-            logger.debug(f"保存消息记录: {db_message.msg_id}")
+            self.db.add(Message(**row))
+            await message_stats.apply(self.db, [row])
+            await self.db.commit()
+            logger.debug(f"保存消息记录: {row['msg_id']}")
         except Exception as e:
             logger.error(f"保存消息记录失败: {e}")
-            self.db.rollback()
+            await self.db.rollback()
 
     async def send_message(
         self, to_user: str, content: str, msg_type: str = "text"
@@ -258,22 +404,44 @@ class MessageService:
                 logger.warning(f"不支持的消息类型: {msg_type}")
                 return False
 
-            # 保存发送记录
-            db_message = Message(
-                msg_id=f"out_{to_user}_{int(datetime.now().timestamp())}",
-                msg_type=msg_type,
-                from_user="system",
-                to_user=to_user,
-                content=content,
-                create_time=int(datetime.now().timestamp()),
-                direction="out",
-                status="sent" if result.get("success") else "failed",
+            # 保存发送记录（同一秒内可能发送多条，msg_id 带随机后缀）
+            await self._save_record(
+                {
+                    "msg_id": f"out_{to_user}_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:8]}",
+                    "msg_type": msg_type,
+                    "from_user": "system",
+                    "to_user": to_user,
+                    "content": content,
+                    "create_time": int(datetime.now().timestamp()),
+                    "direction": "out",
+                    "status": "sent" if result.get("success") else "failed",
+                }
             )
-            self.db.add(db_message)
-            self.db.commit()
 
             return result.get("success", False)
 
         except Exception as e:
             logger.error(f"发送消息失败: {e}")
             return False
+
+
+async def send_user_message(user_id: str, content: str) -> bool:
+    """在请求之外（后台任务、脚本输出）给用户发送消息，同时保存发送记录
+
+    Args:
+        user_id: 接收者UserID
+        content: 消息内容
+
+    Returns:
+        bool: 发送是否成功
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            snapshot = await config_store.get_snapshot(db)
+            if not snapshot.complete:
+                logger.warning(f"企业微信配置不完整，无法发送消息: {user_id}")
+                return False
+            return await MessageService.from_snapshot(snapshot, db).send_message(user_id, content)
+    except Exception as e:
+        logger.error(f"发送消息失败: {user_id}, 错误: {e}")
+        return False
@@ -0,0 +1,479 @@
+"""脚本命令执行器
+
+命令表中 handler 为 "script:<脚本路径> [参数...]" 的命令在启动时注册到命令管理器，
+执行时：
+1. 只运行 SCRIPT_DIR 目录下的可执行文件（解析符号链接后校验），参数直接传给
+   进程，不经过 shell。用户输入的参数只替换 handler 中的 {args} 占位符，
+   没有占位符的命令不接受参数
+2. 使用 asyncio 子进程，同时运行的进程数不超过 SCRIPT_MAX_PROCESSES
+3. 子进程在独立的进程组中运行，只继承必要的环境变量并限制虚拟内存（由 /bin/sh
+   的 ulimit 设置后 exec 脚本；应用进程有多个线程，不能使用 preexec_fn）；
+   命令超时、任务取消或输出超过 SCRIPT_OUTPUT_MAX_BYTES 时终止整个进程组
+4. 标准输出和标准错误合并后增量读取，按 SCRIPT_MESSAGE_BYTES 和
+   SCRIPT_FLUSH_INTERVAL 分批发送给用户，最后一批随命令结果一起回复，
+   不在内存中缓存完整输出
+
+超时、并发上限和后台执行沿用命令表的 timeout、max_concurrency、background 列。
+"""
+
+import asyncio
+import codecs
+import logging
+import os
+import shlex
+import signal
+import time
+from functools import partial
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import (
+    SCRIPT_DIR,
+    SCRIPT_MAX_PROCESSES,
+    SCRIPT_MEMORY_LIMIT_MB,
+    SCRIPT_OUTPUT_MAX_BYTES,
+    SCRIPT_MESSAGE_BYTES,
+    SCRIPT_FLUSH_INTERVAL,
+)
+from app.core.database import AsyncSessionLocal
+from app.models.command import Command as DBCommand
+from app.services.command import Command, command_manager
+from app.services.message import send_user_message
+
+logger = logging.getLogger(__name__)
+
+# 命令表 handler 列的脚本命令前缀
+SCRIPT_HANDLER_PREFIX = "script:"
+
+# handler 中用户参数的占位符（单独作为一个参数）
+ARGS_PLACEHOLDER = "{args}"
+
+# 设置资源限制后 exec 脚本（$0 为脚本路径，$@ 为参数）
+LIMIT_SHELL = "/bin/sh"
+LIMIT_SCRIPT = 'ulimit -c 0 && {memory}exec "$0" "$@"'
+
+# 每次从管道读取的字节数
+READ_SIZE = 4096
+
+# 子进程继承的环境变量
+INHERITED_ENV = ("PATH", "LANG", "LC_ALL", "TZ", "HOME")
+
+
+class ScriptError(Exception):
+    """脚本命令异常"""
+
+    pass
+
+
+def parse_handler(handler: str) -> Tuple[str, List[str]]:
+    """解析命令表 handler 列
+
+    Args:
+        handler: 例如 "script:deploy.sh --env prod" 或 "script:grep.sh -- {args}"
+
+    Returns:
+        Tuple[str, List[str]]: (脚本路径, 固定参数（可能包含 {args} 占位符）)
+
+    Raises:
+        ScriptError: 不是脚本命令或格式错误
+    """
+    if not handler or not handler.startswith(SCRIPT_HANDLER_PREFIX):
+        raise ScriptError(f"不是脚本命令: {handler}")
+    try:
+        parts = shlex.split(handler[len(SCRIPT_HANDLER_PREFIX):])
+    except ValueError as e:
+        raise ScriptError(f"脚本命令格式错误: {e}")
+    if not parts:
+        raise ScriptError("未指定脚本路径")
+    return parts[0], parts[1:]
+
+
+def expand_args(script_args: List[str], args: Optional[List[str]]) -> List[str]:
+    """把用户参数填入 {args} 占位符
+
+    Args:
+        script_args: 命令表中定义的固定参数
+        args: 用户输入的参数
+
+    Returns:
+        List[str]: 进程参数（不含脚本路径）
+
+    Raises:
+        ScriptError: 命令未声明 {args} 占位符但用户输入了参数
+    """
+    if ARGS_PLACEHOLDER not in script_args:
+        if args:
+            raise ScriptError("该命令不接受参数")
+        return list(script_args)
+
+    argv: List[str] = []
+    for arg in script_args:
+        if arg == ARGS_PLACEHOLDER:
+            argv.extend(args or [])
+        else:
+            argv.append(arg)
+    return argv
+
+
+def resolve_script(script: str, script_dir: str = SCRIPT_DIR) -> str:
+    """校验脚本在白名单目录中且可执行
+
+    Args:
+        script: 脚本路径（相对于脚本目录）
+        script_dir: 脚本目录
+
+    Returns:
+        str: 脚本的绝对路径
+
+    Raises:
+        ScriptError: 脚本不在脚本目录中、不存在或不可执行
+    """
+    root = os.path.realpath(script_dir)
+    path = os.path.realpath(os.path.join(root, script))
+    if os.path.commonpath([root, path]) != root or path == root:
+        raise ScriptError(f"脚本不在脚本目录中: {script}")
+    if not os.path.isfile(path):
+        raise ScriptError(f"脚本不存在: {script}")
+    if not os.access(path, os.X_OK):
+        raise ScriptError(f"脚本不可执行: {script}")
+    return path
+
+
+def split_output(text: str, max_bytes: int) -> Tuple[str, str]:
+    """从输出开头切出一条消息（不超过 max_bytes 字节，尽量在换行处切分）
+
+    Args:
+        text: 待发送的输出
+        max_bytes: 每条消息的最大字节数
+
+    Returns:
+        Tuple[str, str]: (本条消息, 剩余输出)
+    """
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text, ""
+
+    head = encoded[:max_bytes].decode("utf-8", errors="ignore")
+    newline = head.rfind("\n")
+    if newline > 0:
+        head = head[: newline + 1]
+    return head, text[len(head):]
+
+
+class ScriptOutput:
+    """脚本输出分批器"""
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        message_bytes: int = SCRIPT_MESSAGE_BYTES,
+        flush_interval: float = SCRIPT_FLUSH_INTERVAL,
+    ):
+        """初始化分批器
+
+        Args:
+            send: 发送一批输出的协程函数
+            message_bytes: 每条消息的最大字节数
+            flush_interval: 发送间隔（秒）
+        """
+        self.send = send
+        self.message_bytes = message_bytes
+        self.flush_interval = flush_interval
+        self.total_bytes = 0
+        self.batches = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+        self._pending_since: Optional[float] = None
+
+    def feed(self, data: bytes):
+        """追加一段原始输出"""
+        self.total_bytes += len(data)
+        text = self._decoder.decode(data)
+        if text:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending += text
+
+    def time_to_flush(self) -> Optional[float]:
+        """距下次按间隔发送的秒数，没有待发送输出时为空"""
+        if not self._pending:
+            return None
+        return max(0.0, self._pending_since + self.flush_interval - time.monotonic())
+
+    @property
+    def full(self) -> bool:
+        """待发送输出是否已超过一条消息"""
+        return len(self._pending.encode("utf-8")) > self.message_bytes
+
+    async def flush(self, all_pending: bool = True):
+        """发送待发送的输出
+
+        Args:
+            all_pending: 发送全部输出；为 False 时只发送满一条消息的部分
+        """
+        while self._pending and (all_pending or self.full):
+            head, self._pending = split_output(self._pending, self.message_bytes)
+            self._pending_since = time.monotonic()
+            if head.strip():
+                await self.send(head.rstrip("\n"))
+                self.batches += 1
+
+    def finish(self) -> str:
+        """取出剩余的输出（随命令结果一起回复）"""
+        rest = self._pending + self._decoder.decode(b"", final=True)
+        self._pending = ""
+        return rest.rstrip("\n")
+
+
+class ScriptExecutor:
+    """脚本执行器"""
+
+    def __init__(
+        self,
+        script_dir: str = SCRIPT_DIR,
+        max_processes: int = SCRIPT_MAX_PROCESSES,
+        memory_limit_mb: int = SCRIPT_MEMORY_LIMIT_MB,
+        max_output_bytes: int = SCRIPT_OUTPUT_MAX_BYTES,
+    ):
+        """初始化脚本执行器
+
+        Args:
+            script_dir: 脚本目录
+            max_processes: 同时运行的进程上限
+            memory_limit_mb: 进程虚拟内存上限（MB），0 表示不限制
+            max_output_bytes: 输出总量上限（字节）
+        """
+        self.script_dir = script_dir
+        self.max_processes = max(1, max_processes)
+        self.memory_limit_mb = memory_limit_mb
+        self.max_output_bytes = max_output_bytes
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # 统计
+        self._running = 0
+        self._started = 0
+        self._killed = 0
+
+    async def run(
+        self,
+        script: str,
+        script_args: List[str],
+        user_id: str,
+        job=None,
+        args: Optional[List[str]] = None,
+        **kwargs,
+    ) -> str:
+        """执行脚本（命令处理函数）
+
+        Args:
+            script: 脚本路径（相对于脚本目录）
+            script_args: 命令表中定义的固定参数
+            user_id: 用户ID
+            job: 后台任务上下文（后台执行时）
+            args: 用户输入的参数（替换固定参数中的 {args} 占位符）
+
+        Returns:
+            str: 最后一批输出和退出状态
+
+        Raises:
+            ScriptError: 脚本无效、不接受参数、输出超限或退出码非 0
+        """
+        path = resolve_script(script, self.script_dir)
+        argv = [path, *expand_args(script_args, args)]
+        prefix = f"[任务 {job.job_id}]\n" if job is not None else ""
+
+        async def send(text: str):
+            if job is not None:
+                job.progress(message=text.rsplit("\n", 1)[-1][:200])
+            # 超时取消不打断发送中的消息（发送过程包含数据库写入）
+            await asyncio.shield(send_user_message(user_id, prefix + text))
+
+        output = ScriptOutput(send)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_processes)
+
+        async with self._semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *self._limit_resources(argv),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=os.path.dirname(path),
+                env=self._environment(user_id, job),
+                start_new_session=True,
+            )
+            self._running += 1
+            self._started += 1
+            logger.info(f"启动脚本: {script}, pid={process.pid}, 用户: {user_id}")
+
+            try:
+                truncated = await self._read_output(process, output)
+                returncode = await process.wait()
+            except asyncio.CancelledError:
+                # 命令超时或任务取消：终止进程，已读取的输出仍发送给用户
+                self._kill(process)
+                await process.communicate()
+                await output.flush()
+                raise
+            finally:
+                self._running -= 1
+
+        tail = output.finish()
+        logger.info(
+            f"脚本结束: {script}, 退出码 {returncode}, 输出 {output.total_bytes} 字节, "
+            f"分 {output.batches} 批发送"
+        )
+
+        if truncated:
+            status = f"输出超过 {self.max_output_bytes} 字节，脚本已终止"
+        elif returncode != 0:
+            status = f"脚本退出码 {returncode}"
+        else:
+            status = "脚本执行完成"
+
+        text = f"{tail}\n\n[{status}]" if tail else f"[{status}]"
+        if truncated or returncode != 0:
+            raise ScriptError(text)
+        return text
+
+    async def _read_output(self, process: asyncio.subprocess.Process, output: ScriptOutput) -> bool:
+        """增量读取输出并分批发送
+
+        Args:
+            process: 子进程
+            output: 输出分批器
+
+        Returns:
+            bool: 输出超过上限而终止进程时返回 True
+        """
+        while True:
+            try:
+                data = await asyncio.wait_for(
+                    process.stdout.read(READ_SIZE), timeout=output.time_to_flush()
+                )
+            except asyncio.TimeoutError:
+                await output.flush()
+                continue
+
+            if not data:
+                return False
+
+            allowed = self.max_output_bytes - output.total_bytes
+            if len(data) > allowed:
+                output.feed(data[:allowed])
+                self._kill(process)
+                # 读完管道中剩余的数据（丢弃），否则管道不会关闭
+                await process.communicate()
+                return True
+
+            output.feed(data)
+            if output.full:
+                await output.flush(all_pending=False)
+
+    def _environment(self, user_id: str, job) -> dict:
+        """子进程环境变量（不继承应用的密钥等配置）"""
+        env = {name: os.environ[name] for name in INHERITED_ENV if name in os.environ}
+        env["WECOM_USER_ID"] = user_id
+        if job is not None:
+            env["WECOM_JOB_ID"] = job.job_id
+        return env
+
+    def _limit_resources(self, argv: List[str]) -> List[str]:
+        """用 sh 包装进程参数：限制虚拟内存，禁止 core dump（非 POSIX 系统不限制）
+
+        ulimit 设置失败时不执行脚本。
+        """
+        if os.name != "posix":
+            return argv
+        memory = ""
+        if self.memory_limit_mb > 0:
+            memory = f"ulimit -v {self.memory_limit_mb * 1024} && "
+        return [LIMIT_SHELL, "-c", LIMIT_SCRIPT.format(memory=memory), *argv]
+
+    def _kill(self, process: asyncio.subprocess.Process):
+        """终止子进程及其创建的进程"""
+        if process.returncode is not None:
+            return
+        self._killed += 1
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass
+
+    def stats(self) -> dict:
+        """获取执行统计"""
+        return {
+            "running": self._running,
+            "started": self._started,
+            "killed": self._killed,
+            "max_processes": self.max_processes,
+        }
+
+
+def build_script_command(row: DBCommand) -> Command:
+    """根据命令表记录构建脚本命令
+
+    Args:
+        row: 命令表记录
+
+    Returns:
+        Command: 命令对象
+
+    Raises:
+        ScriptError: handler 无效或脚本不可用
+    """
+    script, script_args = parse_handler(row.handler)
+    resolve_script(script, script_executor.script_dir)
+
+    return Command(
+        id=row.command_id,
+        name=row.name or row.command_id,
+        description=row.description or "",
+        category=row.category or "脚本",
+        handler=partial(script_executor.run, script, script_args),
+        admin_only=bool(row.admin_only),
+        enabled=row.enabled is not False,
+        sort_order=row.sort_order or 0,
+        timeout=row.timeout,
+        max_concurrency=row.max_concurrency,
+        background=bool(row.background),
+    )
+
+
+async def load_script_commands() -> int:
+    """从命令表加载脚本命令并注册到命令管理器
+
+    Returns:
+        int: 注册的脚本命令数
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(DBCommand).where(DBCommand.handler.startswith(SCRIPT_HANDLER_PREFIX))
+            )
+            rows = result.scalars().all()
+    except Exception as e:
+        logger.error(f"加载脚本命令失败（请先执行 alembic upgrade head）: {e}")
+        return 0
+
+    loaded = 0
+    for row in rows:
+        try:
+            command_manager.register_command(build_script_command(row))
+            loaded += 1
+        except ScriptError as e:
+            logger.error(f"脚本命令无效，已跳过: {row.command_id}, 错误: {e}")
+
+    if rows:
+        logger.info(f"已加载脚本命令: {loaded}/{len(rows)} 个")
+    return loaded
+
+
+# 全局脚本执行器实例
+script_executor = ScriptExecutor()
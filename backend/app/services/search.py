@@ -0,0 +1,327 @@
+"""消息全文检索
+
+SQLite 下使用 FTS5 外部内容表 messages_fts 索引 messages.content，
+由触发器保持同步。消息内容以中文为主，分词器使用 trigram（按三字切分，
+支持任意子串匹配），因此少于 3 个字符的关键词无法走索引。
+
+以下情况退回 LIKE 查询：
+1. 非 SQLite 数据库
+2. SQLite 不支持 FTS5 trigram（低于 3.34）
+3. 关键词少于 3 个字符
+
+检索结果按 bm25 相关度排序，使用 (rank, id) 游标分页。相关度只在最近
+MESSAGE_SEARCH_RANK_WINDOW 条命中中计算，常见关键词也能在毫秒级返回；
+筛选条件在窗口内生效（窗口是符合筛选条件的最近命中），结果和总数都不超过
+窗口大小。高亮片段只为当前页的消息生成。
+"""
+
+import base64
+import html
+import json
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, and_, literal_column, or_, select, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import MESSAGE_SEARCH_RANK_WINDOW
+from app.models.message import Message
+from app.services.history import apply_message_filters
+
+logger = logging.getLogger(__name__)
+
+# trigram 分词器的最短可检索长度
+MIN_FTS_TERM_LENGTH = 3
+
+# 高亮片段（消息内容经过 HTML 转义，只有高亮标记是 HTML）
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+SNIPPET_TOKENS = 24
+
+# snippet() 使用的临时标记（控制字符），转义内容后替换为高亮标记
+SNIPPET_OPEN = "\x02"
+SNIPPET_CLOSE = "\x03"
+
+# FTS5 表和同步触发器
+MESSAGE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+        content,
+        content='messages',
+        content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+        INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+]
+
+MESSAGE_FTS_DROP_DDL = [
+    "DROP TRIGGER IF EXISTS messages_fts_update",
+    "DROP TRIGGER IF EXISTS messages_fts_delete",
+    "DROP TRIGGER IF EXISTS messages_fts_insert",
+    "DROP TABLE IF EXISTS messages_fts",
+]
+
+
+def create_message_fts(conn: Connection) -> bool:
+    """创建全文索引（仅 SQLite），新建时为已有消息重建索引
+
+    Args:
+        conn: 同步数据库连接
+
+    Returns:
+        bool: 全文索引是否可用
+    """
+    if conn.dialect.name != "sqlite":
+        return False
+
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+    ).first()
+
+    try:
+        for ddl in MESSAGE_FTS_DDL:
+            conn.exec_driver_sql(ddl)
+    except Exception as e:
+        logger.warning(f"SQLite 不支持 FTS5 trigram，消息检索将使用 LIKE: {e}")
+        return False
+
+    if not exists:
+        conn.exec_driver_sql("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+        logger.info("已创建消息全文索引")
+
+    return True
+
+
+def split_terms(q: str) -> List[str]:
+    """拆分检索关键词（空白分隔，全部命中）"""
+    return [term for term in q.split() if term]
+
+
+def fts_match_expression(terms: Sequence[str]) -> str:
+    """生成 FTS5 MATCH 表达式，每个关键词作为短语匹配，避免解析用户输入中的语法"""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _fts_match(terms: Sequence[str]):
+    """MATCH 条件"""
+    return text("messages_fts MATCH :match").bindparams(match=fts_match_expression(terms))
+
+
+def like_pattern(term: str) -> str:
+    """生成 LIKE 匹配模式（转义通配符）"""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def escape_snippet(snippet: str) -> str:
+    """转义 snippet() 生成的片段，并把临时标记替换为高亮标记"""
+    return (
+        html.escape(snippet)
+        .replace(SNIPPET_OPEN, HIGHLIGHT_OPEN)
+        .replace(SNIPPET_CLOSE, HIGHLIGHT_CLOSE)
+    )
+
+
+def make_highlight(content: Optional[str], terms: Sequence[str], width: int = 60) -> Optional[str]:
+    """LIKE 查询结果的高亮片段（第一个命中关键词附近，内容经过 HTML 转义）
+
+    Args:
+        content: 消息内容
+        terms: 关键词
+        width: 片段最大长度
+
+    Returns:
+        str: 高亮片段，未命中返回None
+    """
+    if not content:
+        return None
+
+    lowered = content.lower()
+    hits = [(lowered.find(term.lower()), term) for term in terms]
+    hits = [(pos, term) for pos, term in hits if pos >= 0]
+    if not hits:
+        return None
+
+    pos, term = min(hits)
+    start = max(pos - (width - len(term)) // 2, 0)
+    end = min(start + width, len(content))
+    snippet = (
+        html.escape(content[start:pos])
+        + HIGHLIGHT_OPEN
+        + html.escape(content[pos : pos + len(term)])
+        + HIGHLIGHT_CLOSE
+        + html.escape(content[pos + len(term) : end])
+    )
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(content) else "")
+
+
+def encode_search_cursor(rank: float, message_id: int) -> str:
+    """生成检索结果游标"""
+    raw = json.dumps(["s", rank, message_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    """解析检索结果游标
+
+    Raises:
+        ValueError: 游标格式错误
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        kind, rank, message_id = json.loads(raw)
+        if kind != "s":
+            raise ValueError(kind)
+        return float(rank), int(message_id)
+    except Exception as e:
+        raise ValueError(f"无效的游标: {cursor}") from e
+
+
+class MessageSearch:
+    """消息检索"""
+
+    def __init__(self):
+        self._fts_available: Optional[bool] = None
+
+    async def fts_available(self, db: AsyncSession) -> bool:
+        """全文索引是否可用（首次调用时检查）"""
+        if self._fts_available is None:
+            if db.bind.dialect.name != "sqlite":
+                self._fts_available = False
+            else:
+                exists = await db.scalar(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'")
+                )
+                self._fts_available = exists is not None
+        return self._fts_available
+
+    async def use_fts(self, db: AsyncSession, terms: Sequence[str]) -> bool:
+        """本次检索是否使用全文索引"""
+        return (
+            bool(terms)
+            and all(len(term) >= MIN_FTS_TERM_LENGTH for term in terms)
+            and await self.fts_available(db)
+        )
+
+    @staticmethod
+    def fts_query(
+        terms: Sequence[str],
+        window: int = MESSAGE_SEARCH_RANK_WINDOW,
+        direction: Optional[str] = None,
+        from_user: Optional[str] = None,
+        start_time: Optional[int] = None,
+        end_time: Optional[int] = None,
+    ) -> Tuple[Select, Select]:
+        """全文检索的结果查询和计数查询
+
+        筛选条件在命中窗口内生效，窗口取的是符合条件的最近 N 条命中。
+
+        Args:
+            terms: 关键词
+            window: 只在最近 N 条命中中按相关度排序（0 表示全部命中）
+            direction: 消息方向（in/out/all）
+            from_user: 发送者
+            start_time: 开始时间（时间戳）
+            end_time: 结束时间（时间戳）
+
+        Returns:
+            Tuple[Select, Select]: (结果查询, 计数查询)。
+                结果查询返回 (Message, rank)，rank 为 bm25 值（越小越相关）；
+                计数查询只返回命中的消息ID
+        """
+        hits = (
+            select(
+                literal_column("rowid").label("id"),
+                literal_column("bm25(messages_fts)").label("rank"),
+            )
+            .select_from(table("messages_fts"))
+            .where(_fts_match(terms))
+        )
+
+        # 按主键逐条检查命中的消息是否符合筛选条件，再截取窗口
+        matched = select(Message.id).where(Message.id == literal_column("messages_fts.rowid"))
+        filtered = apply_message_filters(matched, direction, from_user, start_time, end_time)
+        if filtered is not matched:
+            hits = hits.where(filtered.exists())
+
+        if window:
+            # FTS5 按 rowid 倒序直接遍历倒排表，只为窗口内的命中计算 bm25
+            hits = hits.order_by(literal_column("rowid").desc()).limit(window)
+        hits = hits.subquery("hits")
+
+        query = select(Message, hits.c.rank).join(hits, Message.id == hits.c.id)
+        count_query = select(Message.id).join(hits, Message.id == hits.c.id)
+        return query, count_query
+
+    @staticmethod
+    async def highlights(
+        db: AsyncSession, terms: Sequence[str], message_ids: Sequence[int]
+    ) -> Dict[int, str]:
+        """生成指定消息的高亮片段（内容经过 HTML 转义）
+
+        Args:
+            db: 异步数据库会话
+            terms: 关键词
+            message_ids: 消息ID（当前页）
+
+        Returns:
+            Dict[int, str]: 消息ID -> 高亮片段
+        """
+        if not message_ids:
+            return {}
+
+        rowid = literal_column("rowid")
+        query = (
+            select(
+                rowid,
+                literal_column(
+                    f"snippet(messages_fts, 0, char({ord(SNIPPET_OPEN)}), char({ord(SNIPPET_CLOSE)}), '…', {SNIPPET_TOKENS})"
+                ),
+            )
+            .select_from(text("messages_fts"))
+            .where(_fts_match(terms))
+            .where(rowid.in_(list(message_ids)))
+        )
+        result = await db.execute(query)
+        return {row[0]: escape_snippet(row[1]) for row in result.all() if row[1] is not None}
+
+    @staticmethod
+    def like_query(terms: Sequence[str]) -> Select:
+        """LIKE 检索查询（所有关键词都需命中）"""
+        return select(Message).where(
+            and_(*[Message.content.like(like_pattern(term), escape="\\") for term in terms])
+        )
+
+    @staticmethod
+    def after_rank_cursor(query: Select, rank_column, cursor: str) -> Select:
+        """只查询检索游标之后的结果"""
+        rank, message_id = decode_search_cursor(cursor)
+        return query.where(
+            or_(
+                rank_column > rank,
+                and_(rank_column == rank, Message.id > message_id),
+            )
+        )
+
+
+# 全局消息检索实例
+message_search = MessageSearch()
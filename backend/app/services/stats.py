@@ -0,0 +1,288 @@
+"""消息统计汇总
+
+message_stats 表按分钟、小时和天（本地日期）三种粒度记录消息数，维度为
+方向、消息类型、状态和发送者：
+1. 写入消息时在同一事务中增量更新（UPSERT count = count + n），
+   批量写入时每批合并为一次 UPSERT
+2. 统计接口只按时间桶范围读取汇总表，耗时与 messages 表大小无关
+3. 分钟粒度只保留最近 MESSAGE_STATS_MINUTE_RETENTION 小时，小时和天粒度长期
+   保留（消息归档删除热表数据不影响统计）
+
+汇总表首次创建时由 init_db() 从已有消息回填。
+"""
+
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.engine import Connection
+
+from app.core.config import MESSAGE_STATS_MINUTE_RETENTION
+from app.core.database import async_engine
+from app.models.message import Message
+from app.models.stats import MessageStat
+
+logger = logging.getLogger(__name__)
+
+# 粒度 -> 时间桶长度（秒）
+GRANULARITIES = {"minute": 60, "hour": 3600, "day": 86400}
+
+# 统计范围 -> (时间桶数, 读取的粒度)，时间序列每个桶一个点
+STATS_RANGES = {
+    "1h": (60, "minute"),
+    "24h": (24, "hour"),
+    "7d": (7, "day"),
+    "30d": (30, "day"),
+}
+
+# 汇总维度
+STATS_DIMENSIONS = ("direction", "msg_type", "status", "from_user")
+
+# 发送者排行数量
+TOP_USERS = 10
+
+# 分钟粒度清理间隔（秒）
+PRUNE_INTERVAL = 3600
+
+
+def upsert_statement(dialect_name: str):
+    """构建累加计数的 UPSERT 语句
+
+    Args:
+        dialect_name: 数据库方言名称
+
+    Returns:
+        Insert: 插入语句
+    """
+    table = MessageStat.__table__
+    key = ["granularity", "bucket", *STATS_DIMENSIONS]
+
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+
+        statement = dialect_insert(table)
+        return statement.on_duplicate_key_update(count=table.c.count + statement.inserted.count)
+
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+    statement = dialect_insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=key, set_={"count": table.c.count + statement.excluded.count}
+    )
+
+
+def _local_offset() -> int:
+    """本地时区相对 UTC 的偏移（秒）"""
+    return int(datetime.now().astimezone().utcoffset().total_seconds())
+
+
+def bucket_of(timestamp: int, size: int, offset: int = 0) -> int:
+    """时间戳所在时间桶的起点，天粒度按本地日期对齐
+
+    Args:
+        timestamp: 时间戳
+        size: 时间桶长度（秒）
+        offset: 本地时区偏移（秒）
+
+    Returns:
+        int: 时间桶起点
+    """
+    shift = offset if size >= 86400 else 0
+    return timestamp - (timestamp + shift) % size
+
+
+def rollup_rows(rows: Iterable[dict]) -> List[dict]:
+    """把消息记录合并为汇总表的增量
+
+    Args:
+        rows: messages 表的列值
+
+    Returns:
+        List[dict]: message_stats 表的增量行
+    """
+    counts: Counter = Counter()
+    offset = _local_offset()
+    for row in rows:
+        create_time = row.get("create_time") or int(time.time())
+        dimensions = tuple(row.get(name) or "" for name in STATS_DIMENSIONS)
+        for granularity, size in GRANULARITIES.items():
+            counts[(granularity, bucket_of(create_time, size, offset), *dimensions)] += 1
+
+    return [
+        {
+            "granularity": granularity,
+            "bucket": bucket,
+            **dict(zip(STATS_DIMENSIONS, dimensions)),
+            "count": count,
+        }
+        for (granularity, bucket, *dimensions), count in counts.items()
+    ]
+
+
+def backfill_message_stats(conn: Connection) -> int:
+    """汇总表为空时从已有消息回填（一次 GROUP BY）
+
+    分钟粒度只回填保留期内的消息。
+
+    Args:
+        conn: 同步数据库连接
+
+    Returns:
+        int: 回填的汇总行数
+    """
+    if conn.execute(select(MessageStat.id).limit(1)).first() is not None:
+        return 0
+    if conn.execute(select(Message.id).limit(1)).first() is None:
+        return 0
+
+    minute_since = int(time.time()) - MESSAGE_STATS_MINUTE_RETENTION * 3600
+    total = 0
+    offset = _local_offset()
+    for granularity, size in GRANULARITIES.items():
+        shift = offset if size >= 86400 else 0
+        bucket = (Message.create_time - (Message.create_time + shift) % size).label("bucket")
+        dimensions = [func.coalesce(getattr(Message, name), "").label(name) for name in STATS_DIMENSIONS]
+        query = select(literal(granularity), bucket, *dimensions, func.count()).where(
+            Message.create_time.is_not(None)
+        )
+        if granularity == "minute":
+            query = query.where(Message.create_time >= minute_since)
+        query = query.group_by(bucket, *dimensions)
+
+        result = conn.execute(
+            insert(MessageStat).from_select(
+                ["granularity", "bucket", *STATS_DIMENSIONS, "count"], query
+            )
+        )
+        total += result.rowcount or 0
+
+    logger.info(f"已从消息记录回填统计汇总: {total} 行")
+    return total
+
+
+class MessageStats:
+    """消息统计"""
+
+    def __init__(self):
+        self._statement = None
+        self._last_prune = 0.0
+
+    async def apply(self, conn, rows: List[dict]):
+        """在调用方的事务中累加一批消息的统计
+
+        Args:
+            conn: 异步数据库连接或会话（与消息写入同一事务）
+            rows: messages 表的列值
+        """
+        deltas = rollup_rows(rows)
+        if not deltas:
+            return
+
+        if self._statement is None:
+            self._statement = upsert_statement(async_engine.dialect.name)
+        await conn.execute(self._statement, deltas)
+
+        # 定期清理过期的分钟粒度
+        now = time.time()
+        if now - self._last_prune > PRUNE_INTERVAL:
+            self._last_prune = now
+            await conn.execute(
+                delete(MessageStat).where(
+                    MessageStat.granularity == "minute",
+                    MessageStat.bucket < int(now) - MESSAGE_STATS_MINUTE_RETENTION * 3600,
+                )
+            )
+
+    async def today(self, db) -> Dict[str, int]:
+        """今日（本地日期）按方向的消息数，读取一个天粒度时间桶
+
+        Args:
+            db: 异步数据库会话
+
+        Returns:
+            Dict[str, int]: 方向 -> 消息数
+        """
+        bucket = bucket_of(int(time.time()), GRANULARITIES["day"], _local_offset())
+        result = await db.execute(
+            select(MessageStat.direction, func.sum(MessageStat.count))
+            .where(MessageStat.granularity == "day", MessageStat.bucket == bucket)
+            .group_by(MessageStat.direction)
+        )
+        return {direction: int(count) for direction, count in result.all()}
+
+    async def query(self, db, range_name: str, now: Optional[int] = None) -> dict:
+        """统计指定时间范围的消息
+
+        Args:
+            db: 异步数据库会话
+            range_name: 统计范围（1h/24h/7d/30d）
+            now: 统计截止时间（默认当前时间）
+
+        Returns:
+            dict: 总数、按方向/类型/状态的分布、发送者排行和时间序列
+
+        Raises:
+            ValueError: 不支持的统计范围
+        """
+        if range_name not in STATS_RANGES:
+            raise ValueError(f"不支持的统计范围: {range_name}")
+
+        buckets, granularity = STATS_RANGES[range_name]
+        size = GRANULARITIES[granularity]
+        # 最后一个桶包含当前时间
+        end = bucket_of(now or int(time.time()), size, _local_offset()) + size
+        start = end - buckets * size
+
+        scope = (
+            MessageStat.granularity == granularity,
+            MessageStat.bucket >= start,
+            MessageStat.bucket < end,
+        )
+
+        async def breakdown(column, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+            total = func.sum(MessageStat.count)
+            query = select(column, total).where(*scope).group_by(column).order_by(total.desc())
+            if limit:
+                query = query.where(column != "").limit(limit)
+            return [(row[0], int(row[1])) for row in (await db.execute(query)).all()]
+
+        # 时间序列：每个时间桶一个点，没有消息的桶补 0
+        series = {
+            bucket: {"time": bucket, "in": 0, "out": 0} for bucket in range(start, end, size)
+        }
+        per_bucket = await db.execute(
+            select(MessageStat.bucket, MessageStat.direction, func.sum(MessageStat.count))
+            .where(*scope, MessageStat.direction.in_(["in", "out"]))
+            .group_by(MessageStat.bucket, MessageStat.direction)
+        )
+        for bucket, direction, count in per_bucket.all():
+            point = series.get(bucket)
+            if point is not None:
+                point[direction] += int(count)
+
+        by_direction = dict(await breakdown(MessageStat.direction))
+        return {
+            "range": range_name,
+            "granularity": granularity,
+            "start": start,
+            "end": end,
+            "total": sum(by_direction.values()),
+            "by_direction": by_direction,
+            "by_msg_type": dict(await breakdown(MessageStat.msg_type)),
+            "by_status": dict(await breakdown(MessageStat.status)),
+            "top_users": [
+                {"user": user, "count": count}
+                for user, count in await breakdown(MessageStat.from_user, TOP_USERS)
+            ],
+            "series": list(series.values()),
+        }
+
+
+# 全局消息统计实例
+message_stats = MessageStats()
@@ -8,15 +8,13 @@
 
 import json
 import logging
-import threading
-from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 import httpx
 
-logger = logging.getLogger(__name__)
+from app.services.wechat.http import http_pool
+from app.services.wechat.token import AccessTokenCache, get_token_cache
 
-# 线程锁，用于保护 access_token 的并发访问
-_lock = threading.Lock()
+logger = logging.getLogger(__name__)
 
 
 class WeChatClientException(Exception):
@@ -46,10 +44,8 @@ class WeChatClient:
         self.agent_id = agent_id
         self.proxy = proxy
 
-        # Access Token 缓存
-        self._access_token: Optional[str] = None
-        self._expires_in: int = 7200
-        self._access_token_time: Optional[datetime] = None
+        # Access Token 缓存（同一应用的所有客户端共享，并持久化到数据库）
+        self._token_cache = get_token_cache(corp_id, app_secret)
 
         # API URLs
         self._token_url = f"{proxy}/cgi-bin/gettoken"
@@ -57,11 +53,22 @@ class WeChatClient:
         self._create_menu_url = f"{proxy}/cgi-bin/menu/create"
         self._delete_menu_url = f"{proxy}/cgi-bin/menu/delete"
 
-    async def get_access_token(self, force_refresh: bool = False) -> str:
+    @property
+    def token_cache(self) -> AccessTokenCache:
+        """当前应用共享的 access_token 缓存"""
+        return self._token_cache
+
+    async def get_access_token(
+        self, force_refresh: bool = False, expired_token: Optional[str] = None
+    ) -> str:
         """获取访问令牌（带缓存）
 
+        并发调用在刷新期间共享同一次请求，缓存命中时不加锁。
+
         Args:
             force_refresh: 是否强制刷新
+            expired_token: 已确认过期的 token（42001），若缓存已被其他协程
+                刷新为新 token 则直接返回
 
         Returns:
             str: Access Token
@@ -69,34 +76,38 @@ class WeChatClient:
         Raises:
             WeChatClientException: 获取失败时
         """
-        with _lock:
-            # 检查缓存是否有效
-            if not force_refresh and self._access_token and self._access_token_time:
-                elapsed = (datetime.now() - self._access_token_time).total_seconds()
-                if elapsed < self._expires_in - 60:  # 提前60秒刷新
-                    return self._access_token
-
-            # 获取新的 token
-            params = {"corpid": self.corp_id, "corpsecret": self.app_secret}
-
-            async with httpx.AsyncClient() as client:
-                try:
-                    response = await client.get(self._token_url, params=params, timeout=10.0)
-                    response.raise_for_status()
-                    data = response.json()
-
-                    if data.get("errcode") == 0:
-                        self._access_token = data.get("access_token")
-                        self._expires_in = data.get("expires_in", 7200)
-                        self._access_token_time = datetime.now()
-                        logger.info("成功获取企业微信 access_token")
-                        return self._access_token
-                    else:
-                        raise WeChatClientException(
-                            f"获取access_token失败: {data.get('errmsg')}"
-                        )
-                except httpx.HTTPError as e:
-                    raise WeChatClientException(f"请求失败: {e}")
+        return await self._token_cache.get(
+            self._fetch_access_token,
+            force_refresh=force_refresh,
+            stale_token=expired_token,
+        )
+
+    async def _fetch_access_token(self) -> Tuple[str, int]:
+        """请求企业微信获取新的 access_token
+
+        Returns:
+            Tuple[str, int]: (access_token, 有效期秒数)
+
+        Raises:
+            WeChatClientException: 获取失败时
+        """
+        params = {"corpid": self.corp_id, "corpsecret": self.app_secret}
+
+        client = http_pool.get_client()
+        try:
+            response = await client.get(self._token_url, params=params)
+            response.raise_for_status()
+            data = response.json()
+
+            if data.get("errcode") == 0:
+                logger.info("成功获取企业微信 access_token")
+                return data.get("access_token"), data.get("expires_in", 7200)
+            else:
+                raise WeChatClientException(
+                    f"获取access_token失败: {data.get('errmsg')}"
+                )
+        except httpx.HTTPError as e:
+            raise WeChatClientException(f"请求失败: {e}")
 
     async def send_text_message(
         self, content: str, to_user: str = "@all"
@@ -179,26 +190,25 @@ class WeChatClient:
 
         params = {"access_token": access_token, "agentid": self.agent_id}
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self._create_menu_url,
-                    params=params,
-                    json=menu_data,
-                    timeout=10.0,
+        client = http_pool.get_client()
+        try:
+            response = await client.post(
+                self._create_menu_url,
+                params=params,
+                json=menu_data,
+            )
+            response.raise_for_status()
+            data = response.json()
+
+            if data.get("errcode") == 0:
+                logger.info("成功创建企业微信菜单")
+                return {"success": True}
+            else:
+                raise WeChatClientException(
+                    f"创建菜单失败: {data.get('errmsg')}"
                 )
-                response.raise_for_status()
-                data = response.json()
-
-                if data.get("errcode") == 0:
-                    logger.info("成功创建企业微信菜单")
-                    return {"success": True}
-                else:
-                    raise WeChatClientException(
-                        f"创建菜单失败: {data.get('errmsg')}"
-                    )
-            except httpx.HTTPError as e:
-                raise WeChatClientException(f"请求失败: {e}")
+        except httpx.HTTPError as e:
+            raise WeChatClientException(f"请求失败: {e}")
 
     async def delete_menu(self) -> dict:
         """删除应用菜单
@@ -213,26 +223,24 @@ class WeChatClient:
 
         params = {"access_token": access_token, "agentid": self.agent_id}
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    self._delete_menu_url, params=params, timeout=10.0
+        client = http_pool.get_client()
+        try:
+            response = await client.get(self._delete_menu_url, params=params)
+            response.raise_for_status()
+            data = response.json()
+
+            if data.get("errcode") == 0:
+                logger.info("成功删除企业微信菜单")
+                return {"success": True}
+            else:
+                raise WeChatClientException(
+                    f"删除菜单失败: {data.get('errmsg')}"
                 )
-                response.raise_for_status()
-                data = response.json()
-
-                if data.get("errcode") == 0:
-                    logger.info("成功删除企业微信菜单")
-                    return {"success": True}
-                else:
-                    raise WeChatClientException(
-                        f"删除菜单失败: {data.get('errmsg')}"
-                    )
-            except httpx.HTTPError as e:
-                raise WeChatClientException(f"请求失败: {e}")
+        except httpx.HTTPError as e:
+            raise WeChatClientException(f"请求失败: {e}")
 
     async def _post_request(
-        self, url: str, data: dict, access_token: str
+        self, url: str, data: dict, access_token: str, retry: bool = True
     ) -> dict:
         """发送POST请求
 
@@ -240,6 +248,7 @@ class WeChatClient:
             url: 请求URL
             data: 请求数据
             access_token: 访问令牌
+            retry: token 过期（42001）时是否刷新后重试
 
         Returns:
             dict: 响应数据
@@ -249,28 +258,25 @@ class WeChatClient:
         """
         params = {"access_token": access_token}
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    url,
-                    params=params,
-                    json=data,
-                    timeout=10.0,
+        client = http_pool.get_client()
+        try:
+            response = await client.post(url, params=params, json=data)
+            response.raise_for_status()
+            result = response.json()
+
+            if result.get("errcode") == 0:
+                return {"success": True, **result}
+            elif result.get("errcode") == 42001 and retry:
+                # Token过期，刷新后重试（与并发的刷新合并为一次请求）
+                logger.warning("access_token已过期，尝试刷新")
+                new_token = await self.get_access_token(
+                    force_refresh=True, expired_token=access_token
                 )
-                response.raise_for_status()
-                result = response.json()
-
-                if result.get("errcode") == 0:
-                    return {"success": True, **result}
-                elif result.get("errcode") == 42001:
-                    # Token过期，刷新后重试
-                    logger.warning("access_token已过期，尝试刷新")
-                    new_token = await self.get_access_token(force_refresh=True)
-                    return await self._post_request(url, data, new_token)
-                else:
-                    return {"success": False, **result}
-            except httpx.HTTPError as e:
-                raise WeChatClientException(f"请求失败: {e}")
+                return await self._post_request(url, data, new_token, retry=False)
+            else:
+                return {"success": False, **result}
+        except httpx.HTTPError as e:
+            raise WeChatClientException(f"请求失败: {e}")
 
     @staticmethod
     def _split_content(content: str, max_bytes: int = 2048) -> List[str]:
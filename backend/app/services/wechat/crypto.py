@@ -14,10 +14,13 @@ import socket
 import struct
 import time
 import xml.etree.ElementTree as ET
-from typing import Tuple
+from functools import lru_cache
+from typing import Optional, Tuple, Union
 
 from Crypto.Cipher import AES
 
+from app.services.wechat.scanner import extract_encrypt
+
 logger = logging.getLogger(__name__)
 
 # 错误码定义
@@ -85,6 +88,11 @@ class XMLParse:
         Returns:
             Tuple[int, str]: (错误码, 加密消息)
         """
+        # 固定格式的信封直接截取，其他情况退回 ElementTree
+        encrypt_text = extract_encrypt(xmltext)
+        if encrypt_text is not None:
+            return WXBizMsgCrypt_OK, encrypt_text
+
         try:
             xml_tree = ET.fromstring(xmltext)
             encrypt = xml_tree.find("Encrypt")
@@ -156,7 +164,9 @@ class Prpcrypt:
 
     def __init__(self, key: bytes):
         self.key = key
+        self.iv = key[:16]
         self.mode = AES.MODE_CBC
+        self._pkcs7 = PKCS7Encoder()
 
     def encrypt(self, text: str, receiveid: str) -> Tuple[int, bytes]:
         """对明文进行加密
@@ -177,10 +187,9 @@ class Prpcrypt:
                 + receiveid.encode()
             )
 
-            pkcs7 = PKCS7Encoder()
-            text = pkcs7.encode(text)
+            text = self._pkcs7.encode(text)
 
-            cryptor = AES.new(self.key, self.mode, self.key[:16])
+            cryptor = AES.new(self.key, self.mode, self.iv)
             ciphertext = cryptor.encrypt(text)
             return WXBizMsgCrypt_OK, base64.b64encode(ciphertext)
         except Exception as e:
@@ -197,24 +206,43 @@ class Prpcrypt:
         Returns:
             Tuple[int, bytes]: (错误码, 解密后的明文)
         """
+        ret, xml_content = self.decrypt_bytes(text, receiveid.encode("utf8"))
+        if ret != WXBizMsgCrypt_OK:
+            return ret, None
+        return ret, bytes(xml_content)
+
+    def decrypt_bytes(
+        self, text: Union[str, bytes], receiveid: bytes
+    ) -> Tuple[int, Optional[memoryview]]:
+        """对密文进行解密（低分配版本）
+
+        明文全程以 memoryview 切片，不做 str/bytes 往返转换。
+
+        Args:
+            text: 密文（base64）
+            receiveid: 接收者ID（bytes）
+
+        Returns:
+            Tuple[int, memoryview]: (错误码, 解密后的明文视图)
+        """
         try:
-            cryptor = AES.new(self.key, self.mode, self.key[:16])
-            plain_text = cryptor.decrypt(base64.b64decode(text))
+            cryptor = AES.new(self.key, self.mode, self.iv)
+            plain_text = memoryview(cryptor.decrypt(base64.b64decode(text)))
         except Exception as e:
             logger.error(f"解密失败: {e}")
             return WXBizMsgCrypt_DecryptAES_Error, None
 
         try:
             pad = plain_text[-1]
-            content = plain_text[16:-pad]
-            xml_len = socket.ntohl(struct.unpack("I", content[:4])[0])
+            content = plain_text[16 : len(plain_text) - pad]
+            xml_len = int.from_bytes(content[:4], "big")
             xml_content = content[4 : xml_len + 4]
             from_receiveid = content[xml_len + 4 :]
         except Exception as e:
             logger.error(f"解析解密内容失败: {e}")
             return WXBizMsgCrypt_IllegalBuffer, None
 
-        if from_receiveid.decode("utf8") != receiveid:
+        if from_receiveid != receiveid:
             return WXBizMsgCrypt_ValidateCorpid_Error, None
 
         return WXBizMsgCrypt_OK, xml_content
@@ -257,6 +285,11 @@ class WeChatCrypto:
         self.token = token
         self.corp_id = corp_id
 
+        # 密钥派生只做一次，辅助对象在多次调用间复用
+        self._corp_id_bytes = corp_id.encode("utf8")
+        self._prpcrypt = Prpcrypt(self.key)
+        self._xml_parse = XMLParse()
+
     def verify_url(
         self, msg_signature: str, timestamp: str, nonce: str, echo_str: str
     ) -> str:
@@ -274,25 +307,23 @@ class WeChatCrypto:
         Raises:
             WeChatCryptoException: 验证失败时
         """
-        sha1 = SHA1()
-        ret, signature = sha1.get_sha1(self.token, timestamp, nonce, echo_str)
+        ret, signature = SHA1.get_sha1(self.token, timestamp, nonce, echo_str)
         if ret != WXBizMsgCrypt_OK:
             raise WeChatCryptoException("计算签名失败")
 
         if signature != msg_signature:
             raise WeChatCryptoException("签名验证失败")
 
-        pc = Prpcrypt(self.key)
-        ret, reply_echo_str = pc.decrypt(echo_str, self.corp_id)
+        ret, reply_echo_str = self._prpcrypt.decrypt_bytes(echo_str, self._corp_id_bytes)
         if ret != WXBizMsgCrypt_OK:
             raise WeChatCryptoException(f"解密失败，错误码: {ret}")
 
-        return reply_echo_str.decode("utf8")
+        return str(reply_echo_str, "utf8")
 
-    def decrypt_message(
+    def verify_message(
         self, msg_signature: str, timestamp: str, nonce: str, encrypt_msg: str
     ) -> str:
-        """解密消息
+        """校验消息签名（不解密）
 
         Args:
             msg_signature: 消息签名
@@ -301,30 +332,70 @@ class WeChatCrypto:
             encrypt_msg: 加密的消息（XML格式）
 
         Returns:
-            str: 解密后的消息（XML格式）
+            str: 提取出的密文
 
         Raises:
-            WeChatCryptoException: 解密失败时
+            WeChatCryptoException: 提取密文或签名校验失败时
         """
-        xml_parse = XMLParse()
-        ret, encrypt = xml_parse.extract(encrypt_msg)
+        ret, encrypt = self._xml_parse.extract(encrypt_msg)
         if ret != WXBizMsgCrypt_OK:
             raise WeChatCryptoException("提取加密消息失败")
 
-        sha1 = SHA1()
-        ret, signature = sha1.get_sha1(self.token, timestamp, nonce, encrypt)
+        ret, signature = SHA1.get_sha1(self.token, timestamp, nonce, encrypt)
         if ret != WXBizMsgCrypt_OK:
             raise WeChatCryptoException("计算签名失败")
 
         if signature != msg_signature:
             raise WeChatCryptoException("签名验证失败")
 
-        pc = Prpcrypt(self.key)
-        ret, xml_content = pc.decrypt(encrypt, self.corp_id)
+        return encrypt
+
+    def decrypt_message(
+        self, msg_signature: str, timestamp: str, nonce: str, encrypt_msg: str
+    ) -> str:
+        """解密消息
+
+        Args:
+            msg_signature: 消息签名
+            timestamp: 时间戳
+            nonce: 随机数
+            encrypt_msg: 加密的消息（XML格式）
+
+        Returns:
+            str: 解密后的消息（XML格式）
+
+        Raises:
+            WeChatCryptoException: 解密失败时
+        """
+        return str(
+            self.decrypt_message_bytes(msg_signature, timestamp, nonce, encrypt_msg),
+            "utf8",
+        )
+
+    def decrypt_message_bytes(
+        self, msg_signature: str, timestamp: str, nonce: str, encrypt_msg: str
+    ) -> memoryview:
+        """解密消息，返回明文视图（不做解码和拷贝）
+
+        Args:
+            msg_signature: 消息签名
+            timestamp: 时间戳
+            nonce: 随机数
+            encrypt_msg: 加密的消息（XML格式）
+
+        Returns:
+            memoryview: 解密后的消息（UTF-8 编码的 XML）
+
+        Raises:
+            WeChatCryptoException: 解密失败时
+        """
+        encrypt = self.verify_message(msg_signature, timestamp, nonce, encrypt_msg)
+
+        ret, xml_content = self._prpcrypt.decrypt_bytes(encrypt, self._corp_id_bytes)
         if ret != WXBizMsgCrypt_OK:
             raise WeChatCryptoException(f"解密失败，错误码: {ret}")
 
-        return xml_content.decode("utf8")
+        return xml_content
 
     def encrypt_message(
         self, reply_msg: str, nonce: str, timestamp: str = None
@@ -342,8 +413,7 @@ class WeChatCrypto:
         Raises:
             WeChatCryptoException: 加密失败时
         """
-        pc = Prpcrypt(self.key)
-        ret, encrypt = pc.encrypt(reply_msg, self.corp_id)
+        ret, encrypt = self._prpcrypt.encrypt(reply_msg, self.corp_id)
         if ret != WXBizMsgCrypt_OK:
             raise WeChatCryptoException("加密失败")
 
@@ -352,10 +422,28 @@ class WeChatCrypto:
         if timestamp is None:
             timestamp = str(int(time.time()))
 
-        sha1 = SHA1()
-        ret, signature = sha1.get_sha1(self.token, timestamp, nonce, encrypt)
+        ret, signature = SHA1.get_sha1(self.token, timestamp, nonce, encrypt)
         if ret != WXBizMsgCrypt_OK:
             raise WeChatCryptoException("计算签名失败")
 
-        xml_parse = XMLParse()
-        return xml_parse.generate(encrypt, signature, timestamp, nonce), signature
+        return self._xml_parse.generate(encrypt, signature, timestamp, nonce), signature
+
+
+@lru_cache(maxsize=16)
+def get_crypto(token: str, encoding_aes_key: str, corp_id: str) -> WeChatCrypto:
+    """获取缓存的加解密器
+
+    同一组 (token, encoding_aes_key, corp_id) 只初始化一次。
+
+    Args:
+        token: 回调Token
+        encoding_aes_key: 回调加密Key
+        corp_id: 企业ID
+
+    Returns:
+        WeChatCrypto: 加解密器
+
+    Raises:
+        WeChatCryptoException: 当EncodingAESKey无效时（不缓存）
+    """
+    return WeChatCrypto(token=token, encoding_aes_key=encoding_aes_key, corp_id=corp_id)
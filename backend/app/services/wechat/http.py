@@ -0,0 +1,95 @@
+"""企业微信 HTTP 连接池
+
+所有 WeChatClient 实例共享同一个 httpx.AsyncClient，复用到
+qyapi.weixin.qq.com 的 keep-alive 连接，避免每次请求重复 DNS/TCP/TLS 握手。
+连接池由 main.lifespan 负责打开和关闭。
+"""
+
+import importlib.util
+import logging
+from typing import Optional
+
+import httpx
+
+from app.core.config import (
+    WECHAT_HTTP2,
+    WECHAT_HTTP_MAX_CONNECTIONS,
+    WECHAT_HTTP_MAX_KEEPALIVE,
+    WECHAT_HTTP_KEEPALIVE_EXPIRY,
+    WECHAT_HTTP_TIMEOUT,
+    WECHAT_HTTP_CONNECT_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class WeChatHttpPool:
+    """进程级 HTTP 连接池"""
+
+    def __init__(
+        self,
+        http2: bool = WECHAT_HTTP2,
+        max_connections: int = WECHAT_HTTP_MAX_CONNECTIONS,
+        max_keepalive: int = WECHAT_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry: float = WECHAT_HTTP_KEEPALIVE_EXPIRY,
+        timeout: float = WECHAT_HTTP_TIMEOUT,
+        connect_timeout: float = WECHAT_HTTP_CONNECT_TIMEOUT,
+    ):
+        """初始化连接池配置
+
+        Args:
+            http2: 是否启用 HTTP/2
+            max_connections: 最大连接数
+            max_keepalive: 最大保活连接数
+            keepalive_expiry: 保活连接空闲过期时间（秒）
+            timeout: 请求超时时间（秒）
+            connect_timeout: 建立连接超时时间（秒）
+        """
+        # HTTP/2 依赖 h2 包，未安装时退回 HTTP/1.1
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def open(self):
+        """打开连接池（幂等）"""
+        if self._client is not None and not self._client.is_closed:
+            return
+
+        self.get_client()
+        logger.info(
+            f"企业微信连接池已创建: http2={self.http2}, "
+            f"max_connections={self.limits.max_connections}, "
+            f"max_keepalive={self.limits.max_keepalive_connections}"
+        )
+
+    async def close(self):
+        """关闭连接池，释放所有连接"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("企业微信连接池已关闭")
+
+    def get_client(self) -> httpx.AsyncClient:
+        """获取共享的 HTTP 客户端
+
+        未经 lifespan 打开时（如脚本中直接使用）会按需创建。
+
+        Returns:
+            httpx.AsyncClient: 共享客户端
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout,
+            )
+        return self._client
+
+
+# 全局连接池实例
+http_pool = WeChatHttpPool()
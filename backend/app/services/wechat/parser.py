@@ -8,10 +8,13 @@
 
 import logging
 import xml.etree.ElementTree as ET
-from typing import Optional
+from dataclasses import dataclass, fields as dataclass_fields
+from typing import Dict, Optional
 from enum import Enum
 from pydantic import BaseModel, Field
 
+from app.services.wechat.scanner import scan_fields
+
 logger = logging.getLogger(__name__)
 
 
@@ -61,6 +64,87 @@ class ParsedMessage(BaseModel):
     pic_url: Optional[str] = Field(None, description="图片链接")
     media_id: Optional[str] = Field(None, description="媒体ID")
 
+    # 语音消息字段
+    format: Optional[str] = Field(None, description="语音格式")
+    recognition: Optional[str] = Field(None, description="语音识别结果")
+
+    # 视频消息字段
+    thumb_media_id: Optional[str] = Field(None, description="视频缩略图媒体ID")
+
+    # 位置消息字段
+    location_x: Optional[float] = Field(None, description="纬度")
+    location_y: Optional[float] = Field(None, description="经度")
+    scale: Optional[int] = Field(None, description="地图缩放大小")
+    label: Optional[str] = Field(None, description="地理位置信息")
+
+
+@dataclass(slots=True)
+class IncomingMessage:
+    """回调热路径使用的内部消息对象
+
+    字段与 ParsedMessage 一致，但不做 pydantic 校验；
+    需要在 API 边界输出时再通过 to_model() 转换。
+    """
+
+    msg_type: MessageType
+    from_user: str
+    to_user: str
+    create_time: int
+    msg_id: Optional[str] = None
+    agent_id: Optional[str] = None
+
+    # 文本消息字段
+    content: Optional[str] = None
+
+    # 事件消息字段
+    event: Optional[EventType] = None
+    event_key: Optional[str] = None
+
+    # 图片/语音/视频消息字段
+    pic_url: Optional[str] = None
+    media_id: Optional[str] = None
+    format: Optional[str] = None
+    recognition: Optional[str] = None
+    thumb_media_id: Optional[str] = None
+
+    # 位置消息字段
+    location_x: Optional[float] = None
+    location_y: Optional[float] = None
+    scale: Optional[int] = None
+    label: Optional[str] = None
+
+    def to_model(self) -> ParsedMessage:
+        """转换为 pydantic 消息对象
+
+        Returns:
+            ParsedMessage: 解析后的消息对象
+        """
+        return ParsedMessage(
+            **{field.name: getattr(self, field.name) for field in dataclass_fields(self)}
+        )
+
+    def summary(self) -> str:
+        """消息记录中保存的内容摘要
+
+        Returns:
+            str: 文本内容、事件KEY或媒体消息的描述
+        """
+        msg_type = self.msg_type
+        if msg_type == MessageType.TEXT:
+            return self.content or ""
+        if msg_type == MessageType.EVENT:
+            return self.event_key or ""
+        if msg_type == MessageType.IMAGE:
+            return f"[图片] {self.pic_url or self.media_id or ''}"
+        if msg_type == MessageType.VOICE:
+            # 开启语音识别时保存识别结果
+            return self.recognition or f"[语音] {self.media_id or ''}"
+        if msg_type == MessageType.VIDEO:
+            return f"[视频] {self.media_id or ''}"
+        if msg_type == MessageType.LOCATION:
+            return f"[位置] {self.label or ''} ({self.location_x}, {self.location_y})"
+        return ""
+
 
 class MessageParser:
     """企业微信消息解析器
@@ -70,20 +154,20 @@ class MessageParser:
     """
 
     @staticmethod
-    def parse(xml_data: str) -> Optional[ParsedMessage]:
+    def parse(xml_data: str) -> Optional[IncomingMessage]:
         """解析企业微信消息
 
         解析流程：
-        1. XML转字典
+        1. XML转字典（扁平结构走快速扫描，其他情况退回 ElementTree）
         2. 提取基础字段（MsgType, FromUserName, CreateTime等）
         3. 根据类型提取特定字段
-        4. 返回结构化消息对象
+        4. 返回内部消息对象（不做 pydantic 校验）
 
         Args:
             xml_data: XML格式的消息数据
 
         Returns:
-            ParsedMessage: 解析后的消息对象，解析失败返回None
+            IncomingMessage: 解析后的消息对象，解析失败返回None
 
         消息格式示例：
         1. 文本消息：
@@ -110,7 +194,7 @@ class MessageParser:
         """
         try:
             # 解析XML
-            root = ET.fromstring(xml_data)
+            root = MessageParser._to_dict(xml_data)
 
             # 提取基础字段
             msg_type_str = MessageParser._get_text(root, "MsgType")
@@ -131,40 +215,59 @@ class MessageParser:
                 return None
 
             # 构建基础消息对象
-            message_data = {
-                "msg_type": msg_type,
-                "from_user": from_user,
-                "to_user": to_user or "",
-                "create_time": int(create_time_str),
-                "msg_id": MessageParser._get_text(root, "MsgId"),
-                "agent_id": MessageParser._get_text(root, "AgentID"),
-            }
+            get_text = MessageParser._get_text
+            message = IncomingMessage(
+                msg_type=msg_type,
+                from_user=from_user,
+                to_user=to_user or "",
+                create_time=int(create_time_str),
+                msg_id=get_text(root, "MsgId"),
+                agent_id=get_text(root, "AgentID"),
+            )
 
             # 根据消息类型提取特定字段
             if msg_type == MessageType.TEXT:
                 # 文本消息
-                message_data["content"] = MessageParser._get_text(root, "Content")
+                message.content = get_text(root, "Content")
 
             elif msg_type == MessageType.EVENT:
                 # 事件消息
-                event_str = MessageParser._get_text(root, "Event")
+                event_str = get_text(root, "Event")
                 if event_str:
                     try:
-                        message_data["event"] = EventType(event_str)
-                        message_data["event_key"] = MessageParser._get_text(
-                            root, "EventKey"
-                        )
+                        message.event = EventType(event_str)
+                        message.event_key = get_text(root, "EventKey")
                     except ValueError:
                         logger.warning(f"不支持的事件类型: {event_str}")
                         return None
 
             elif msg_type == MessageType.IMAGE:
                 # 图片消息
-                message_data["pic_url"] = MessageParser._get_text(root, "PicUrl")
-                message_data["media_id"] = MessageParser._get_text(root, "MediaId")
-
-            # 创建消息对象
-            return ParsedMessage(**message_data)
+                message.pic_url = get_text(root, "PicUrl")
+                message.media_id = get_text(root, "MediaId")
+
+            elif msg_type == MessageType.VOICE:
+                # 语音消息
+                message.media_id = get_text(root, "MediaId")
+                message.format = get_text(root, "Format")
+                message.recognition = get_text(root, "Recognition")
+
+            elif msg_type == MessageType.VIDEO:
+                # 视频消息
+                message.media_id = get_text(root, "MediaId")
+                message.thumb_media_id = get_text(root, "ThumbMediaId")
+
+            elif msg_type == MessageType.LOCATION:
+                # 位置消息
+                location_x = get_text(root, "Location_X")
+                location_y = get_text(root, "Location_Y")
+                scale = get_text(root, "Scale")
+                message.location_x = float(location_x) if location_x else None
+                message.location_y = float(location_y) if location_y else None
+                message.scale = int(scale) if scale else None
+                message.label = get_text(root, "Label")
+
+            return message
 
         except ET.ParseError as e:
             logger.error(f"XML解析失败: {e}")
@@ -174,19 +277,39 @@ class MessageParser:
             return None
 
     @staticmethod
-    def _get_text(element: ET.Element, tag: str) -> Optional[str]:
-        """获取XML元素的文本内容
+    def _to_dict(xml_data: str) -> Dict[str, Optional[str]]:
+        """XML转字典（仅一级子元素）
+
+        Args:
+            xml_data: XML格式的消息数据
+
+        Returns:
+            Dict[str, Optional[str]]: {标签: 原始文本}
+        """
+        fields = scan_fields(xml_data)
+        if fields is not None:
+            return fields
+
+        root = ET.fromstring(xml_data)
+        fields = {}
+        for child in root:
+            fields.setdefault(child.tag, child.text)
+        return fields
+
+    @staticmethod
+    def _get_text(fields: Dict[str, Optional[str]], tag: str) -> Optional[str]:
+        """获取字段的文本内容
 
         Args:
-            element: XML元素
+            fields: XML转换后的字典
             tag: 标签名
 
         Returns:
             str: 文本内容，不存在返回None
         """
-        child = element.find(tag)
-        if child is not None and child.text:
-            return child.text.strip()
+        text = fields.get(tag)
+        if text:
+            return text.strip()
         return None
 
     @staticmethod
@@ -195,7 +318,7 @@ class MessageParser:
 
         Args:
             user_id: 用户ID
-            admin_users: 管理员列表
+            admin_users: 管理员列表（或集合）
 
         Returns:
             bool: 是否为管理员
@@ -0,0 +1,193 @@
+"""access_token 后台刷新任务
+
+在 token 过期前（带随机抖动）主动刷新已配置应用的 access_token，
+使请求路径上始终命中缓存。刷新失败时保留旧 token 并按指数退避重试。
+由 main.lifespan 负责启动和停止。
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import (
+    WECHAT_TOKEN_REFRESH_AHEAD,
+    WECHAT_TOKEN_REFRESH_JITTER,
+    WECHAT_TOKEN_REFRESH_INTERVAL,
+    WECHAT_TOKEN_REFRESH_RETRY,
+)
+from app.core.database import AsyncSessionLocal
+from app.services.config import config_store
+from app.services.wechat.client import WeChatClient
+
+logger = logging.getLogger(__name__)
+
+# 退避重试的最大间隔（秒）
+MAX_RETRY_INTERVAL = 300
+
+
+class TokenRefresher:
+    """access_token 后台刷新器"""
+
+    def __init__(
+        self,
+        refresh_ahead: int = WECHAT_TOKEN_REFRESH_AHEAD,
+        jitter: int = WECHAT_TOKEN_REFRESH_JITTER,
+        check_interval: int = WECHAT_TOKEN_REFRESH_INTERVAL,
+        retry_interval: int = WECHAT_TOKEN_REFRESH_RETRY,
+    ):
+        """初始化刷新器
+
+        Args:
+            refresh_ahead: 过期前多少秒开始刷新
+            jitter: 刷新时间随机抖动范围（秒）
+            check_interval: 检查配置和 token 状态的最大间隔（秒）
+            retry_interval: 刷新失败后的重试间隔（秒）
+        """
+        self.refresh_ahead = refresh_ahead
+        self.jitter = jitter
+        self.check_interval = check_interval
+        self.retry_interval = retry_interval
+
+        self._task: Optional[asyncio.Task] = None
+        # 每个应用的计划刷新时间: cache_key -> (对应的过期时间, 计划刷新时间)
+        self._schedule: Dict[str, Tuple[float, float]] = {}
+        # 每个应用的连续失败次数
+        self._failures: Dict[str, int] = {}
+        # 每个应用的刷新统计
+        self._stats: Dict[str, dict] = {}
+
+    def start(self):
+        """启动后台任务"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                f"access_token 后台刷新已启动: 提前 {self.refresh_ahead}s, "
+                f"抖动 {self.jitter}s"
+            )
+
+    async def stop(self):
+        """停止后台任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("access_token 后台刷新已停止")
+
+    def stats(self) -> Dict[str, dict]:
+        """获取刷新统计
+
+        Returns:
+            Dict[str, dict]: 按 corp_id 汇总的刷新次数、失败次数和最近一次耗时
+        """
+        return {key: dict(value) for key, value in self._stats.items()}
+
+    async def _run(self):
+        """后台循环"""
+        while True:
+            try:
+                next_wakeup = await self.refresh_due()
+            except Exception as e:
+                logger.error(f"access_token 后台刷新异常: {e}")
+                next_wakeup = time.time() + self.retry_interval
+
+            delay = min(max(next_wakeup - time.time(), 1), self.check_interval)
+            await asyncio.sleep(delay)
+
+    async def refresh_due(self) -> float:
+        """刷新所有已到期的应用 token
+
+        Returns:
+            float: 下一次需要唤醒的时间戳
+        """
+        now = time.time()
+        next_wakeup = now + self.check_interval
+
+        clients = await self._load_clients()
+        for client in clients:
+            cache = client.token_cache
+            due_at = self._due_at(cache.key, cache.expires_at)
+
+            if now >= due_at:
+                due_at = await self._refresh(client.corp_id, client)
+
+            next_wakeup = min(next_wakeup, due_at)
+
+        return next_wakeup
+
+    def _due_at(self, key: str, expires_at: float) -> float:
+        """计算计划刷新时间
+
+        每个 token 只抽取一次抖动，保证刷新时间稳定。
+        """
+        scheduled = self._schedule.get(key)
+        if scheduled and scheduled[0] == expires_at:
+            return scheduled[1]
+
+        due_at = expires_at - self.refresh_ahead - random.uniform(0, self.jitter)
+        self._schedule[key] = (expires_at, due_at)
+        return due_at
+
+    async def _refresh(self, corp_id: str, client: WeChatClient) -> float:
+        """刷新单个应用的 token
+
+        Args:
+            corp_id: 企业ID
+            client: 企业微信客户端
+
+        Returns:
+            float: 下一次计划刷新时间
+        """
+        cache = client.token_cache
+        stats = self._stats.setdefault(
+            corp_id,
+            {"refreshes": 0, "failures": 0, "last_latency_ms": None, "last_error": None},
+        )
+
+        started = time.perf_counter()
+        try:
+            await cache.refresh(client._fetch_access_token)
+        except Exception as e:
+            failures = self._failures.get(cache.key, 0) + 1
+            self._failures[cache.key] = failures
+            # 请求异常的描述可能包含带 corpsecret 的 URL，统计会在 /health 中公开
+            error = str(e).replace(client.app_secret, "***") if client.app_secret else str(e)
+            stats["failures"] += 1
+            stats["last_error"] = error
+
+            retry_in = min(self.retry_interval * 2 ** (failures - 1), MAX_RETRY_INTERVAL)
+            logger.warning(
+                f"后台刷新 access_token 失败（第 {failures} 次），"
+                f"{retry_in}s 后重试，继续使用旧 token: {error}"
+            )
+            return time.time() + retry_in
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        self._failures.pop(cache.key, None)
+        stats["refreshes"] += 1
+        stats["last_latency_ms"] = round(latency_ms, 1)
+        stats["last_error"] = None
+        stats["expires_at"] = int(cache.expires_at)
+
+        logger.info(f"后台刷新 access_token 成功: corp_id={corp_id}, 耗时 {latency_ms:.1f}ms")
+        return self._due_at(cache.key, cache.expires_at)
+
+    @staticmethod
+    async def _load_clients() -> List[WeChatClient]:
+        """读取已配置应用的客户端
+
+        Returns:
+            List[WeChatClient]: 客户端列表
+        """
+        async with AsyncSessionLocal() as db:
+            snapshot = await config_store.get_snapshot(db)
+
+        return [snapshot.client] if snapshot.complete else []
+
+
+# 全局刷新器实例
+token_refresher = TokenRefresher()
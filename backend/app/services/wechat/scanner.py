@@ -0,0 +1,102 @@
+"""企业微信 XML 快速扫描
+
+企业微信的回调信封和解密后的消息体都是固定的扁平结构：
+
+    <xml><Tag><![CDATA[value]]></Tag><Tag>value</Tag>...</xml>
+
+这里用字符串查找直接取值，不构建 ElementTree。遇到任何非常规结构
+（XML 声明、属性、嵌套元素、实体转义、注释等）返回 None，由调用方
+退回 ElementTree 完整解析。
+"""
+
+from typing import Dict, Optional
+
+_CDATA_OPEN = "<![CDATA["
+_CDATA_CLOSE = "]]>"
+_ENCRYPT_OPEN = "<Encrypt><![CDATA["
+_ENCRYPT_CLOSE = "]]></Encrypt>"
+
+
+def extract_encrypt(xmltext: str) -> Optional[str]:
+    """从回调信封中提取 Encrypt 密文
+
+    Args:
+        xmltext: 回调请求体
+
+    Returns:
+        str: 密文，结构不符合预期时返回None
+    """
+    start = xmltext.find(_ENCRYPT_OPEN)
+    if start < 0:
+        return None
+    start += len(_ENCRYPT_OPEN)
+
+    end = xmltext.find(_ENCRYPT_CLOSE, start)
+    if end < 0:
+        return None
+
+    return xmltext[start:end]
+
+
+def scan_fields(xml_data: str) -> Optional[Dict[str, str]]:
+    """扫描扁平 XML 的一级子元素
+
+    Args:
+        xml_data: XML 字符串
+
+    Returns:
+        Dict[str, str]: {标签: 原始文本}，重复标签保留第一个；
+            结构不符合预期时返回None
+    """
+    text = xml_data.strip()
+    if not (text.startswith("<xml>") and text.endswith("</xml>")):
+        return None
+
+    # 热路径：局部绑定方法，避免逐字段的属性查找和函数调用
+    find = text.find
+    startswith = text.startswith
+    end = len(text) - 6
+    pos = 5
+    fields: Dict[str, str] = {}
+
+    while True:
+        while pos < end and text[pos] in " \t\r\n":
+            pos += 1
+        if pos >= end:
+            return fields if pos == end else None
+        if text[pos] != "<":
+            return None
+
+        # 开始标签：只接受不带属性的简单标签（如 Location_X）
+        tag_end = find(">", pos + 1)
+        if tag_end < 0:
+            return None
+        tag = text[pos + 1 : tag_end]
+        if not tag.isidentifier():
+            return None
+        pos = tag_end + 1
+
+        if startswith(_CDATA_OPEN, pos):
+            value_start = pos + len(_CDATA_OPEN)
+            value_end = find(_CDATA_CLOSE, value_start)
+            if value_end < 0:
+                return None
+            value = text[value_start:value_end]
+            pos = value_end + len(_CDATA_CLOSE)
+        else:
+            value_end = find("<", pos)
+            if value_end < 0:
+                return None
+            value = text[pos:value_end]
+            # 实体转义交给 ElementTree 处理
+            if "&" in value:
+                return None
+            pos = value_end
+
+        close_tag = "</" + tag + ">"
+        if not startswith(close_tag, pos):
+            return None
+        pos += len(close_tag)
+
+        if tag not in fields:
+            fields[tag] = value
@@ -0,0 +1,280 @@
+"""企业微信 access_token 缓存
+
+基于 asyncio 的单飞（single-flight）刷新：
+- 缓存命中时不加锁，直接返回
+- 刷新期间的并发调用方共享同一个进行中的刷新任务
+- 42001（token 过期）重试与普通刷新合并为同一次请求
+
+缓存按 (corp_id, app_secret 哈希) 在进程内共享，并持久化到数据库
+access_tokens 表，供其他 worker 以及重启后复用。
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.database import SessionLocal
+from app.models.token import AccessToken
+
+logger = logging.getLogger(__name__)
+
+# 获取 token 的回调，返回 (access_token, expires_in)
+TokenFetcher = Callable[[], Awaitable[Tuple[str, int]]]
+
+
+def token_cache_key(corp_id: str, app_secret: str) -> str:
+    """生成 token 缓存键
+
+    Secret 只以哈希形式出现在缓存键中。
+
+    Args:
+        corp_id: 企业ID
+        app_secret: 应用Secret
+
+    Returns:
+        str: 缓存键
+    """
+    secret_hash = hashlib.sha256(app_secret.encode("utf-8")).hexdigest()[:32]
+    return f"{corp_id}:{secret_hash}"
+
+
+class TokenStore:
+    """access_token 持久化存储（数据库 access_tokens 表）"""
+
+    def load(self, key: str) -> Optional[Tuple[str, float]]:
+        """读取 token
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Tuple[str, float]: (access_token, 过期时间戳)，不存在返回None
+        """
+        db = SessionLocal()
+        try:
+            row = db.query(AccessToken).filter(AccessToken.cache_key == key).first()
+            if row:
+                return row.access_token, float(row.expires_at)
+            return None
+        finally:
+            db.close()
+
+    def save(self, key: str, token: str, expires_at: float):
+        """写入 token
+
+        Args:
+            key: 缓存键
+            token: access_token
+            expires_at: 过期时间戳
+        """
+        db = SessionLocal()
+        try:
+            row = db.query(AccessToken).filter(AccessToken.cache_key == key).first()
+            if row:
+                row.access_token = token
+                row.expires_at = int(expires_at)
+            else:
+                db.add(
+                    AccessToken(
+                        cache_key=key, access_token=token, expires_at=int(expires_at)
+                    )
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+class AccessTokenCache:
+    """access_token 缓存"""
+
+    def __init__(
+        self,
+        key: Optional[str] = None,
+        store: Optional[TokenStore] = None,
+        refresh_ahead: int = 60,
+    ):
+        """初始化缓存
+
+        Args:
+            key: 缓存键，用于持久化存储
+            store: 持久化存储，为None时仅缓存在内存
+            refresh_ahead: 提前刷新的秒数
+        """
+        self.key = key
+        self.store = store
+        self.refresh_ahead = refresh_ahead
+
+        self._token: Optional[str] = None
+        self._expires_at: float = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+
+    @property
+    def token(self) -> Optional[str]:
+        """当前缓存的 token（可能已过期）"""
+        return self._token
+
+    @property
+    def expires_at(self) -> float:
+        """当前 token 的过期时间（时间戳）"""
+        return self._expires_at
+
+    def is_fresh(self) -> bool:
+        """缓存的 token 是否仍在有效期内（已扣除提前刷新时间）"""
+        return self._is_fresh(self._token, self._expires_at)
+
+    def _is_fresh(self, token: Optional[str], expires_at: float) -> bool:
+        return token is not None and time.time() < expires_at - self.refresh_ahead
+
+    def set(self, token: str, expires_in: int):
+        """写入新的 token
+
+        Args:
+            token: access_token
+            expires_in: 有效期（秒）
+        """
+        self._token = token
+        self._expires_at = time.time() + expires_in
+
+    async def get(
+        self,
+        fetcher: TokenFetcher,
+        force_refresh: bool = False,
+        stale_token: Optional[str] = None,
+    ) -> str:
+        """获取 token，必要时刷新
+
+        Args:
+            fetcher: 获取新 token 的回调
+            force_refresh: 是否强制刷新
+            stale_token: 调用方确认已失效的 token。若缓存中已经是另一个
+                有效 token（其他协程或 worker 刚刷新过），直接返回而不再刷新
+
+        Returns:
+            str: access_token
+        """
+        if self.is_fresh():
+            if not force_refresh:
+                return self._token
+            if stale_token is not None and self._token != stale_token:
+                return self._token
+
+        if stale_token is None and force_refresh:
+            stale_token = self._token
+
+        try:
+            return await self._refresh(fetcher, stale_token)
+        except Exception as e:
+            # 刷新失败时，若旧 token 尚未真正过期则继续使用
+            if (
+                self._token is not None
+                and self._token != stale_token
+                and time.time() < self._expires_at
+            ):
+                logger.warning(f"刷新 access_token 失败，继续使用未过期的旧 token: {e}")
+                return self._token
+            raise
+
+    async def refresh(self, fetcher: TokenFetcher) -> str:
+        """主动刷新 token（供后台刷新任务使用）
+
+        与请求路径上的刷新共享同一个进行中的任务，失败时抛出异常，
+        缓存中的旧 token 保持不变。
+
+        Args:
+            fetcher: 获取新 token 的回调
+
+        Returns:
+            str: 新的 access_token
+        """
+        return await self._refresh(fetcher, self._token)
+
+    async def _refresh(self, fetcher: TokenFetcher, stale_token: Optional[str]) -> str:
+        """刷新 token，并发调用共享同一个刷新任务
+
+        Args:
+            fetcher: 获取新 token 的回调
+            stale_token: 已失效的 token
+
+        Returns:
+            str: 新的 access_token
+        """
+        task = self._inflight
+        if task is None or task.done():
+            task = asyncio.ensure_future(self._run(fetcher, stale_token))
+            # 所有等待方都被取消时，避免 "exception was never retrieved" 警告
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight = task
+
+        # shield: 单个调用方被取消时不影响其他等待方
+        return await asyncio.shield(task)
+
+    async def _run(self, fetcher: TokenFetcher, stale_token: Optional[str]) -> str:
+        """执行一次刷新
+
+        先查看持久化存储中是否已有其他 worker 刷新的有效 token，
+        没有时才请求企业微信。
+        """
+        try:
+            if self.store is not None and self.key:
+                stored = await self._load_from_store()
+                if stored and stored[0] != stale_token and self._is_fresh(*stored):
+                    self._token, self._expires_at = stored
+                    logger.debug(f"复用已持久化的 access_token: {self.key}")
+                    return self._token
+
+            token, expires_in = await fetcher()
+            self.set(token, expires_in)
+
+            if self.store is not None and self.key:
+                await self._save_to_store()
+
+            return token
+        finally:
+            self._inflight = None
+
+    async def _load_from_store(self) -> Optional[Tuple[str, float]]:
+        """从持久化存储读取（失败时忽略）"""
+        try:
+            return await asyncio.to_thread(self.store.load, self.key)
+        except Exception as e:
+            logger.warning(f"读取持久化 access_token 失败: {e}")
+            return None
+
+    async def _save_to_store(self):
+        """写入持久化存储（失败时忽略）"""
+        try:
+            await asyncio.to_thread(
+                self.store.save, self.key, self._token, self._expires_at
+            )
+        except Exception as e:
+            logger.warning(f"保存 access_token 失败: {e}")
+
+
+# 进程内共享的缓存，按缓存键索引
+_token_caches: Dict[str, AccessTokenCache] = {}
+
+# 全局持久化存储实例
+token_store = TokenStore()
+
+
+def get_token_cache(corp_id: str, app_secret: str) -> AccessTokenCache:
+    """获取（必要时创建）进程内共享的 token 缓存
+
+    Args:
+        corp_id: 企业ID
+        app_secret: 应用Secret
+
+    Returns:
+        AccessTokenCache: token 缓存
+    """
+    key = token_cache_key(corp_id, app_secret)
+    cache = _token_caches.get(key)
+    if cache is None:
+        cache = AccessTokenCache(key=key, store=token_store)
+        _token_caches[key] = cache
+    return cache
@@ -0,0 +1,163 @@
+"""后台 worker 池
+
+回调接口在异步模式下只做签名校验和入队，解密、解析、落库、命令执行和
+回复发送都由有界的 asyncio worker 池完成，保证在企业微信 5 秒超时内应答。
+由 main.lifespan 负责启动，关闭时等待队列排空。
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from app.core.config import (
+    CALLBACK_WORKERS,
+    CALLBACK_QUEUE_SIZE,
+    CALLBACK_DRAIN_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+# 队列中的任务: (协程函数, 参数, 入队时间)
+_Job = Tuple[Callable[..., Awaitable[Any]], tuple, float]
+
+
+class WorkerPool:
+    """有界 asyncio worker 池"""
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int = CALLBACK_WORKERS,
+        max_queue: int = CALLBACK_QUEUE_SIZE,
+        drain_timeout: float = CALLBACK_DRAIN_TIMEOUT,
+    ):
+        """初始化 worker 池
+
+        Args:
+            name: 名称（用于日志）
+            concurrency: worker 数量
+            max_queue: 队列最大长度
+            drain_timeout: 关闭时等待队列清空的最长时间（秒）
+        """
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.drain_timeout = drain_timeout
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._accepting = False
+
+        # 统计
+        self._processed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._in_flight = 0
+        self._max_depth = 0
+        self._last_wait_ms: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        """是否正在接收任务"""
+        return self._accepting
+
+    def start(self):
+        """启动 worker"""
+        if self._accepting:
+            return
+
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ]
+        self._accepting = True
+        logger.info(
+            f"{self.name} worker 池已启动: 并发 {self.concurrency}, 队列上限 {self.max_queue}"
+        )
+
+    async def stop(self):
+        """停止接收新任务，等待队列排空后停止 worker"""
+        if not self._accepting:
+            return
+
+        self._accepting = False
+        pending = self._queue.qsize() + self._in_flight
+        if pending:
+            logger.info(f"{self.name} worker 池正在排空 {pending} 个任务...")
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"{self.name} worker 池排空超时，丢弃 {self._queue.qsize()} 个未处理任务"
+            )
+
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info(f"{self.name} worker 池已停止")
+
+    def submit(self, func: Callable[..., Awaitable[Any]], *args) -> bool:
+        """提交任务
+
+        Args:
+            func: 协程函数
+            *args: 参数
+
+        Returns:
+            bool: 是否入队成功（未启动或队列已满时返回False）
+        """
+        if not self._accepting:
+            return False
+
+        try:
+            self._queue.put_nowait((func, args, time.monotonic()))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            return False
+
+        self._max_depth = max(self._max_depth, self._queue.qsize())
+        return True
+
+    def stats(self) -> dict:
+        """获取队列统计
+
+        Returns:
+            dict: 队列深度、处理数、失败数等
+        """
+        return {
+            "running": self._accepting,
+            "workers": len(self._workers),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_max": self.max_queue,
+            "max_depth": self._max_depth,
+            "in_flight": self._in_flight,
+            "processed": self._processed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "last_wait_ms": self._last_wait_ms,
+        }
+
+    async def _worker(self):
+        """worker 循环"""
+        while True:
+            func, args, enqueued_at = await self._queue.get()
+            self._in_flight += 1
+            self._last_wait_ms = round((time.monotonic() - enqueued_at) * 1000, 1)
+            try:
+                await func(*args)
+                self._processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failed += 1
+                logger.error(f"{self.name} 任务处理失败: {e}")
+            finally:
+                self._in_flight -= 1
+                self._queue.task_done()
+
+
+# 企业微信回调消息处理池
+callback_pool = WorkerPool("回调消息")
@@ -0,0 +1,312 @@
+"""消息记录批量写入（write-behind）
+
+回调和发送路径只把消息记录放进内存缓冲，由后台任务按数量或时间触发
+批量 INSERT，每批一次提交（SQLite 下即一次 fsync）。msg_id 冲突的行
+直接跳过（INSERT ... ON CONFLICT DO NOTHING），统计汇总只计入实际插入的行。
+
+缓冲有上限：达到上限时写入方同步等待落库；数据库持续不可用时丢弃新记录
+并计数，内存占用不会无限增长。由 main.lifespan 负责启动，关闭时写完剩余记录。
+
+批量写入失败时：连接类错误（数据库不可用、锁超时）整批放回缓冲等待重试；
+其他错误（如字段超长）改为逐条写入，写不进去的记录丢弃并计数，不会阻塞
+后续记录。
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.core.config import (
+    MESSAGE_FLUSH_SIZE,
+    MESSAGE_FLUSH_INTERVAL,
+    MESSAGE_BUFFER_MAX,
+)
+from app.core.database import async_engine
+from app.models.message import Message
+from app.services.stats import message_stats
+
+logger = logging.getLogger(__name__)
+
+
+def insert_ignore_statement(dialect_name: str):
+    """构建忽略 msg_id 冲突的批量插入语句
+
+    Args:
+        dialect_name: 数据库方言名称
+
+    Returns:
+        Insert: 插入语句
+    """
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect_name == "mysql":
+        return insert(Message).prefix_with("IGNORE")
+    else:
+        return insert(Message)
+
+    return dialect_insert(Message).on_conflict_do_nothing(index_elements=["msg_id"])
+
+
+def first_rows(rows: List[Dict[str, Any]], msg_ids: Set[str]) -> List[Dict[str, Any]]:
+    """按 msg_id 选出记录（同一 msg_id 只取第一条）
+
+    Args:
+        rows: 消息记录
+        msg_ids: 要保留的 msg_id
+
+    Returns:
+        List[Dict[str, Any]]: 保留的记录
+    """
+    selected = []
+    for row in rows:
+        if row["msg_id"] in msg_ids:
+            selected.append(row)
+            msg_ids.discard(row["msg_id"])
+    return selected
+
+
+def is_transient_error(error: Exception) -> bool:
+    """是否为与具体记录无关、稍后重试可能成功的错误（连接断开、锁超时等）"""
+    return isinstance(
+        error, (OperationalError, InterfaceError, PoolTimeoutError, OSError, asyncio.TimeoutError)
+    )
+
+
+class MessageWriteBuffer:
+    """消息记录写缓冲"""
+
+    def __init__(
+        self,
+        flush_size: int = MESSAGE_FLUSH_SIZE,
+        flush_interval: float = MESSAGE_FLUSH_INTERVAL,
+        max_size: int = MESSAGE_BUFFER_MAX,
+    ):
+        """初始化写缓冲
+
+        Args:
+            flush_size: 缓冲达到多少条时立即写入
+            flush_interval: 最长写入间隔（秒）
+            max_size: 缓冲上限
+        """
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_size = max(max_size, flush_size)
+
+        self._pending: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._statement = None
+        # 插入语句是否支持 RETURNING（SQLite/PostgreSQL），用于得知实际插入的行
+        self._returning = False
+
+        # 统计
+        self._written = 0
+        self._batches = 0
+        self._failures = 0
+        self._dropped = 0
+        self._rejected = 0
+        self._last_flush_ms: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        """是否正在接收记录"""
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """启动后台写入任务"""
+        if self.running:
+            return
+
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._statement = insert_ignore_statement(async_engine.dialect.name)
+        self._returning = async_engine.dialect.name in ("sqlite", "postgresql")
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"消息记录批量写入已启动: 每批 {self.flush_size} 条, "
+            f"间隔 {self.flush_interval}s, 缓冲上限 {self.max_size}"
+        )
+
+    async def stop(self):
+        """停止后台任务，并写完剩余记录"""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        while self._pending:
+            pending = len(self._pending)
+            await self.flush()
+            if len(self._pending) >= pending:
+                logger.error(f"关闭时写入消息记录失败，丢弃 {len(self._pending)} 条")
+                self._dropped += len(self._pending)
+                self._pending = []
+                break
+
+        logger.info("消息记录批量写入已停止")
+
+    async def add(self, row: Dict[str, Any]):
+        """加入一条消息记录
+
+        缓冲已满时先等待落库（背压）；仍然写不进去则丢弃并计数。
+
+        Args:
+            row: messages 表的列值
+        """
+        if len(self._pending) >= self.max_size:
+            await self.flush()
+            if len(self._pending) >= self.max_size:
+                self._dropped += 1
+                logger.error(f"消息记录缓冲已满，丢弃: {row.get('msg_id')}")
+                return
+
+        self._pending.append(row)
+        if len(self._pending) >= self.flush_size:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """立即写入缓冲中的全部记录
+
+        Returns:
+            int: 本次实际插入的条数（不含 msg_id 冲突和写入失败的记录）
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, []
+            started = time.perf_counter()
+            try:
+                inserted = await self._write(batch)
+            except Exception as e:
+                self._failures += 1
+                logger.error(f"批量写入消息记录失败（{len(batch)} 条）: {e}")
+                if is_transient_error(e):
+                    self._requeue(batch)
+                    return 0
+                # 逐条写入，找出写不进去的记录
+                inserted = await self._write_each(batch)
+
+            self._written += len(inserted)
+            self._batches += 1
+            self._last_flush_ms = round((time.perf_counter() - started) * 1000, 1)
+            logger.debug(f"批量写入消息记录: {len(inserted)} 条, 耗时 {self._last_flush_ms}ms")
+            return len(inserted)
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """在一个事务中写入记录和统计汇总
+
+        Args:
+            batch: 消息记录
+
+        Returns:
+            List[Dict[str, Any]]: 实际插入的记录
+        """
+        async with async_engine.begin() as conn:
+            inserted = await self._insert(conn, batch)
+            # 统计汇总与消息记录同一事务
+            await message_stats.apply(conn, inserted)
+        return inserted
+
+    async def _write_each(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """逐条写入（批量写入出现与连接无关的错误后）
+
+        写入失败的记录丢弃并计数；遇到连接类错误时剩余记录放回缓冲。
+
+        Args:
+            batch: 消息记录
+
+        Returns:
+            List[Dict[str, Any]]: 实际插入的记录
+        """
+        inserted: List[Dict[str, Any]] = []
+        for index, row in enumerate(batch):
+            try:
+                inserted.extend(await self._write([row]))
+            except Exception as e:
+                if is_transient_error(e):
+                    self._requeue(batch[index:])
+                    break
+                self._rejected += 1
+                logger.error(f"消息记录无法写入，已丢弃: {row.get('msg_id')}: {e}")
+        return inserted
+
+    def _requeue(self, rows: List[Dict[str, Any]]):
+        """放回缓冲等待下次重试，超出上限的部分丢弃"""
+        room = self.max_size - len(self._pending)
+        kept = rows[:max(room, 0)]
+        self._pending[:0] = kept
+        self._dropped += len(rows) - len(kept)
+
+    async def _insert(self, conn, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """插入一批记录
+
+        Args:
+            conn: 异步数据库连接
+            batch: 消息记录
+
+        Returns:
+            List[Dict[str, Any]]: 实际插入的记录（不含 msg_id 冲突的行）
+        """
+        if self._returning:
+            result = await conn.execute(self._statement.returning(Message.msg_id), batch)
+            return first_rows(batch, {row[0] for row in result})
+
+        # 不支持 RETURNING 时先在同一事务中排除已存在的 msg_id
+        msg_ids = {row["msg_id"] for row in batch}
+        existing = await conn.execute(select(Message.msg_id).where(Message.msg_id.in_(msg_ids)))
+        rows = first_rows(batch, msg_ids - set(existing.scalars()))
+        if rows:
+            await conn.execute(self._statement, rows)
+        return rows
+
+    def stats(self) -> dict:
+        """获取写入统计
+
+        Returns:
+            dict: 缓冲条数、已写入条数、批次数、失败次数、丢弃和无法写入的条数
+        """
+        return {
+            "running": self.running,
+            "pending": len(self._pending),
+            "written": self._written,
+            "batches": self._batches,
+            "failures": self._failures,
+            "dropped": self._dropped,
+            "rejected": self._rejected,
+            "last_flush_ms": self._last_flush_ms,
+        }
+
+    async def _run(self):
+        """后台循环：数量或时间任一条件满足即写入"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                # 关闭时取消本任务不会打断进行中的写入
+                await asyncio.shield(self.flush())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"消息记录批量写入异常: {e}")
+
+
+# 全局消息记录写缓冲
+message_writer = MessageWriteBuffer()
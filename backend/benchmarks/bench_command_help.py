@@ -0,0 +1,66 @@
+"""帮助文本与菜单缓存基准
+
+注册 N 个命令（分布在多个分类、部分为管理员命令），测量 /help 帮助文本
+和菜单数据在缓存命中、以及每次变更后重新生成时的耗时。
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_command_help.py [命令数]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.command import Command, CommandManager  # noqa: E402
+
+
+def handler(user_id: str, **kwargs) -> str:
+    return user_id
+
+
+def timed(label: str, run, rounds: int):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        run()
+    elapsed = (time.perf_counter() - started) / rounds * 1e6
+    print(f"  {label:<32}{elapsed:>10.1f} us")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    manager = CommandManager()
+    for i in range(count):
+        manager.register_command(
+            Command(
+                id=f"cmd{i}",
+                name=f"命令{i}",
+                description=f"测试命令 {i}",
+                category=f"分类{i % 8}",
+                handler=handler,
+                admin_only=i % 5 == 0,
+                sort_order=count - i,
+            )
+        )
+    print(f"命令 {count} 个")
+
+    def rebuild_help():
+        manager.update_command("cmd0", sort_order=0)
+        manager.render_help(False)
+
+    def rebuild_menu():
+        manager.update_command("cmd0", sort_order=0)
+        manager.generate_menu_data()
+
+    print("帮助文本:")
+    timed("缓存命中（普通用户）", lambda: manager.render_help(False), 100000)
+    timed("缓存命中（管理员）", lambda: manager.render_help(True), 100000)
+    timed("变更后重新生成", rebuild_help, 500)
+    print("菜单数据:")
+    timed("缓存命中", manager.generate_menu_data, 100000)
+    timed("变更后重新生成", rebuild_menu, 500)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""命令路由基准
+
+注册 N 个命令（每个带别名和中文名称），测量路由表编译耗时、命中时的
+解析耗时，以及未命中时删除变体索引与对全部命令键计算编辑距离的建议耗时。
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_command_router.py [命令数]
+"""
+
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.command import Command  # noqa: E402
+from app.services.command_router import CommandRouter, edit_distance  # noqa: E402
+
+
+def handler(user_id: str, **kwargs) -> str:
+    return user_id
+
+
+def make_commands(count: int):
+    """生成测试命令"""
+    rng = random.Random(0)
+    commands = []
+    for i in range(count):
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+        commands.append(
+            Command(
+                id=f"{word}{i}",
+                name=f"命令{i}",
+                description="",
+                category="测试",
+                handler=handler,
+                aliases=[f"{word} run{i}"],
+            )
+        )
+    return commands
+
+
+def timed(label: str, run, rounds: int):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        run()
+    elapsed = (time.perf_counter() - started) / rounds * 1e6
+    print(f"  {label:<32}{elapsed:>10.1f} us")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    commands = make_commands(count)
+
+    started = time.perf_counter()
+    router = CommandRouter(commands)
+    print(f"命令 {count} 个, 编译耗时 {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    keys = {}
+    for command in commands:
+        for key in (command.id, *command.aliases, command.name):
+            keys[key.lower()] = command.id
+
+    target = commands[count // 2]
+    hit = f"{target.id} a b"
+    typo = target.id[:2] + target.id[3] + target.id[2] + target.id[4:]
+
+    def linear_suggest():
+        min(keys, key=lambda key: edit_distance(typo, key))
+
+    print("命中:")
+    timed("路由表", lambda: router.resolve(hit), 20000)
+    print(f"未命中建议（/{typo}）:")
+    timed("删除变体索引", lambda: router.resolve(typo), 2000)
+    timed("全部计算编辑距离", linear_suggest, 20)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""消息导出基准
+
+在临时 SQLite 数据库中写入消息，分别导出不同行数的 NDJSON / CSV（含 gzip），
+输出耗时、吞吐和 Python 内存峰值（tracemalloc，另外导出一次统计），
+用于确认内存占用不随导出行数增长。
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_export.py [最大条数]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = tempfile.mkdtemp(prefix="wecom-export-")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DIR}/export.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import async_engine, engine, init_db, read_async_engine  # noqa: E402
+from app.models.message import Message  # noqa: E402
+from app.services.export import build_export_query, stream_export  # noqa: E402
+
+
+def seed(count: int):
+    """写入测试数据"""
+    batch = 10000
+    with engine.begin() as conn:
+        for offset in range(0, count, batch):
+            conn.execute(
+                Message.__table__.insert(),
+                [
+                    {
+                        "msg_id": f"m{i}",
+                        "msg_type": "text",
+                        "from_user": f"user{i % 200}",
+                        "to_user": "corp",
+                        "content": f"服务器磁盘告警: /data 使用率 {i % 100}%, 主机 web-{i % 50:02d}",
+                        "create_time": 1_700_000_000 + i,
+                        "direction": "in" if i % 2 else "out",
+                        "status": "received",
+                    }
+                    for i in range(offset, min(offset + batch, count))
+                ],
+            )
+
+
+async def consume(query, fmt: str, compress: bool) -> int:
+    """读取完整导出流，返回字节数"""
+    size = 0
+    async for chunk in stream_export(query, fmt, compress):
+        size += len(chunk)
+    return size
+
+
+async def run(fmt: str, compress: bool, end_time: int):
+    """导出两次：第一次计时，第二次开启 tracemalloc 统计内存峰值
+
+    Returns:
+        (字节数, 耗时, 内存峰值)
+    """
+    query = build_export_query(end_time=end_time)
+    started = time.perf_counter()
+    size = await consume(query, fmt, compress)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    await consume(query, fmt, compress)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    init_db()
+    seed(count)
+
+    for rows in (count // 10, count):
+        end_time = 1_700_000_000 + rows - 1
+        print(f"导出 {rows} 条:")
+        for fmt, compress in (("ndjson", False), ("csv", False), ("ndjson", True)):
+            size, elapsed, peak = await run(fmt, compress, end_time)
+            label = fmt + (" + gzip" if compress else "")
+            print(
+                f"  {label:<14}{size / 1024 / 1024:>8.1f} MB{elapsed:>8.2f}s"
+                f"{rows / elapsed:>10.0f} 条/s  内存峰值 {peak / 1024 / 1024:.1f} MB"
+            )
+
+    await async_engine.dispose()
+    if read_async_engine is not async_engine:
+        await read_async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
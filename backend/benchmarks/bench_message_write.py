@@ -0,0 +1,102 @@
+"""消息记录写入基准：逐条提交 vs 批量写入
+
+在临时 SQLite 数据库上分别用两种方式写入 N 条消息记录，输出每秒写入条数：
+1. 逐条提交：db.add + commit（原 _save_message 的做法，每条一次 fsync）
+2. 批量写入：MessageWriteBuffer（按数量/时间批量 INSERT ... ON CONFLICT DO NOTHING）
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_message_write.py [条数]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = tempfile.mkdtemp(prefix="wecom-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DIR}/bench.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, func, select  # noqa: E402
+
+from app.core.database import AsyncSessionLocal, async_engine, init_db  # noqa: E402
+from app.models.message import Message  # noqa: E402
+from app.services.writer import MessageWriteBuffer  # noqa: E402
+
+
+def make_rows(count: int, prefix: str):
+    """生成消息记录"""
+    now = int(time.time())
+    return [
+        {
+            "msg_id": f"{prefix}_{i}",
+            "msg_type": "text",
+            "from_user": f"user{i % 50}",
+            "to_user": "corp",
+            "content": f"/status {i}",
+            "create_time": now + i,
+            "direction": "in",
+            "status": "received",
+        }
+        for i in range(count)
+    ]
+
+
+async def count_rows() -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(Message))
+
+
+async def reset():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Message))
+        await db.commit()
+
+
+async def bench_per_row(rows) -> float:
+    started = time.perf_counter()
+    for row in rows:
+        async with AsyncSessionLocal() as db:
+            db.add(Message(**row))
+            await db.commit()
+    return time.perf_counter() - started
+
+
+async def bench_buffered(rows) -> float:
+    writer = MessageWriteBuffer()
+    writer.start()
+    started = time.perf_counter()
+    for row in rows:
+        await writer.add(row)
+        # 模拟请求之间让出事件循环，后台任务按数量触发写入
+        await asyncio.sleep(0)
+    # 模拟企业微信重试：重复的 msg_id 应被忽略
+    for row in rows[:100]:
+        await writer.add(row)
+    await writer.stop()
+    elapsed = time.perf_counter() - started
+    print(f"  批次 {writer.stats()['batches']}, 写入 {writer.stats()['written']} 行（含重复）")
+    return elapsed
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    init_db()
+
+    print(f"写入 {count} 条消息记录（{BENCH_DIR}）")
+
+    elapsed = await bench_per_row(make_rows(count, "row"))
+    assert await count_rows() == count
+    print(f"逐条提交: {elapsed:.2f}s, {count / elapsed:,.0f} 条/秒")
+
+    await reset()
+    elapsed = await bench_buffered(make_rows(count, "buf"))
+    assert await count_rows() == count
+    print(f"批量写入: {elapsed:.2f}s, {count / elapsed:,.0f} 条/秒")
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""消息检索基准：FTS5 vs LIKE
+
+在临时 SQLite 数据库中写入 N 条消息（默认 100 万），分别用全文索引和 LIKE
+执行与 GET /messages?q= 相同的查询（取第一页 20 条），输出单次耗时。
+FTS5 分别测试默认相关度窗口和不限窗口（对全部命中计算 bm25）。
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_search.py [条数]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = tempfile.mkdtemp(prefix="wecom-search-")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DIR}/search.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import MESSAGE_SEARCH_RANK_WINDOW  # noqa: E402
+from app.core.database import AsyncSessionLocal, async_engine, engine, init_db  # noqa: E402
+from app.models.message import Message  # noqa: E402
+from app.services.history import MESSAGE_ORDER  # noqa: E402
+from app.services.search import MessageSearch  # noqa: E402
+
+WORDS = [
+    "服务器", "磁盘", "内存", "告警", "恢复", "状态", "查询", "部署", "重启", "备份",
+    "数据库", "连接", "超时", "失败", "成功", "任务", "定时", "日志", "网络", "延迟",
+]
+
+
+def seed(count: int):
+    """写入测试数据（触发器同步写入全文索引）"""
+    rng = random.Random(42)
+    batch = 10000
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for offset in range(0, count, batch):
+            rows = []
+            for i in range(offset, min(offset + batch, count)):
+                content = "".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12)))
+                if i % 100000 == 7:
+                    content += " 罕见关键词ZX81"
+                rows.append(
+                    {
+                        "msg_id": f"m{i}",
+                        "msg_type": "text",
+                        "from_user": f"user{i % 200}",
+                        "to_user": "corp",
+                        "content": content,
+                        "create_time": 1_700_000_000 + i,
+                        "direction": "in" if i % 2 else "out",
+                        "status": "received",
+                    }
+                )
+            conn.execute(Message.__table__.insert(), rows)
+    print(f"写入 {count} 条: {time.perf_counter() - started:.1f}s")
+
+
+async def timed(label: str, query, rounds: int = 5):
+    async with AsyncSessionLocal() as db:
+        await db.execute(query)
+        started = time.perf_counter()
+        for _ in range(rounds):
+            rows = (await db.execute(query)).all()
+        elapsed = (time.perf_counter() - started) / rounds * 1000
+    print(f"  {label:<36}{elapsed:>10.1f} ms  ({len(rows)} 条)")
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    init_db()
+    seed(count)
+
+    for term in ["罕见关键词ZX81", "数据库连接超时", "服务器"]:
+        print(f"关键词: {term}")
+        for window in (MESSAGE_SEARCH_RANK_WINDOW, 0):
+            query, _ = MessageSearch.fts_query([term], window=window)
+            query = query.order_by(query.selected_columns.rank, Message.id).limit(21)
+            await timed(f"FTS5（相关度，窗口 {window or '不限'}）", query)
+
+        query = MessageSearch.like_query([term]).order_by(*MESSAGE_ORDER).limit(21)
+        await timed("LIKE（按时间）", query, rounds=1)
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
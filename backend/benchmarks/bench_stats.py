@@ -0,0 +1,94 @@
+"""消息统计基准：汇总表 vs messages 表 GROUP BY
+
+在临时 SQLite 数据库中分两轮写入消息（最近 30 天内均匀分布），每轮后
+回填汇总表，比较 GET /messages/stats 的汇总表查询与直接对 messages 表
+GROUP BY 的耗时。汇总表查询耗时应与消息总量基本无关。
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_stats.py [每轮条数]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = tempfile.mkdtemp(prefix="wecom-stats-")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DIR}/stats.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select  # noqa: E402
+
+from app.core.database import AsyncSessionLocal, async_engine, engine, init_db  # noqa: E402
+from app.models.message import Message  # noqa: E402
+from app.models.stats import MessageStat  # noqa: E402
+from app.services.stats import backfill_message_stats, message_stats  # noqa: E402
+
+NOW = int(time.time())
+
+
+def seed(offset: int, count: int):
+    """写入测试数据"""
+    rng = random.Random(offset)
+    batch = 10000
+    with engine.begin() as conn:
+        for start in range(offset, offset + count, batch):
+            conn.execute(
+                Message.__table__.insert(),
+                [
+                    {
+                        "msg_id": f"m{i}",
+                        "msg_type": rng.choice(["text", "text", "text", "event", "image"]),
+                        "from_user": f"user{rng.randrange(50)}",
+                        "to_user": "corp",
+                        "content": "/status",
+                        "create_time": NOW - rng.randrange(30 * 86400),
+                        "direction": rng.choice(["in", "out"]),
+                        "status": "received",
+                    }
+                    for i in range(start, min(start + batch, offset + count))
+                ],
+            )
+        # 重新回填汇总表
+        conn.execute(MessageStat.__table__.delete())
+        backfill_message_stats(conn)
+
+
+async def timed(label: str, run, rounds: int = 5):
+    await run()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await run()
+    elapsed = (time.perf_counter() - started) / rounds * 1000
+    print(f"  {label:<36}{elapsed:>10.1f} ms")
+
+
+async def main():
+    per_round = int(sys.argv[1]) if len(sys.argv) > 1 else 250_000
+    init_db()
+
+    async with AsyncSessionLocal() as db:
+        for round_no in range(2):
+            seed(round_no * per_round, per_round)
+            rows = await db.scalar(select(func.count()).select_from(MessageStat))
+            print(f"消息 {(round_no + 1) * per_round} 条, 汇总 {rows} 行:")
+
+            for range_name in ("24h", "30d"):
+                await timed(f"汇总表 range={range_name}", lambda: message_stats.query(db, range_name))
+
+            async def group_by():
+                since = NOW - 30 * 86400
+                for column in (Message.direction, Message.msg_type, Message.status, Message.from_user):
+                    await db.execute(
+                        select(column, func.count()).where(Message.create_time >= since).group_by(column)
+                    )
+
+            await timed("messages GROUP BY 30d", group_by, rounds=1)
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""XML 解析基准：快速扫描 vs ElementTree
+
+对比回调信封提取 Encrypt 和解密后消息体解析两个环节的单条 CPU 耗时，
+负载取企业微信真实大小（约 2KB 中文文本消息，对应约 4KB 的 Base64 密文）。
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_xml_parse.py [次数]
+"""
+
+import base64
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.wechat.parser import MessageParser  # noqa: E402
+from app.services.wechat.scanner import extract_encrypt, scan_fields  # noqa: E402
+
+CONTENT = "帮我查一下服务器状态 " * 100
+
+PAYLOAD = f"""<xml>
+<ToUserName><![CDATA[ww1234567890abcdef]]></ToUserName>
+<FromUserName><![CDATA[zhangsan]]></FromUserName>
+<CreateTime>1700000000</CreateTime>
+<MsgType><![CDATA[text]]></MsgType>
+<Content><![CDATA[{CONTENT}]]></Content>
+<MsgId>7300000000000000001</MsgId>
+<AgentID>1000002</AgentID>
+</xml>"""
+
+ENVELOPE = f"""<xml>
+<ToUserName><![CDATA[ww1234567890abcdef]]></ToUserName>
+<Encrypt><![CDATA[{base64.b64encode(os.urandom(len(PAYLOAD.encode()) + 32)).decode()}]]></Encrypt>
+<AgentID><![CDATA[1000002]]></AgentID>
+</xml>"""
+
+
+def bench(name: str, func, rounds: int) -> float:
+    """运行基准并打印单条耗时（微秒）"""
+    func()
+    started = time.process_time()
+    for _ in range(rounds):
+        func()
+    per_call = (time.process_time() - started) / rounds * 1e6
+    print(f"  {name:<28}{per_call:>10.2f} us/条")
+    return per_call
+
+
+def parse_with_elementtree():
+    """原实现：ElementTree 完整解析后逐个 find"""
+    root = ET.fromstring(PAYLOAD)
+    return {
+        tag: root.find(tag).text
+        for tag in ("ToUserName", "FromUserName", "CreateTime", "MsgType", "Content", "MsgId", "AgentID")
+    }
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    assert extract_encrypt(ENVELOPE) == ET.fromstring(ENVELOPE).find("Encrypt").text
+    assert scan_fields(PAYLOAD) == parse_with_elementtree()
+
+    print(f"信封 {len(ENVELOPE)} 字节，消息体 {len(PAYLOAD.encode())} 字节，{rounds} 次")
+
+    print("提取 Encrypt:")
+    slow = bench("ElementTree", lambda: ET.fromstring(ENVELOPE).find("Encrypt").text, rounds)
+    fast = bench("extract_encrypt", lambda: extract_encrypt(ENVELOPE), rounds)
+    print(f"  加速 {slow / fast:.1f}x")
+
+    print("解析消息体:")
+    slow = bench("ElementTree", parse_with_elementtree, rounds)
+    fast = bench("scan_fields", lambda: scan_fields(PAYLOAD), rounds)
+    print(f"  加速 {slow / fast:.1f}x")
+
+    print("MessageParser.parse（含消息对象构建）:")
+    message = MessageParser.parse(PAYLOAD)
+    bench("MessageParser.parse", lambda: MessageParser.parse(PAYLOAD), rounds)
+    bench("IncomingMessage.to_model", message.to_model, rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""消息列表查询计划检查
+
+在临时 SQLite 数据库上为 GET /messages 的每种筛选组合（方向、发送者、
+时间范围、游标）生成与接口相同的查询，检查 EXPLAIN QUERY PLAN：
+1. 使用预期的索引
+2. 不出现全表扫描和临时排序（USE TEMP B-TREE）
+
+任一组合不符合预期时以非零状态退出，可在修改模型或查询后手动运行。
+
+用法（在 backend 目录下）:
+    python benchmarks/check_query_plans.py
+"""
+
+import os
+import sys
+import tempfile
+from itertools import product
+
+BENCH_DIR = tempfile.mkdtemp(prefix="wecom-plan-")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DIR}/plan.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select  # noqa: E402
+
+from app.core.database import engine, init_db  # noqa: E402
+from app.models.message import Message  # noqa: E402
+from app.services.history import (  # noqa: E402
+    MESSAGE_ORDER,
+    after_cursor,
+    apply_message_filters,
+    encode_cursor,
+)
+
+ROWS = 20000
+
+
+def seed():
+    """写入测试数据并收集统计信息"""
+    with engine.begin() as conn:
+        conn.execute(
+            Message.__table__.insert(),
+            [
+                {
+                    "msg_id": f"m{i}",
+                    "msg_type": "text",
+                    "from_user": f"user{i % 50}",
+                    "to_user": "corp",
+                    "content": "/status",
+                    "create_time": 1_700_000_000 + i,
+                    "direction": "in" if i % 2 else "out",
+                    "status": "received",
+                }
+                for i in range(ROWS)
+            ],
+        )
+        conn.exec_driver_sql("ANALYZE")
+
+
+def expected_index(direction, from_user) -> str:
+    """每种筛选组合预期使用的索引"""
+    if from_user:
+        return "ix_messages_from_user_create_time"
+    if direction:
+        return "ix_messages_direction_create_time"
+    return "ix_messages_create_time"
+
+
+def explain(conn, query) -> list:
+    sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+    return [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def check(conn, label: str, query, index: str, allow_temp: bool = False) -> bool:
+    plan = explain(conn, query)
+    text = " | ".join(plan)
+    ok = f"INDEX {index}" in text and (allow_temp or "TEMP B-TREE" not in text)
+    print(f"{'OK  ' if ok else 'FAIL'} {label:<52} {text}")
+    return ok
+
+
+def main():
+    init_db()
+    seed()
+
+    failures = 0
+    cursor = encode_cursor(1_700_000_000 + ROWS // 2, ROWS // 2)
+
+    with engine.connect() as conn:
+        for direction, from_user, start_time, end_time, use_cursor in product(
+            [None, "in"],
+            [None, "user1"],
+            [None, 1_700_005_000],
+            [None, 1_700_015_000],
+            [False, True],
+        ):
+            index = expected_index(direction, from_user)
+            filtered = apply_message_filters(
+                select(Message), direction, from_user, start_time, end_time
+            )
+            label = (
+                f"direction={direction} from_user={from_user} "
+                f"start={bool(start_time)} end={bool(end_time)} cursor={use_cursor}"
+            )
+
+            # 列表查询
+            query = filtered.order_by(*MESSAGE_ORDER).limit(21)
+            if use_cursor:
+                query = after_cursor(query, cursor)
+            failures += not check(conn, "list  " + label, query, index)
+
+            # 总数查询（与游标无关）
+            if not use_cursor:
+                count = select(func.count()).select_from(filtered.subquery())
+                failures += not check(conn, "count " + label, count, index, allow_temp=True)
+
+    if failures:
+        print(f"\n{failures} 个查询未使用预期索引")
+        sys.exit(1)
+    print("\n全部查询使用预期索引")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,7 @@ import type {
   Command,
   CommandUpdate,
   CommandSyncMenuResponse,
+  DashboardSummary,
 } from '@/types/api'
 
 class ApiClient {
@@ -136,6 +137,8 @@ class ApiClient {
     from_user?: string
     start_time?: number
     end_time?: number
+    cursor?: string
+    total_mode?: 'exact' | 'cached' | 'approx' | 'none'
   }): Promise<MessageListResponse> {
     const response = await this.client.get('/messages', { params })
     return response.data
@@ -167,6 +170,16 @@ class ApiClient {
     return response.data
   }
 
+  // ========== 仪表盘 ==========
+
+  /**
+   * 获取仪表盘汇总（最近消息、命令、配置状态、计数）
+   */
+  async getDashboardSummary(): Promise<DashboardSummary> {
+    const response = await this.client.get('/dashboard/summary')
+    return response.data
+  }
+
   // ========== 健康检查 ==========
 
   /**
@@ -81,10 +81,12 @@ export interface MessageSend {
 }
 
 export interface MessageListResponse {
-  total: number
+  total: number | null
   page: number
   page_size: number
   items: Message[]
+  next_cursor?: string | null
+  rank_window?: number | null
 }
 
 // 命令
@@ -98,6 +100,11 @@ export interface Command {
   admin_only: boolean
   enabled: boolean
   sort_order: number
+  timeout?: number | null  // 超时时间（秒），为空使用默认值
+  max_concurrency?: number | null  // 最大并发执行数，为空不限制
+  background?: boolean  // 是否作为后台任务执行
+  aliases?: string[]  // 别名
+  usage?: string | null  // 用法（声明了参数的命令）
 }
 
 export interface CommandUpdate {
@@ -110,3 +117,28 @@ export interface CommandSyncMenuResponse {
   message: string
   menu_count?: number
 }
+
+// 仪表盘
+export interface DashboardConfigStatus {
+  configured: boolean
+  callback_configured: boolean
+  corp_id: string | null
+  agent_id: string | null
+  admin_count: number
+}
+
+export interface DashboardCounters {
+  today_messages: number
+  today_in: number
+  today_out: number
+  enabled_commands: number
+  total_commands: number
+}
+
+export interface DashboardSummary {
+  recent_messages: Message[]
+  commands: Command[]
+  config: DashboardConfigStatus
+  counters: DashboardCounters
+  generated_at: number
+}